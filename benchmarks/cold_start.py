@@ -0,0 +1,153 @@
+"""Benchmark cold-start time to first response, eager versus lazy service wiring.
+
+Run from the repository root:
+
+    python benchmarks/cold_start.py [--runs N] [--first help,weather] [--owm-latency MS] [--bot-latency MS]
+
+Every sample is a fresh Python process, as on a Cloud Functions cold start.
+The child times ``import main`` and the first webhook update it handles: a
+``help`` callback (needs no weather service) or a city name sent as text
+(``weather``). OWM and the Telegram Bot API are the local stand-ins of
+``load_test.py``, shared by all children. Medians are reported per mode; the
+Bot API methods each child called are compared between modes as a parity check.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCHMARKS_DIR, '..', 'src')
+
+FIRST_UPDATES = ('help', 'weather')
+MODES = {'eager': '0', 'lazy': '1'}
+
+
+def child(first: str, owm_url: str, bot_url: str) -> None:
+    """Import the bot, handle one update and print the timings as JSON."""
+    sys.path.insert(0, SRC_DIR)
+    start = time.perf_counter()
+    import main as bot_main
+    imported = time.perf_counter()
+
+    import flask
+    from telebot import apihelper
+
+    import utils.http_pool
+    from load_test import SECRET_TOKEN, _RouteAdapter, callback_update, message_update
+    from utils.lazy import LazyObject
+
+    apihelper.API_URL = f'{bot_url}/bot{{0}}/{{1}}'
+    owm_prefixes = ('https://api.openweathermap.org', 'http://api.openweathermap.org')
+
+    def route_owm(session: Any) -> None:
+        for prefix in owm_prefixes:
+            session.mount(prefix, _RouteAdapter(owm_url))
+
+    service = bot_main.weather_service
+    if isinstance(service, LazyObject) and not service.loaded:
+        # the service module is not imported yet; route the session it will create
+        create_session = utils.http_pool.create_session
+
+        def create_routed_session(*args, **kwargs):
+            session = create_session(*args, **kwargs)
+            route_owm(session)
+            return session
+
+        utils.http_pool.create_session = create_routed_session
+    else:
+        route_owm(service.session)
+
+    if first == 'help':
+        update = callback_update(1, 1001, 'help')
+    else:
+        update = message_update(1, 1001, text='Kharkiv')
+    app = flask.Flask('cold_start')
+    setup_done = time.perf_counter()
+    with app.test_request_context('/', method='POST', json=update,
+                                  headers={'X-Telegram-Bot-Api-Secret-Token': SECRET_TOKEN}):
+        response = bot_main.webhook_run(flask.request)
+    responded = time.perf_counter()
+    print(json.dumps({
+        'import_ms': (imported - start) * 1000,
+        'first_ms': (responded - setup_done) * 1000,
+        'status': response[1],
+        'lazy_loaded': not isinstance(service, LazyObject) or service.loaded,
+    }))
+
+
+def run_child(mode: str, first: str, owm_url: str, bot_url: str) -> dict[str, Any]:
+    """Start one child process in mode and return its timings plus total wall time."""
+    from load_test import BOT_TOKEN, SECRET_TOKEN
+
+    env = dict(os.environ, LAZY_INIT=MODES[mode], STARTUP_IMPORT_REPORT='0')
+    env.setdefault('TELEBOT_KEY', BOT_TOKEN)
+    env.setdefault('OWM_KEY', 'harness')
+    env.setdefault('WEBHOOK_TOKEN', SECRET_TOKEN)
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, __file__, '--child', first, '--owm-url', owm_url, '--bot-url', bot_url],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['wall_ms'] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='processes per mode and first update')
+    parser.add_argument('--first', default=','.join(FIRST_UPDATES), help='first updates to measure')
+    parser.add_argument('--owm-latency', type=float, default=20, help='OWM response delay in ms')
+    parser.add_argument('--bot-latency', type=float, default=10, help='Bot API response delay in ms')
+    parser.add_argument('--child', choices=FIRST_UPDATES, help=argparse.SUPPRESS)
+    parser.add_argument('--owm-url', help=argparse.SUPPRESS)
+    parser.add_argument('--bot-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.owm_url, args.bot_url)
+        return
+
+    from load_test import StandIn, bot_responder, owm_responder
+
+    owm = StandIn(owm_responder(42), args.owm_latency / 1000, 0.0, 500, 42)
+    bot_api = StandIn(bot_responder, args.bot_latency / 1000, 0.0, 500, 42)
+
+    print(f'{args.runs} cold starts per row, OWM {args.owm_latency:g} ms, Bot API {args.bot_latency:g} ms')
+    print(f"{'first update':<14}{'mode':<7}{'import main':>12}{'first reply':>13}{'process total':>15}  service loaded")
+    mismatched = []
+    for first in args.first.split(','):
+        calls = {}
+        for mode in MODES:
+            results = []
+            for _ in range(args.runs):
+                before = bot_api.snapshot()
+                results.append(run_child(mode, first, owm.url, bot_api.url))
+                calls.setdefault(mode, set()).add(tuple(sorted((bot_api.snapshot() - before).items())))
+            failed = [r['status'] for r in results if r['status'] != 200]
+            loaded = {r['lazy_loaded'] for r in results}
+            print(f'{first:<14}{mode:<7}'
+                  f"{statistics.median(r['import_ms'] for r in results):9.1f} ms"
+                  f"{statistics.median(r['first_ms'] for r in results):10.1f} ms"
+                  f"{statistics.median(r['wall_ms'] for r in results):12.1f} ms"
+                  f"  {'/'.join(str(v).lower() for v in sorted(loaded))}"
+                  f"{f'  FAILED {failed}' if failed else ''}")
+            if failed:
+                mismatched.append(f'{first}/{mode}')
+        if len(calls['eager'] | calls['lazy']) != 1:
+            mismatched.append(f'{first}: Bot API calls differ {calls}')
+    print(f"parity: {'OK' if not mismatched else mismatched}")
+
+    owm.server.shutdown()
+    bot_api.server.shutdown()
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
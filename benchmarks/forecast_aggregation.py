@@ -0,0 +1,123 @@
+"""Benchmark vectorized forecast aggregation against the per-entry loop.
+
+Run from the repository root:
+
+    python benchmarks/forecast_aggregation.py [--locations N] [--repeat N]
+
+Synthetic OWM /forecast payloads are aggregated with the previous
+dict-per-entry loop and with ``aggregate_daily``; outputs are checked for
+parity before timing.
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import timeit
+from collections import Counter, defaultdict
+
+import pytz
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from config import LOCALE  # noqa: E402
+from services.owm_parser import (  # noqa: E402
+    HPA_TO_MMHG,
+    ForecastSeries,
+    aggregate_daily,
+    icon_to_emoji,
+    kelvin_to_celsius,
+)
+from utils.bot_helpers import format_localized_weekday  # noqa: E402
+
+TIMEZONES = ['Europe/Moscow', 'Europe/London', 'America/New_York', 'Asia/Kolkata', 'Australia/Sydney', 'UTC']
+STATUSES = ['ясно', 'переменная облачность', 'пасмурно', 'небольшой дождь', 'дождь', 'снег']
+ICONS = ['01d', '01n', '02d', '03d', '04n', '09d', '10d', '11d', '13d', '50d']
+
+
+def make_payload(rng: random.Random, start: int) -> dict:
+    """Build a synthetic 5 day / 3 hour OWM /forecast payload."""
+    return {
+        'city': {'name': 'Bench'},
+        'list': [
+            {
+                'dt': start + i * 3 * 3600,
+                'main': {
+                    'temp': rng.uniform(250.0, 310.0),
+                    'humidity': rng.randint(20, 100),
+                    'pressure': rng.randint(980, 1040),
+                },
+                'wind': {'speed': rng.uniform(0.0, 15.0)},
+                'weather': [{'description': rng.choice(STATUSES[:3]), 'icon': rng.choice(ICONS[:4])}],
+            }
+            for i in range(40)
+        ],
+    }
+
+
+def legacy_aggregate(items: list[dict], timezone: pytz.BaseTzInfo) -> list[dict]:
+    """Per-entry loop with Counter-based modes, as used before vectorization."""
+    daily_data: defaultdict[datetime.date, list[dict]] = defaultdict(list)
+    for item in items:
+        main = item['main']
+        weather = item['weather'][0]
+        dt_local = datetime.datetime.fromtimestamp(item['dt'], tz=timezone)
+        daily_data[dt_local.date()].append({
+            'temp': kelvin_to_celsius(main['temp']),
+            'humidity': main['humidity'],
+            'pressure': main['pressure'] * HPA_TO_MMHG,
+            'wind_speed': item['wind']['speed'],
+            'status': weather['description'],
+            'icon': icon_to_emoji(weather['icon']),
+        })
+    forecasts = []
+    for day, entries in sorted(daily_data.items()):
+        formatted_date = format_localized_weekday(day, LOCALE)
+        temps = [e['temp'] for e in entries]
+        n = len(entries)
+        forecasts.append({
+            'date': formatted_date.capitalize(),
+            'temp_min': round(min(temps)),
+            'temp_max': round(max(temps)),
+            'humidity_avg': round(sum(e['humidity'] for e in entries) / n),
+            'pressure_avg': round(sum(e['pressure'] for e in entries) / n),
+            'wind_speed_avg': round(sum(e['wind_speed'] for e in entries) / n),
+            'status': Counter(e['status'] for e in entries).most_common(1)[0][0],
+            'icon': Counter(e['icon'] for e in entries).most_common(1)[0][0],
+        })
+    return forecasts
+
+
+def vectorized_aggregate(items: list[dict], timezone: pytz.BaseTzInfo) -> list[dict]:
+    """Columnar series with grouped NumPy reductions."""
+    return aggregate_daily(ForecastSeries.from_json(items), timezone)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--locations', type=int, default=200, help='payloads aggregated per tick')
+    parser.add_argument('--repeat', type=int, default=5, help='timing repetitions')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # Start around the 2024 EU/US DST change so some series cross it
+    base = int(datetime.datetime(2024, 3, 28, tzinfo=pytz.utc).timestamp())
+    batch = [
+        (make_payload(rng, base + rng.randrange(0, 10 * 86400, 3600))['list'], pytz.timezone(rng.choice(TIMEZONES)))
+        for _ in range(args.locations)
+    ]
+
+    mismatches = sum(legacy_aggregate(items, tz) != vectorized_aggregate(items, tz) for items, tz in batch)
+    print(f'parity: {args.locations - mismatches}/{args.locations} payloads identical')
+
+    for name, func in (('loop', legacy_aggregate), ('vectorized', vectorized_aggregate)):
+        best = min(timeit.repeat(lambda: [func(items, tz) for items, tz in batch], number=1, repeat=args.repeat))
+        print(f'{name:>10}: {best * 1000:8.2f} ms per tick, {best / args.locations * 1e6:8.1f} us per location')
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
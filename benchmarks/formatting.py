@@ -0,0 +1,176 @@
+"""Benchmark precompiled formatter templates and memoized localized dates.
+
+Run from the repository root:
+
+    python benchmarks/formatting.py [--messages N] [--repeat N]
+
+Messages are rendered with the previous concatenating formatter and with
+WeatherFormatter. Outputs are checked for parity, then time and peak
+allocation per message are reported, together with the cost of localized
+date strings with and without memoization.
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+import timeit
+import tracemalloc
+from typing import Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from config import DEGREE_SIGN, LOCALE  # noqa: E402
+from services.weather_formatter import WeatherFormatter  # noqa: E402
+from utils.bot_helpers import format_localized_weekday  # noqa: E402
+
+LOCATIONS = [('Москва', 'Moscow', 'RU', 'Europe/Moscow'), ('Kyiv', '', 'UA', 'Europe/Kyiv'),
+             ('London', 'England', 'GB', 'Europe/London'), ('Nowhere', '', '', 'UTC')]
+STATUSES = ['ясно', 'переменная облачность', 'небольшой дождь']
+ICONS = ['\U00002600', '\U000026C5', '\U00002614']
+
+
+class LegacyFormatter:
+    """Formatter as it was before templates: per-call header, flags and += concatenation."""
+
+    @staticmethod
+    def _country_flag(country_code: str) -> str:
+        return ''.join(chr(0x1F1E6 + ord(c) - ord('A')) for c in country_code.upper())
+
+    @classmethod
+    def _format_location_header(cls, username: str, data: dict, trailing_newline: bool = True) -> str:
+        lines = [f"{username}, в <b>{data['location_name']}</b>\n"]
+        if data.get('state'):
+            lines.append(f"\U0001F5FA <i>Регион:</i> <b>{data['state']}</b>")
+        if data.get('country'):
+            flag = cls._country_flag(data['country'])
+            lines.append(f"{flag} <i>Код страны:</i> <b>{data['country']}</b>")
+        lines.append(f"\U0001F30D <i>Часовой пояс:</i> <b>{data['timezone']}</b>")
+        result = '\n'.join(lines) + '\n'
+        if trailing_newline:
+            result += '\n'
+        return result
+
+    @staticmethod
+    def _format_stale_notice(data: dict) -> str:
+        if not data.get('stale'):
+            return ''
+        minutes = int((time.time() - data['fetched_at']) // 60)
+        return f"\U000026A0 <i>Сервис погоды недоступен, данные обновлены {minutes} мин. назад.</i>\n\n"
+
+    @classmethod
+    def format_current_weather(cls, username: str, data: dict) -> str:
+        header = cls._format_location_header(username, data, trailing_newline=False)
+        return (
+            f"{header}"
+            f"\U0001F4C5 <i>Дата:</i> <b>{data['date']}</b>\n"
+            f"\U000023F0 <i>Текущее время:</i> <b>{data['time']}</b>\n"
+            f"{data['icon']} <i>Статус:</i> <b>{data['status'].capitalize()}</b>\n"
+            f"\U0001F321 <i>Температура воздуха:</i> <b>{data['temp']} {DEGREE_SIGN}C</b>\n"
+            f"\U0001F4CA <i>Давление:</i> <b>{data['pressure']} мм</b>\n"
+            f"\U0001F4A7 <i>Влажность:</i> <b>{data['humidity']} %</b>\n"
+            f"\U0001F4A8 <i>Скорость ветра:</i> <b>{data['wind_speed']} м/c</b>\n\n"
+            f"{cls._format_stale_notice(data)}"
+        )
+
+    @classmethod
+    def format_forecast(cls, username: str, data: dict) -> str:
+        answer = cls._format_location_header(username, data)
+        for day in data['forecasts']:
+            if day['temp_min'] == day['temp_max']:
+                temp_label = 'Средняя температура воздуха'
+                temp_str = str(day['temp_min'])
+            else:
+                temp_label = 'Температура воздуха'
+                temp_str = f"{day['temp_min']}...{day['temp_max']}"
+
+            answer += (
+                f"\U0001F4C5 <i>Дата:</i> <b>{day['date']}</b>\n"
+                f"{day['icon']} <i>Статус:</i> <b>{day['status'].capitalize()}</b>\n"
+                f"\U0001F321 <i>{temp_label}:</i> <b>{temp_str} {DEGREE_SIGN}C</b>\n"
+                f"\U0001F4CA <i>Давление:</i> <b>{day['pressure_avg']} мм</b>\n"
+                f"\U0001F4A7 <i>Влажность:</i> <b>{day['humidity_avg']} %</b>\n"
+                f"\U0001F4A8 <i>Скорость ветра:</i> <b>{day['wind_speed_avg']} м/c</b>\n\n"
+            )
+        return answer + cls._format_stale_notice(data)
+
+
+def make_data(rng: random.Random) -> tuple[dict, dict]:
+    """Build a current weather dict and a forecast dict for a random location."""
+    name, state, country, tz_name = rng.choice(LOCATIONS)
+    location = {'location_name': name, 'state': state, 'country': country, 'timezone': tz_name}
+    if rng.random() < 0.2:
+        location.update(stale=True, fetched_at=time.time() - rng.randint(0, 3600))
+    current = {
+        **location, 'date': 'Четверг, 28 марта 2024', 'time': '12:34:56',
+        'icon': rng.choice(ICONS), 'status': rng.choice(STATUSES), 'temp': rng.randint(-20, 30),
+        'pressure': rng.randint(740, 780), 'humidity': rng.randint(20, 100), 'wind_speed': rng.randint(0, 15),
+    }
+    today = datetime.date(2024, 3, 28)
+    forecasts = []
+    for i in range(6):
+        temp_min = rng.randint(-20, 30)
+        forecasts.append({
+            'date': format_localized_weekday(today + datetime.timedelta(days=i), LOCALE).capitalize(),
+            'temp_min': temp_min, 'temp_max': temp_min + rng.choice([0, 0, 3, 8]),
+            'humidity_avg': rng.randint(20, 100), 'pressure_avg': rng.randint(740, 780),
+            'wind_speed_avg': rng.randint(0, 15), 'status': rng.choice(STATUSES), 'icon': rng.choice(ICONS),
+        })
+    return current, {**location, 'forecasts': forecasts}
+
+
+def peak_allocation(func: Callable[..., object], items: list[tuple]) -> float:
+    """Return the mean peak of memory allocated by one call, in bytes."""
+    total = 0
+    tracemalloc.start()
+    for args in items:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        func(*args)
+        total += tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return total / len(items)
+
+
+def report(name: str, func: Callable[..., object], items: list[tuple], repeat: int) -> None:
+    """Print time and peak allocation per call of func over items."""
+    best = min(timeit.repeat(lambda: [func(*args) for args in items], number=1, repeat=repeat))
+    peak = peak_allocation(func, items[:200])
+    print(f'  {name:>10}: {best / len(items) * 1e6:8.2f} us/call, {peak:8.0f} B peak allocation')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=2000, help='messages rendered per kind')
+    parser.add_argument('--repeat', type=int, default=5, help='timing repetitions')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    samples = [make_data(rng) for _ in range(args.messages)]
+    users = [f'user{rng.randint(1, 500)}' for _ in samples]
+
+    failed = False
+    for kind, index, method in (('current', 0, 'format_current_weather'), ('forecast', 1, 'format_forecast')):
+        same = sum(
+            getattr(LegacyFormatter, method)(user, data[index]) == getattr(WeatherFormatter, method)(user, data[index])
+            for user, data in zip(users, samples)
+        )
+        failed |= same != len(samples)
+        print(f'{kind}: parity {same}/{len(samples)} messages identical')
+        items = [(user, data[index]) for user, data in zip(users, samples)]
+        for name, formatter in (('concat', LegacyFormatter), ('templates', WeatherFormatter)):
+            report(name, getattr(formatter, method), items, args.repeat)
+
+    days = [datetime.date(2024, 3, 28) + datetime.timedelta(days=rng.randrange(6)) for _ in range(args.messages)]
+    print('localized dates:')
+    for name, func in (('babel', format_localized_weekday.__wrapped__), ('memoized', format_localized_weekday)):
+        report(name, func, [(day, LOCALE) for day in days], args.repeat)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Benchmark pooled keep-alive sessions against a new connection per request.
+
+Run from the repository root:
+
+    python benchmarks/http_pool.py [--requests N] [--workers N] [--url URL]
+
+By default a local HTTP/1.1 keep-alive server stands in for OWM. Requests are
+made the way pyowm does without retries configured (``requests.get``, one
+connection each) and through the shared pooled session. Responses are checked
+for parity, then time per request and the number of TCP connections accepted
+by the server are reported. Against a real HTTPS host (``--url``) the pooled
+session also saves a TLS handshake per request.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from utils.http_pool import connection_stats, create_session  # noqa: E402
+
+BODY = b'{"coord": {"lon": 36.25, "lat": 50.0}, "weather": [{"id": 800, "icon": "01d"}], "main": {"temp": 281.5}}'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Keep-alive handler answering every GET with a small OWM-like JSON body."""
+
+    protocol_version = 'HTTP/1.1'
+    # headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls on kept-alive sockets
+    disable_nagle_algorithm = True
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self) -> None:
+        super().setup()
+        with _Handler.lock:
+            _Handler.connections += 1
+
+    def do_GET(self) -> None:
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def run(get: Callable[[str], requests.Response], url: str, count: int, workers: int) -> tuple[float, list[bytes]]:
+    """Issue count GETs on workers threads; return elapsed seconds and response bodies."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        bodies = list(pool.map(lambda _: get(url).content, range(count)))
+    return time.perf_counter() - start, bodies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500, help='requests per mode')
+    parser.add_argument('--workers', type=int, default=4, help='concurrent client threads')
+    parser.add_argument('--pool-size', type=int, default=10, help='connections kept per host')
+    parser.add_argument('--url', help='real endpoint to call instead of the local server')
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_port}/data/2.5/weather'
+
+    session = create_session(args.pool_size)
+    results = {}
+    for name, get in (('per-request', requests.get), ('pooled', session.get)):
+        accepted_before = _Handler.connections
+        elapsed, bodies = run(get, url, args.requests, args.workers)
+        results[name] = bodies
+        accepted = f', {_Handler.connections - accepted_before} connections accepted' if server else ''
+        print(f'{name:>12}: {elapsed / args.requests * 1e6:8.1f} us/request{accepted}')
+
+    for host, stats in connection_stats(session).items():
+        print(f'pooled session {host}: {stats}')
+
+    same = sum(a == b for a, b in zip(results['per-request'], results['pooled']))
+    print(f'parity: {same}/{args.requests} responses identical')
+    if server:
+        server.shutdown()
+    if same != args.requests:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
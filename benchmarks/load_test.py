@@ -0,0 +1,318 @@
+"""End-to-end load test of webhook_run against local OWM and Bot API stand-ins.
+
+Run from the repository root:
+
+    python benchmarks/load_test.py [--updates N] [--concurrency N] [--flows current,forecast,callback]
+                                   [--owm-latency MS] [--owm-error-rate P]
+                                   [--bot-latency MS] [--bot-error-rate P]
+
+Two local HTTP servers stand in for OpenWeatherMap (``/data/2.5/weather``,
+``/data/2.5/forecast``, ``/geo/1.0/reverse``) and the Telegram Bot API, each
+with configurable latency and error injection. Synthetic Telegram updates are
+posted through ``main.webhook_run`` exactly as Cloud Functions would, and the
+bot's real OWM session and telebot's API URL are routed to the stand-ins.
+
+Per flow it reports throughput, webhook latency percentiles, upstream calls per
+update and the process peak RSS (which includes the in-process stand-ins).
+Weather caches are cleared before each flow. Bot settings are read from the
+environment as usual; the tokens default to harness values.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qs, urlsplit, urlunsplit
+
+from requests.adapters import HTTPAdapter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+BOT_TOKEN = '123456:harness'
+SECRET_TOKEN = 'harness'
+
+# City names sent as text: gazetteer names and aliases, names OWM has to resolve, and misses
+KNOWN_CITIES = ['Kharkiv', 'Киев', 'Lviv', 'Одесса', 'Warsaw', 'Berlin', 'Moscow', 'Kiev', 'Dnipro', 'Minsk']
+OTHER_CITIES = ['Springfield', 'Ushuaia', 'Reykjavik', 'Nairobi', 'Lima', 'Perth']
+MISSING_CITIES = ['Zzyzxville', 'Qwertyopolis']
+LOCATIONS = [(50.0, 36.23), (49.84, 24.03), (52.52, 13.4), (40.71, -74.0), (-33.87, 151.2)]
+CALLBACKS = ['help', 'author', 'location', 'forecast']
+
+
+def _coords_for(name: str) -> tuple[float, float]:
+    """Stable pseudo coordinates for a city name the stand-in OWM 'knows'."""
+    digest = hashlib.sha1(name.casefold().encode('utf-8')).digest()
+    return round(digest[0] / 255 * 120 - 50, 4), round(digest[1] / 255 * 340 - 170, 4)
+
+
+def _weather_item(rng: random.Random) -> dict[str, Any]:
+    return {
+        'main': {
+            'temp': round(rng.uniform(250, 310), 2), 'feels_like': 280.0, 'temp_min': 279.0, 'temp_max': 283.0,
+            'pressure': rng.randint(990, 1030), 'humidity': rng.randint(20, 100),
+        },
+        'weather': [{'id': 800, 'main': 'Clear', 'description': 'ясно', 'icon': rng.choice(['01d', '02n', '10d'])}],
+        'clouds': {'all': 0},
+        'wind': {'speed': round(rng.uniform(0, 12), 2), 'deg': rng.randint(0, 359)},
+        'visibility': 10000,
+    }
+
+
+def weather_payload(name: str, lat: float, lon: float, rng: random.Random) -> dict[str, Any]:
+    return {
+        'coord': {'lon': lon, 'lat': lat}, 'base': 'stations', **_weather_item(rng), 'dt': int(time.time()),
+        'sys': {'country': 'XX', 'sunrise': 0, 'sunset': 0}, 'timezone': 0, 'id': 1, 'name': name, 'cod': 200,
+    }
+
+
+def forecast_payload(name: str, lat: float, lon: float, rng: random.Random) -> dict[str, Any]:
+    start = int(time.time()) // 10800 * 10800
+    return {
+        'cod': '200', 'message': 0, 'cnt': 40,
+        'list': [{'dt': start + i * 10800, **_weather_item(rng), 'pop': 0.2, 'sys': {'pod': 'd'}} for i in range(40)],
+        'city': {'id': 1, 'name': name, 'coord': {'lat': lat, 'lon': lon}, 'country': 'XX', 'timezone': 0},
+    }
+
+
+class StandIn:
+    """Threaded local HTTP server with latency/error injection and per-path call counters."""
+
+    def __init__(self, respond: Callable[[str, str, dict], tuple[int, Any]], latency: float, error_rate: float,
+                 error_status: int, seed: int) -> None:
+        self.calls: Counter = Counter()
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def _handle(self) -> None:
+                url = urlsplit(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length).decode('utf-8') if length else ''
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                if body and self.headers.get('Content-Type', '').startswith('application/x-www-form-urlencoded'):
+                    params.update({k: v[0] for k, v in parse_qs(body).items()})
+                with stand_in._lock:
+                    stand_in.calls[url.path.rsplit('/', 1)[-1]] += 1
+                    failed = stand_in._rng.random() < error_rate
+                if latency:
+                    time.sleep(latency)
+                if failed:
+                    status, payload = error_status, {'ok': False, 'error_code': error_status, 'description': 'injected',
+                                                     'cod': error_status, 'message': 'injected'}
+                else:
+                    status, payload = respond(url.path, self.command, params)
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = _handle
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def snapshot(self) -> Counter:
+        with self._lock:
+            return Counter(self.calls)
+
+
+def owm_responder(seed: int) -> Callable[[str, str, dict], tuple[int, Any]]:
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def respond(path: str, _method: str, params: dict) -> tuple[int, Any]:
+        if path.endswith('/reverse'):
+            return 200, [{'name': 'Harness', 'country': 'XX', 'state': 'Harness State'}]
+        if 'q' in params:
+            name = params['q']
+            if name.casefold().startswith(('zz', 'qwerty')):
+                return 404, {'cod': '404', 'message': 'city not found'}
+            lat, lon = _coords_for(name)
+        else:
+            name, lat, lon = 'Harness', float(params['lat']), float(params['lon'])
+        with lock:
+            if path.endswith('/forecast'):
+                return 200, forecast_payload(name, lat, lon, rng)
+            return 200, weather_payload(name, lat, lon, rng)
+
+    return respond
+
+
+def bot_responder(path: str, _method: str, params: dict) -> tuple[int, Any]:
+    method = path.rsplit('/', 1)[-1]
+    if method.startswith(('send', 'edit')) and method != 'sendChatAction':
+        chat_id = int(params.get('chat_id', 1))
+        result = {'message_id': 1, 'date': int(time.time()), 'chat': {'id': chat_id, 'type': 'private'}, 'text': ''}
+        return 200, {'ok': True, 'result': result}
+    return 200, {'ok': True, 'result': True}
+
+
+class _RouteAdapter(HTTPAdapter):
+    """Transport adapter sending every request of a session to a local stand-in server."""
+
+    def __init__(self, base_url: str, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.base = urlsplit(base_url)
+
+    def send(self, request, **kwargs):
+        url = urlsplit(request.url)
+        request.url = urlunsplit((self.base.scheme, self.base.netloc, url.path, url.query, ''))
+        return super().send(request, **kwargs)
+
+
+def _user(chat_id: int) -> dict[str, Any]:
+    return {'id': chat_id, 'is_bot': False, 'first_name': 'load', 'username': f'load{chat_id}'}
+
+
+def message_update(update_id: int, chat_id: int, text: Optional[str] = None,
+                   location: Optional[tuple[float, float]] = None) -> dict[str, Any]:
+    message = {
+        'message_id': update_id, 'date': int(time.time()), 'from': _user(chat_id),
+        'chat': {'id': chat_id, 'type': 'private', 'first_name': 'load'},
+    }
+    if location:
+        message['location'] = {'latitude': location[0], 'longitude': location[1]}
+    else:
+        message['text'] = text
+        if text.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+    return {'update_id': update_id, 'message': message}
+
+
+def callback_update(update_id: int, chat_id: int, data: str) -> dict[str, Any]:
+    return {
+        'update_id': update_id,
+        'callback_query': {
+            'id': str(update_id), 'from': _user(chat_id), 'chat_instance': str(chat_id), 'data': data,
+            'message': {
+                'message_id': update_id, 'date': int(time.time()), 'text': 'menu',
+                'chat': {'id': chat_id, 'type': 'private', 'first_name': 'load'},
+            },
+        },
+    }
+
+
+def flow_updates(flow: str, index: int, rng: random.Random) -> list[dict[str, Any]]:
+    """Updates of one iteration of a flow; they belong to one chat and are sent in order."""
+    chat_id = 1000 + index
+    update_id = index * 2
+    if flow == 'current':
+        roll = rng.random()
+        if roll < 0.15:
+            return [message_update(update_id, chat_id, location=rng.choice(LOCATIONS))]
+        if roll < 0.2:
+            return [message_update(update_id, chat_id, text=rng.choice(MISSING_CITIES))]
+        cities = KNOWN_CITIES if roll < 0.8 else OTHER_CITIES
+        return [message_update(update_id, chat_id, text=rng.choice(cities))]
+    if flow == 'forecast':
+        return [
+            message_update(update_id, chat_id, text='/forecast'),
+            message_update(update_id + 1, chat_id, text=rng.choice(KNOWN_CITIES + OTHER_CITIES)),
+        ]
+    return [callback_update(update_id, chat_id, rng.choice(CALLBACKS))]
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """Nearest-rank percentile of pre-sorted samples."""
+    return samples[min(len(samples) - 1, max(0, round(q * len(samples)) - 1))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--updates', type=int, default=300, help='flow iterations per flow')
+    parser.add_argument('--concurrency', type=int, default=1, help='concurrent webhook requests')
+    parser.add_argument('--flows', default='current,forecast,callback')
+    parser.add_argument('--warmup', type=int, default=5, help='untimed iterations before each flow')
+    parser.add_argument('--owm-latency', type=float, default=20, help='OWM response delay in ms')
+    parser.add_argument('--owm-error-rate', type=float, default=0.0)
+    parser.add_argument('--bot-latency', type=float, default=10, help='Bot API response delay in ms')
+    parser.add_argument('--bot-error-rate', type=float, default=0.0)
+    parser.add_argument('--bot-error-status', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    os.environ.setdefault('TELEBOT_KEY', BOT_TOKEN)
+    os.environ.setdefault('OWM_KEY', 'harness')
+    os.environ.setdefault('WEBHOOK_TOKEN', SECRET_TOKEN)
+
+    owm = StandIn(owm_responder(args.seed), args.owm_latency / 1000, args.owm_error_rate, 500, args.seed)
+    bot_api = StandIn(bot_responder, args.bot_latency / 1000, args.bot_error_rate, args.bot_error_status, args.seed)
+
+    import flask
+    from telebot import apihelper
+
+    import main as bot_main
+
+    logging.getLogger().setLevel(logging.WARNING)
+    apihelper.API_URL = f'{bot_api.url}/bot{{0}}/{{1}}'
+    route = _RouteAdapter(owm.url, pool_connections=10, pool_maxsize=10)
+    bot_main.weather_service.session.mount('https://', route)
+    bot_main.weather_service.session.mount('http://', route)
+    app = flask.Flask('load_test')
+    token = os.environ['WEBHOOK_TOKEN']
+
+    def post(update: dict[str, Any]) -> float:
+        start = time.perf_counter()
+        with app.test_request_context('/', method='POST', json=update,
+                                      headers={'X-Telegram-Bot-Api-Secret-Token': token}):
+            bot_main.webhook_run(flask.request)
+        return time.perf_counter() - start
+
+    def run_iteration(updates: list[dict[str, Any]]) -> list[float]:
+        return [post(update) for update in updates]
+
+    service = bot_main.weather_service
+    print(f'concurrency {args.concurrency}, OWM {args.owm_latency:g} ms / {args.owm_error_rate:.0%} errors, '
+          f'Bot API {args.bot_latency:g} ms / {args.bot_error_rate:.0%} errors')
+    for flow in args.flows.split(','):
+        for cache in (service.current_cache, service.forecast_cache, service.geo_cache, service.not_found_cache):
+            cache.clear()
+        rng = random.Random(args.seed)
+        iterations = [flow_updates(flow, i, rng) for i in range(args.warmup + args.updates)]
+        for updates in iterations[:args.warmup]:
+            run_iteration(updates)
+
+        owm_before, bot_before = owm.snapshot(), bot_api.snapshot()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            latencies = sorted(t for batch in pool.map(run_iteration, iterations[args.warmup:]) for t in batch)
+        elapsed = time.perf_counter() - start
+        owm_calls = owm.snapshot() - owm_before
+        bot_calls = bot_api.snapshot() - bot_before
+
+        count = len(latencies)
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f'{flow}: {count} updates, {count / elapsed:.1f} updates/s, '
+              f'p50 {percentile(latencies, 0.5) * 1e3:.1f} ms, p95 {percentile(latencies, 0.95) * 1e3:.1f} ms, '
+              f'p99 {percentile(latencies, 0.99) * 1e3:.1f} ms, peak RSS {peak_rss:.0f} MiB')
+        owm_line = ', '.join(f'{name} {n / count:.2f}' for name, n in sorted(owm_calls.items())) or 'none'
+        bot_line = ', '.join(f'{name} {n / count:.2f}' for name, n in sorted(bot_calls.items())) or 'none'
+        print(f'  OWM calls/update: {owm_line}')
+        print(f'  Bot API calls/update: {bot_line}')
+
+    owm.server.shutdown()
+    bot_api.server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
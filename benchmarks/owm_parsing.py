@@ -0,0 +1,164 @@
+"""Benchmark raw-JSON record parsing against the pyowm object model.
+
+Run from the repository root:
+
+    python benchmarks/owm_parsing.py [--requests N] [--repeat N]
+
+Synthetic OWM /weather and /forecast payloads are turned into the bot's
+weather dicts through pyowm objects and through the raw-JSON records, and
+parse time and allocations per request are reported. Output parity of the
+two paths is checked by tests/test_owm_parser.py.
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+from typing import Any, Callable
+
+import pytz
+from pyowm.weatherapi30.forecast import Forecast
+from pyowm.weatherapi30.forecaster import Forecaster
+from pyowm.weatherapi30.observation import Observation
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from services.owm_parser import (  # noqa: E402
+    HPA_TO_MMHG,
+    CurrentRecord,
+    ForecastRecord,
+    build_current,
+    build_forecast,
+    icon_to_emoji,
+    local_time_fields,
+)
+
+TIMEZONE = pytz.timezone('Europe/Moscow')
+TZ_NAME = 'Europe/Moscow'
+GEO_INFO = {'country': 'RU', 'state': 'Moscow'}
+STATUSES = [(800, 'Clear', 'ясно'), (802, 'Clouds', 'переменная облачность'), (500, 'Rain', 'небольшой дождь')]
+ICONS = ['01d', '02d', '03n', '10d']
+
+
+def _weather_item(rng: random.Random) -> dict[str, Any]:
+    weather_id, main, description = rng.choice(STATUSES)
+    return {
+        'main': {
+            'temp': rng.uniform(250.0, 310.0), 'feels_like': rng.uniform(250.0, 310.0),
+            'temp_min': rng.uniform(250.0, 310.0), 'temp_max': rng.uniform(250.0, 310.0),
+            'pressure': rng.randint(980, 1040), 'sea_level': 1013, 'grnd_level': 995,
+            'humidity': rng.randint(20, 100),
+        },
+        'weather': [{'id': weather_id, 'main': main, 'description': description, 'icon': rng.choice(ICONS)}],
+        'clouds': {'all': rng.randint(0, 100)},
+        'wind': {'speed': rng.uniform(0.0, 15.0), 'deg': rng.randint(0, 359), 'gust': rng.uniform(0.0, 20.0)},
+        'visibility': 10000,
+    }
+
+
+def make_weather_payload(rng: random.Random) -> dict[str, Any]:
+    """Build a synthetic OWM /weather response."""
+    return {
+        'coord': {'lon': 37.6156, 'lat': 55.7522},
+        'base': 'stations',
+        **_weather_item(rng),
+        'dt': 1711623600,
+        'sys': {'type': 2, 'id': 2000314, 'country': 'RU', 'sunrise': 1711596000, 'sunset': 1711641600},
+        'timezone': 10800,
+        'id': 524901,
+        'name': 'Москва',
+        'cod': 200,
+    }
+
+
+def make_forecast_payload(rng: random.Random) -> dict[str, Any]:
+    """Build a synthetic 5 day / 3 hour OWM /forecast response."""
+    start = 1711627200
+    return {
+        'cod': '200',
+        'message': 0,
+        'cnt': 40,
+        'list': [
+            {'dt': start + i * 3 * 3600, **_weather_item(rng), 'pop': 0.2, 'sys': {'pod': 'd'},
+             'dt_txt': ''}
+            for i in range(40)
+        ],
+        'city': {
+            'id': 524901, 'name': 'Москва', 'coord': {'lat': 55.7522, 'lon': 37.6156}, 'country': 'RU',
+            'population': 1000000, 'timezone': 10800, 'sunrise': 1711596000, 'sunset': 1711641600,
+        },
+    }
+
+
+def pyowm_current(payload: dict[str, Any]) -> dict:
+    """Observation object graph read through pyowm's unit-converting accessors, as before."""
+    observation = Observation.from_dict(payload)
+    weather = observation.weather
+    return {
+        'location_name': observation.location.name,
+        'country': GEO_INFO['country'],
+        'state': GEO_INFO['state'],
+        'icon': icon_to_emoji(weather.weather_icon_name),
+        'status': weather.detailed_status,
+        'temp': round(weather.temperature('celsius')['temp']),
+        'pressure': round(weather.barometric_pressure()['press'] * HPA_TO_MMHG),
+        'humidity': weather.humidity,
+        'wind_speed': round(weather.wind()['speed']),
+        'timezone': TZ_NAME,
+        **local_time_fields(TIMEZONE),
+    }
+
+
+def raw_current(payload: dict[str, Any]) -> dict:
+    """Raw JSON read into a CurrentRecord."""
+    return build_current(CurrentRecord.from_json(payload), TIMEZONE, TZ_NAME, GEO_INFO)
+
+
+def pyowm_forecast(payload: dict[str, Any]) -> dict:
+    """Forecast object graph built by pyowm, then aggregated."""
+    forecaster = Forecaster(Forecast.from_dict(payload))
+    return build_forecast(ForecastRecord.from_forecaster(forecaster), TIMEZONE, TZ_NAME, GEO_INFO)
+
+
+def raw_forecast(payload: dict[str, Any]) -> dict:
+    """Raw JSON read into a ForecastRecord, then aggregated."""
+    return build_forecast(ForecastRecord.from_json(payload), TIMEZONE, TZ_NAME, GEO_INFO)
+
+
+def peak_allocation(func: Callable[[dict], dict], payloads: list[dict]) -> float:
+    """Return the mean peak of memory allocated while handling one request, in KiB."""
+    total = 0
+    tracemalloc.start()
+    for payload in payloads:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        func(payload)
+        total += tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return total / len(payloads) / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500, help='payloads parsed per kind')
+    parser.add_argument('--repeat', type=int, default=5, help='timing repetitions')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    kinds = {
+        'current': ([make_weather_payload(rng) for _ in range(args.requests)], pyowm_current, raw_current),
+        'forecast': ([make_forecast_payload(rng) for _ in range(args.requests)], pyowm_forecast, raw_forecast),
+    }
+
+    for kind, (payloads, pyowm_path, raw_path) in kinds.items():
+        print(f'{kind}:')
+        for name, func in (('pyowm', pyowm_path), ('raw json', raw_path)):
+            best = min(timeit.repeat(lambda: [func(p) for p in payloads], number=1, repeat=args.repeat))
+            peak = peak_allocation(func, payloads)
+            print(f'  {name:>8}: {best / len(payloads) * 1e6:8.1f} us/request, {peak:7.1f} KiB peak allocation')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark a subscription scheduler tick: grouped fetches and rate-limited fan-out.
+
+Run from the repository root:
+
+    python benchmarks/scheduler_fanout.py [--subscribers N] [--cities N] [--owm-latency MS] [--bot-latency MS]
+
+Subscribers spread over a number of cities are all due in the current minute.
+One tick runs against the local OWM and Bot API stand-ins of ``load_test.py``.
+The benchmark checks three things:
+
+- every subscriber gets exactly one message;
+- OWM is called at most once per city, not once per subscriber (aliases of one
+  place share a fetch through the weather cache);
+- sends never start more than the global rate in any sliding one-second window
+  (measured when the limiter releases them, before Bot API latency jitter).
+"""
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from load_test import (  # noqa: E402
+    BOT_TOKEN, KNOWN_CITIES, OTHER_CITIES, SECRET_TOKEN, StandIn, _RouteAdapter, bot_responder, owm_responder,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--subscribers', type=int, default=150)
+    parser.add_argument('--cities', type=int, default=12, help='distinct subscribed cities')
+    parser.add_argument('--owm-latency', type=float, default=20, help='OWM response delay in ms')
+    parser.add_argument('--bot-latency', type=float, default=10, help='Bot API response delay in ms')
+    args = parser.parse_args()
+
+    os.environ.setdefault('TELEBOT_KEY', BOT_TOKEN)
+    os.environ.setdefault('OWM_KEY', 'harness')
+    os.environ.setdefault('WEBHOOK_TOKEN', SECRET_TOKEN)
+
+    sends: list[int] = []
+    released: list[float] = []
+    sends_lock = threading.Lock()
+
+    def record_sends(path: str, method: str, params: dict) -> tuple[int, Any]:
+        if path.endswith('/sendMessage'):
+            with sends_lock:
+                sends.append(int(params['chat_id']))
+        return bot_responder(path, method, params)
+
+    owm = StandIn(owm_responder(42), args.owm_latency / 1000, 0.0, 500, 42)
+    bot_api = StandIn(record_sends, args.bot_latency / 1000, 0.0, 500, 42)
+
+    from telebot import apihelper
+
+    import config
+    import main as bot_main
+    from services.subscriptions import Subscription
+
+    logging.getLogger().setLevel(logging.WARNING)
+    apihelper.API_URL = f'{bot_api.url}/bot{{0}}/{{1}}'
+    route = _RouteAdapter(owm.url, pool_connections=10, pool_maxsize=10)
+    bot_main.weather_service.session.mount('https://', route)
+    bot_main.weather_service.session.mount('http://', route)
+
+    handlers = bot_main.subscription_handlers
+    acquire = handlers.limiter.acquire
+
+    def record_release(chat_id: int, deadline: float) -> bool:
+        allowed = acquire(chat_id, deadline)
+        if allowed:
+            with sends_lock:
+                released.append(time.monotonic())
+        return allowed
+
+    handlers.limiter.acquire = record_release
+    cities = (KNOWN_CITIES + OTHER_CITIES)[:args.cities]
+    now = time.time()
+    local_time = time.strftime('%H:%M', time.gmtime(now))
+    for index in range(args.subscribers):
+        handlers.subscriptions.save(
+            Subscription(10_000 + index, cities[index % len(cities)], local_time, 'UTC', f'user{index}'),
+        )
+
+    start = time.perf_counter()
+    results = handlers.run_tick(now)
+    elapsed = time.perf_counter() - start
+    owm_calls = owm.snapshot()
+
+    print(f'{args.subscribers} subscribers in {len(cities)} cities, OWM {args.owm_latency:g} ms, '
+          f'Bot API {args.bot_latency:g} ms, limits {config.SEND_RATE_GLOBAL:g} msg/s global, '
+          f'{config.SEND_INTERVAL_PER_CHAT:g} s per chat')
+    print(f'tick: {elapsed:.2f} s, results {results}')
+    print(f"OWM calls: {dict(sorted(owm_calls.items()))} ({owm_calls['weather'] / len(cities):.2f} weather/city, "
+          f'{owm_calls["weather"] / args.subscribers:.3f} per subscriber)')
+
+    times = sorted(released)
+    peak = max((sum(1 for t in times[i:] if t - first < 1.0) for i, first in enumerate(times)), default=0)
+    per_chat = Counter(sends)
+    print(f'sends: {len(sends)}, {len(sends) / elapsed:.1f} msg/s overall, peak {peak} in any 1 s window')
+
+    problems = []
+    if results.get('sent') != args.subscribers or set(per_chat.values()) != {1}:
+        problems.append(f'expected one message per subscriber, got {results}')
+    if owm_calls['weather'] > len(cities):
+        problems.append(f"expected at most {len(cities)} weather calls, got {owm_calls['weather']}")
+    if peak > config.SEND_RATE_GLOBAL:
+        problems.append(f'global rate exceeded: {peak} sends in 1 s')
+    print(f"parity: {'OK' if not problems else problems}")
+
+    owm.server.shutdown()
+    bot_api.server.shutdown()
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
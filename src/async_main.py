@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""Asyncio bot entry point: AsyncTeleBot long polling with the async weather pipeline."""
+import asyncio
+import logging
+
+import telebot
+from telebot.async_telebot import AsyncTeleBot
+
+import config
+from handlers.async_handlers import AsyncHandlers
+from services.async_weather_service import AsyncWeatherService
+from services.state_store import create_state_store
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+)
+logger = logging.getLogger(__name__)
+
+bot = AsyncTeleBot(config.TELEBOT_KEY)
+weather_service = AsyncWeatherService(config.OWM_KEY)
+handlers = AsyncHandlers(
+    bot,
+    weather_service,
+    create_state_store(config.STATE_BACKEND, config.STATE_SQLITE_PATH, config.REDIS_URL),
+)
+bot.add_custom_filter(handlers.awaiting_forecast_filter())
+
+
+@bot.message_handler(commands=['start'])
+async def start_command(message: telebot.types.Message) -> None:
+    await handlers.handle_start(message)
+
+
+@bot.message_handler(commands=['location'])
+async def location_command(message: telebot.types.Message) -> None:
+    await handlers.handle_location(message)
+
+
+@bot.message_handler(commands=['forecast'], content_types=config.CONTENT_TO_HANDLE)
+async def forecast_command(message: telebot.types.Message) -> None:
+    await handlers.handle_forecast_command(message)
+
+
+@bot.message_handler(commands=['help'])
+async def help_command(message: telebot.types.Message) -> None:
+    await handlers.handle_help(message)
+
+
+@bot.message_handler(commands=['author'])
+async def author_command(message: telebot.types.Message) -> None:
+    await handlers.handle_author(message)
+
+
+@bot.callback_query_handler(func=lambda c: True)
+async def callback_query(callback: telebot.types.CallbackQuery) -> None:
+    await handlers.handle_callback(callback)
+
+
+@bot.message_handler(awaiting_forecast=True, content_types=config.CONTENT_TO_HANDLE)
+async def forecast_input_message(message: telebot.types.Message) -> None:
+    await handlers.handle_forecast_input(message)
+
+
+@bot.message_handler(func=lambda m: True, content_types=config.CONTENT_TO_HANDLE)
+async def weather_message(message: telebot.types.Message) -> None:
+    await handlers.handle_weather_request(message)
+
+
+@bot.message_handler(func=lambda m: True, content_types=config.CONTENT_TO_REJECT)
+async def wrong_content_message(message: telebot.types.Message) -> None:
+    await handlers.handle_wrong_content(message)
+
+
+async def async_run() -> None:
+    """Async long polling; each update is handled as its own task on one event loop."""
+    logger.info('Starting bot in async polling mode...')
+    try:
+        await bot.delete_webhook()
+        await bot.infinity_polling(timeout=100)
+    finally:
+        await weather_service.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(async_run())
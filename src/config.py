@@ -72,3 +72,134 @@ LOCALE = 'ru'
 
 # Forecast interval ('3h' for free)
 FORECAST_INTERVAL = '3h'
+
+# Shared keep-alive HTTP pools for OWM and the Telegram Bot API (connections kept per host)
+# and per-upstream connect/read timeouts in seconds
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '10'))
+OWM_CONNECT_TIMEOUT = float(os.getenv('OWM_CONNECT_TIMEOUT', '3.05'))
+OWM_READ_TIMEOUT = float(os.getenv('OWM_READ_TIMEOUT', '5'))
+TELEGRAM_CONNECT_TIMEOUT = float(os.getenv('TELEGRAM_CONNECT_TIMEOUT', '15'))
+TELEGRAM_READ_TIMEOUT = float(os.getenv('TELEGRAM_READ_TIMEOUT', '30'))
+
+# Weather result cache (TTL in seconds)
+WEATHER_CACHE_TTL_CURRENT = int(os.getenv('WEATHER_CACHE_TTL_CURRENT', '600'))
+WEATHER_CACHE_TTL_FORECAST = int(os.getenv('WEATHER_CACHE_TTL_FORECAST', '3600'))
+WEATHER_CACHE_SIZE = int(os.getenv('WEATHER_CACHE_SIZE', '256'))
+
+# Rendered reply bodies reused within the same minute (max entries per minute)
+REPLY_CACHE_SIZE = int(os.getenv('REPLY_CACHE_SIZE', '1024'))
+
+# Decimal places used to round lat/lon into cache grid cells
+COORD_CACHE_PRECISION = int(os.getenv('COORD_CACHE_PRECISION', '2'))
+
+# Reverse-geocoding cache (country/state per grid cell, TTL in seconds)
+GEO_CACHE_TTL = int(os.getenv('GEO_CACHE_TTL', str(7 * 24 * 3600)))
+GEO_CACHE_SIZE = int(os.getenv('GEO_CACHE_SIZE', '4096'))
+GEO_CACHE_PRECISION = int(os.getenv('GEO_CACHE_PRECISION', '2'))
+# Optional JSON file to persist the geo cache across cold starts, rewritten at most once per
+# GEO_CACHE_FLUSH_INTERVAL seconds
+GEO_CACHE_FILE = os.getenv('GEO_CACHE_FILE')
+GEO_CACHE_FLUSH_INTERVAL = float(os.getenv('GEO_CACHE_FLUSH_INTERVAL', '30'))
+
+# Upstream (OWM) concurrency: worker threads and shared per-request deadline in seconds
+UPSTREAM_WORKERS = int(os.getenv('UPSTREAM_WORKERS', '4'))
+UPSTREAM_DEADLINE = float(os.getenv('UPSTREAM_DEADLINE', '10'))
+
+# Fetch the forecast together with current weather, so the reply's forecast button is served from cache
+PREFETCH_FORECAST = os.getenv('PREFETCH_FORECAST', '1').lower() in ('1', 'true', 'yes')
+
+# Free-text input: longest text still treated as a city name, and "city not found" memo (TTL in seconds)
+CITY_NAME_MAX_LENGTH = int(os.getenv('CITY_NAME_MAX_LENGTH', '85'))
+NOT_FOUND_CACHE_TTL = int(os.getenv('NOT_FOUND_CACHE_TTL', '3600'))
+NOT_FOUND_CACHE_SIZE = int(os.getenv('NOT_FOUND_CACHE_SIZE', '4096'))
+
+# Bundled city index resolving known names to coordinates, country, state and timezone
+# without OWM geocoding (empty disables it), and max "did you mean" suggestions
+GAZETTEER_PATH = os.getenv(
+    'GAZETTEER_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'gazetteer.idx'),
+)
+CITY_SUGGESTIONS = int(os.getenv('CITY_SUGGESTIONS', '3'))
+
+# Parse raw OWM JSON into compact records instead of building pyowm objects
+OWM_RAW_JSON = os.getenv('OWM_RAW_JSON', '').lower() in ('1', 'true', 'yes')
+
+# Timezone resolution: load TimezoneFinder polygons into memory (faster lookups on hot instances)
+TZ_FINDER_IN_MEMORY = os.getenv('TZ_FINDER_IN_MEMORY', '').lower() in ('1', 'true', 'yes')
+# Max distance in degrees from a gazetteer city center to use its timezone without TimezoneFinder
+KNOWN_TZ_RADIUS = float(os.getenv('KNOWN_TZ_RADIUS', '0.15'))
+# Timezone memo: grid cell size in degrees and max number of memoized cells
+TZ_CACHE_CELL_SIZE = float(os.getenv('TZ_CACHE_CELL_SIZE', '0.01'))
+TZ_CACHE_SIZE = int(os.getenv('TZ_CACHE_SIZE', '4096'))
+
+# Telegram API retry policy (delays and budget in seconds)
+RETRY_MAX_ATTEMPTS = int(os.getenv('RETRY_MAX_ATTEMPTS', '5'))
+RETRY_BASE_DELAY = float(os.getenv('RETRY_BASE_DELAY', '0.5'))
+RETRY_MAX_DELAY = float(os.getenv('RETRY_MAX_DELAY', '8'))
+RETRY_BUDGET = float(os.getenv('RETRY_BUDGET', '20'))
+
+# Time budget in seconds for handling one webhook update; retries never sleep past it
+WEBHOOK_DEADLINE = float(os.getenv('WEBHOOK_DEADLINE', '50'))
+
+# Outbound send dispatcher: worker threads (0 disables it and sends inline)
+OUTBOUND_WORKERS = int(os.getenv('OUTBOUND_WORKERS', '4'))
+# Seconds webhook_run waits for queued sends (e.g. stickers) before returning; 0 returns
+# right after the main message. Keep it non-zero when CPU is throttled outside requests.
+OUTBOUND_DRAIN_TIMEOUT = float(os.getenv('OUTBOUND_DRAIN_TIMEOUT', '10'))
+
+# Return a handler's final reply in the webhook response body instead of a separate API call
+WEBHOOK_REPLY = os.getenv('WEBHOOK_REPLY', '').lower() in ('1', 'true', 'yes')
+
+# Conversation state store for the /forecast dialog: 'memory', 'sqlite' or 'redis'.
+# Use 'redis' (or a shared SQLite file) when running more than one instance.
+STATE_BACKEND = os.getenv('STATE_BACKEND', 'memory')
+STATE_SQLITE_PATH = os.getenv('STATE_SQLITE_PATH', '/tmp/skbweatherbot_state.db')
+REDIS_URL = os.getenv('REDIS_URL')
+# Seconds the bot waits for the city or location after /forecast
+FORECAST_STATE_TTL = int(os.getenv('FORECAST_STATE_TTL', '600'))
+
+# Daily weather subscriptions (/subscribe), kept in the state store above, so use a shared
+# backend in production; /subscribe is refused with 'memory'. Records live SUBSCRIPTION_TTL
+# seconds and are renewed on each delivery.
+SUBSCRIPTION_TTL = int(os.getenv('SUBSCRIPTION_TTL', str(90 * 24 * 3600)))
+# Scheduler tick (scheduler_run, POSTed every minute by Cloud Scheduler): bearer token (the
+# endpoint is disabled without it), minutes of missed ticks to catch up on, send worker threads
+# and time budget in seconds
+SCHEDULER_TOKEN = os.getenv('SCHEDULER_TOKEN')
+SCHEDULER_CATCH_UP = int(os.getenv('SCHEDULER_CATCH_UP', '5'))
+SCHEDULER_WORKERS = int(os.getenv('SCHEDULER_WORKERS', '8'))
+SCHEDULER_DEADLINE = float(os.getenv('SCHEDULER_DEADLINE', '240'))
+# Telegram broadcast limits: messages per second overall and seconds between messages to one chat
+SEND_RATE_GLOBAL = float(os.getenv('SEND_RATE_GLOBAL', '30'))
+SEND_INTERVAL_PER_CHAT = float(os.getenv('SEND_INTERVAL_PER_CHAT', '1'))
+
+# Concurrent update processing (0 workers processes updates inline, one at a time).
+# Updates from one chat keep their order; different chats run in parallel.
+UPDATE_WORKERS = int(os.getenv('UPDATE_WORKERS', '0'))
+UPDATE_MAX_IN_FLIGHT = int(os.getenv('UPDATE_MAX_IN_FLIGHT', '32'))
+# Seconds to wait for a free in-flight slot before rejecting an update (webhook returns 503)
+UPDATE_QUEUE_TIMEOUT = float(os.getenv('UPDATE_QUEUE_TIMEOUT', '5'))
+
+# OpenWeatherMap REST API base URL and connection pool size for the async weather service
+OWM_API_URL = os.getenv('OWM_API_URL', 'https://api.openweathermap.org')
+ASYNC_HTTP_POOL_SIZE = int(os.getenv('ASYNC_HTTP_POOL_SIZE', '100'))
+
+# Cold start: defer the weather service (pyowm, numpy, timezonefinder, babel) until the first
+# update that needs it, so /help, /start and callbacks answer without loading it. With
+# STARTUP_IMPORT_REPORT > 0 the slowest modules imported at startup (that many) are logged.
+LAZY_INIT = os.getenv('LAZY_INIT', '').lower() in ('1', 'true', 'yes')
+STARTUP_IMPORT_REPORT = int(os.getenv('STARTUP_IMPORT_REPORT', '0'))
+
+# Metrics: per-stage latency histograms and counters. GET /metrics on the webhook function (or
+# metrics_run) serves them in Prometheus text format, or as JSON with ?format=json, to requests
+# bearing METRICS_TOKEN (the endpoint is disabled without it). With METRICS_LOG_INTERVAL > 0 a
+# JSON snapshot is also logged at most that often (seconds).
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '').lower() in ('1', 'true', 'yes')
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+METRICS_LOG_INTERVAL = float(os.getenv('METRICS_LOG_INTERVAL', '0'))
+
+# Seconds an expired weather entry may still be served, flagged as degraded, when OWM fails or the
+# circuit breaker is open. Entries expired for less than one more TTL are served while refreshed.
+WEATHER_STALE_TTL = int(os.getenv('WEATHER_STALE_TTL', str(6 * 3600)))
+# Circuit breaker: consecutive OWM failures before opening, and seconds before a trial call
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5'))
+BREAKER_RESET_TIMEOUT = float(os.getenv('BREAKER_RESET_TIMEOUT', '30'))
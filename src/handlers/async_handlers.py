@@ -0,0 +1,246 @@
+"""Async handlers for telebot's AsyncTeleBot, answering like the sync handler classes.
+
+Replies and input parsing come from handlers.common; only sending, state
+access and weather lookups are awaited here.
+"""
+import asyncio
+import random
+from typing import Optional, Sequence
+
+import telebot
+from telebot import asyncio_filters
+from telebot.async_telebot import AsyncTeleBot
+
+from config import CITY_NAME_MAX_LENGTH, FORECAST_STATE_TTL, WRONG_CONTENT_STICKERS
+from handlers.common import (
+    CALLBACK_REPLIES,
+    FORECAST_INPUT_INSTRUCTIONS,
+    Reply,
+    author_reply,
+    city_not_found_reply,
+    forecast_input_keyboard,
+    forecast_prompt,
+    forecast_state_key,
+    help_reply,
+    location_prompt,
+    lookup_params,
+    not_found_name,
+    service_unavailable_reply,
+    start_reply,
+    weather_keyboard,
+)
+from services.async_weather_service import AsyncWeatherService
+from services.exceptions import WeatherServiceUnavailable
+from services.state_store import MemoryStateStore, StateStore
+from utils.async_bot_helpers import reply_to_message, send_action, send_message, send_sticker
+from utils.bot_helpers import (
+    MessageOrCallback,
+    create_forecast_keyboard,
+    get_username,
+    parse_forecast_data,
+    remove_keyboard,
+)
+from utils.input_filter import InputKind, classify_text
+
+
+class AsyncHandlers:
+    """Command, message and callback handlers running on the asyncio event loop."""
+
+    def __init__(
+        self,
+        bot: AsyncTeleBot,
+        weather_service: AsyncWeatherService,
+        state_store: Optional[StateStore] = None,
+    ) -> None:
+        self.bot = bot
+        self.weather = weather_service
+        self.state = state_store if state_store is not None else MemoryStateStore()
+
+    @staticmethod
+    def get_username(source: MessageOrCallback) -> str:
+        """Extract display name from message or callback, title-cased."""
+        return get_username(source).title()
+
+    async def send_response(
+        self,
+        chat_id: int,
+        text: str,
+        sticker_id: Optional[str] = None,
+        **kwargs,
+    ) -> None:
+        """Send typing action, then the message and the optional sticker."""
+        await send_action(self.bot, chat_id, "typing")
+        await send_message(self.bot, chat_id, text, **kwargs)
+        if sticker_id:
+            await send_sticker(self.bot, chat_id, sticker_id)
+
+    async def send_reply(self, chat_id: int, reply: Reply) -> None:
+        """Send a reply built in handlers.common."""
+        await self.send_response(chat_id, reply.text, reply.sticker_id, **(reply.options or {}))
+
+    async def send_service_unavailable(self, chat_id: int, username: str, **kwargs) -> None:
+        """Send service unavailable error with a random error sticker."""
+        await self.send_reply(chat_id, service_unavailable_reply(username, **kwargs))
+
+    async def send_city_not_found(
+        self,
+        chat_id: int,
+        city_name: str,
+        keyboard: Optional[telebot.types.InlineKeyboardMarkup],
+        instructions: tuple[str, ...] = (),
+        suggestions: Sequence[str] = (),
+    ) -> None:
+        """Send city-not-found message with optional city suggestions and configurable instructions."""
+        await self.send_reply(chat_id, city_not_found_reply(city_name, keyboard, instructions, suggestions))
+
+    async def await_forecast_input(self, chat_id: int) -> None:
+        """Mark the chat as waiting for a forecast city or location."""
+        await asyncio.to_thread(self.state.set, forecast_state_key(chat_id), "awaiting", FORECAST_STATE_TTL)
+
+    async def is_awaiting_forecast(self, message: telebot.types.Message) -> bool:
+        """Check whether the chat's next message is forecast input."""
+        value = await asyncio.to_thread(self.state.get, forecast_state_key(message.chat.id))
+        return value is not None
+
+    def awaiting_forecast_filter(self) -> asyncio_filters.SimpleCustomFilter:
+        """Return a custom filter (key 'awaiting_forecast') running is_awaiting_forecast on the event loop.
+
+        AsyncTeleBot calls func= filters without awaiting them, so the async
+        state lookup is registered as a custom filter instead.
+        """
+        handlers = self
+
+        class AwaitingForecastFilter(asyncio_filters.SimpleCustomFilter):
+            key = 'awaiting_forecast'
+
+            async def check(self, message: telebot.types.Message) -> bool:
+                return await handlers.is_awaiting_forecast(message)
+
+        return AwaitingForecastFilter()
+
+    async def handle_start(self, message: telebot.types.Message) -> None:
+        """Handle /start command."""
+        await self.send_reply(message.chat.id, start_reply(self.get_username(message)))
+
+    async def handle_location(self, message: telebot.types.Message) -> None:
+        """Handle /location command."""
+        await self.send_reply(message.chat.id, location_prompt(self.get_username(message)))
+
+    async def handle_forecast_command(self, message: telebot.types.Message) -> None:
+        """Handle /forecast command — prompt user then wait for input."""
+        await self.send_reply(message.chat.id, forecast_prompt(self.get_username(message)))
+        await self.await_forecast_input(message.chat.id)
+
+    async def handle_forecast_input(self, message: telebot.types.Message) -> None:
+        """Handle forecast input (city name or shared location)."""
+        await asyncio.to_thread(self.state.delete, forecast_state_key(message.chat.id))
+        username = self.get_username(message)
+        keyboard = forecast_input_keyboard()
+
+        params = lookup_params(message)
+        try:
+            forecast_data = await self.weather.get_forecast(**params) if params else None
+        except WeatherServiceUnavailable:
+            await self.send_service_unavailable(message.chat.id, username, reply_markup=keyboard)
+            await self.await_forecast_input(message.chat.id)
+            return
+
+        if not forecast_data:
+            await self.send_city_not_found(
+                message.chat.id, not_found_name(message), keyboard,
+                instructions=FORECAST_INPUT_INSTRUCTIONS,
+                suggestions=self.weather.suggest_cities(message.text) if message.text else [],
+            )
+            await self.await_forecast_input(message.chat.id)
+            return
+
+        answer = self.weather.format_forecast(username, forecast_data)
+        await reply_to_message(self.bot, message, answer, reply_markup=remove_keyboard(), parse_mode="HTML")
+
+    async def handle_help(self, message: telebot.types.Message) -> None:
+        """Handle /help command."""
+        await self.send_reply(message.chat.id, help_reply(self.get_username(message)))
+
+    async def handle_author(self, message: telebot.types.Message) -> None:
+        """Handle /author command."""
+        await self.send_reply(message.chat.id, author_reply())
+
+    async def handle_weather_request(self, message: telebot.types.Message) -> None:
+        """Handle weather request by city name or shared location."""
+        username = self.get_username(message)
+        keyboard = weather_keyboard()
+
+        if message.text:
+            kind = classify_text(message.text)
+            if kind is InputKind.EMOJI:
+                await self.handle_wrong_content(message)
+                return
+            if kind is InputKind.COMMAND:
+                await self.send_reply(message.chat.id, help_reply(username))
+                return
+            if kind is not InputKind.CITY:
+                await self.send_city_not_found(message.chat.id, message.text[:CITY_NAME_MAX_LENGTH], keyboard)
+                return
+
+        params = lookup_params(message)
+        try:
+            weather_data = await self.weather.get_current_weather(**params) if params else None
+        except WeatherServiceUnavailable:
+            await self.send_service_unavailable(message.chat.id, username, reply_markup=keyboard)
+            return
+
+        if not weather_data:
+            suggestions = self.weather.suggest_cities(message.text) if message.text else []
+            await self.send_city_not_found(message.chat.id, not_found_name(message), keyboard, suggestions=suggestions)
+            return
+
+        answer = self.weather.format_current_weather(username, weather_data)
+        await reply_to_message(
+            self.bot, message, answer, reply_markup=create_forecast_keyboard(weather_data), parse_mode="HTML",
+        )
+
+    async def handle_wrong_content(self, message: telebot.types.Message) -> None:
+        """Reply with a random sticker for unsupported content."""
+        await send_sticker(
+            self.bot,
+            message.chat.id,
+            random.choice(WRONG_CONTENT_STICKERS),
+            reply_to_message_id=message.message_id,
+            reply_markup=remove_keyboard(),
+        )
+
+    async def handle_callback(self, callback: telebot.types.CallbackQuery) -> None:
+        """Route callback query to the appropriate handler."""
+        if not callback.message:
+            return
+
+        username = self.get_username(callback)
+        chat_id = callback.message.chat.id
+
+        action, _, _ = (callback.data or '').partition(':')
+        if action == "forecast":
+            await self._on_forecast(chat_id, username, callback)
+        elif action in CALLBACK_REPLIES:
+            await self.send_reply(chat_id, CALLBACK_REPLIES[action](username))
+
+    async def _on_forecast(self, chat_id: int, username: str, cb: telebot.types.CallbackQuery) -> None:
+        coords = parse_forecast_data(cb.data)
+        if coords and await self._send_forecast(chat_id, username, *coords):
+            return
+        await self.send_reply(chat_id, forecast_prompt(username))
+        await self.await_forecast_input(chat_id)
+
+    async def _send_forecast(self, chat_id: int, username: str, lat: float, lon: float) -> bool:
+        """Send the forecast for the coordinates of an earlier reply; False if there is none to send."""
+        try:
+            forecast_data = await self.weather.get_forecast(lat=lat, lon=lon)
+        except WeatherServiceUnavailable:
+            await self.send_service_unavailable(chat_id, username)
+            return True
+        if not forecast_data:
+            return False
+        await self.send_response(
+            chat_id, self.weather.format_forecast(username, forecast_data),
+            reply_markup=remove_keyboard(), parse_mode="HTML",
+        )
+        return True
@@ -1,30 +1,19 @@
 """Base handler with common functionality."""
 import logging
-import random
-from typing import Optional, Union
+from typing import Optional, Sequence, Union
 
 import telebot
 
-from config import (
-    ERROR_STICKERS,
-    STICKER_AUTHOR,
-    STICKER_CITY_NOT_FOUND,
-    STICKER_HELP,
-)
-from handlers.messages_text import (
-    AUTHOR_INFO,
-    MSG_SERVICE_UNAVAILABLE,
-    get_city_not_found_message,
-    get_help_message,
-)
-from utils.bot_helpers import (
-    create_inline_keyboard,
-    get_username,
-    remove_keyboard,
-    send_action,
-    send_message,
-    send_sticker,
+from handlers.common import (
+    Reply,
+    author_reply,
+    city_not_found_reply,
+    help_reply,
+    service_unavailable_reply,
 )
+from utils.bot_helpers import get_username, send_action, send_message, send_sticker
+from utils.metrics import metrics
+from utils.outbound import OutboundDispatcher
 
 logger = logging.getLogger(__name__)
 
@@ -34,35 +23,50 @@ MessageOrCallback = Union[telebot.types.Message, telebot.types.CallbackQuery]
 class BaseHandler:
     """Base handler with common response methods."""
 
-    def __init__(self, bot: telebot.TeleBot) -> None:
+    def __init__(self, bot: telebot.TeleBot, outbound: Optional[OutboundDispatcher] = None) -> None:
         self.bot = bot
+        self.outbound = outbound
 
     @staticmethod
     def get_username(source: MessageOrCallback) -> str:
         """Extract display name from message or callback, title-cased."""
         return get_username(source).title()
 
+    @metrics.timed('send_response_seconds')
     def send_response(
         self,
         chat_id: int,
         text: str,
         sticker_id: Optional[str] = None,
+        webhook_reply: bool = False,
         **kwargs,
     ) -> None:
-        """Send typing action, message, and optional sticker."""
-        send_action(self.bot, chat_id, "typing")
-        send_message(self.bot, chat_id, text, **kwargs)
+        """Send typing action, message, and optional sticker.
+
+        With an outbound dispatcher the typing action is queued first in the
+        chat's lane without waiting, the message is awaited and the sticker follows it.
+        The message may go out as the webhook reply only when no sticker follows it.
+        """
+        kwargs['webhook_reply'] = webhook_reply and not sticker_id
+        if self.outbound is None:
+            send_action(self.bot, chat_id, "typing")
+            send_message(self.bot, chat_id, text, **kwargs)
+            if sticker_id:
+                send_sticker(self.bot, chat_id, sticker_id)
+            return
+
+        self.outbound.send_action(chat_id, "typing")
+        self.outbound.submit(chat_id, send_message, self.bot, chat_id, text, **kwargs).result()
         if sticker_id:
-            send_sticker(self.bot, chat_id, sticker_id)
+            self.outbound.submit(chat_id, send_sticker, self.bot, chat_id, sticker_id)
+
+    def send_reply(self, chat_id: int, reply: Reply, webhook_reply: bool = False) -> None:
+        """Send a reply built in handlers.common."""
+        self.send_response(chat_id, reply.text, reply.sticker_id, webhook_reply=webhook_reply, **(reply.options or {}))
 
     def send_service_unavailable(self, chat_id: int, username: str, **kwargs) -> None:
         """Send service unavailable error with a random error sticker."""
-        self.send_response(
-            chat_id,
-            MSG_SERVICE_UNAVAILABLE.format(username=username),
-            random.choice(ERROR_STICKERS),
-            **kwargs,
-        )
+        self.send_reply(chat_id, service_unavailable_reply(username, **kwargs))
 
     def send_city_not_found(
         self,
@@ -70,37 +74,15 @@ class BaseHandler:
         city_name: str,
         keyboard: Optional[telebot.types.InlineKeyboardMarkup],
         instructions: tuple[str, ...] = (),
+        suggestions: Sequence[str] = (),
     ) -> None:
-        """Send city-not-found message with configurable instructions."""
-        self.send_response(
-            chat_id,
-            get_city_not_found_message(city_name, instructions),
-            STICKER_CITY_NOT_FOUND,
-            reply_markup=keyboard,
-            parse_mode="HTML",
-        )
+        """Send city-not-found message with optional city suggestions and configurable instructions."""
+        self.send_reply(chat_id, city_not_found_reply(city_name, keyboard, instructions, suggestions))
 
     def send_help(self, chat_id: int, username: str) -> None:
         """Send help message with inline navigation."""
-        keyboard = create_inline_keyboard(
-            ("location", "location"),
-            ("forecast", "forecast"),
-            ("author", "author"),
-        )
-        self.send_response(
-            chat_id,
-            get_help_message(username),
-            STICKER_HELP,
-            reply_markup=keyboard,
-            parse_mode="HTML",
-        )
+        self.send_reply(chat_id, help_reply(username))
 
     def send_author(self, chat_id: int) -> None:
         """Send author information."""
-        self.send_response(
-            chat_id,
-            AUTHOR_INFO,
-            STICKER_AUTHOR,
-            reply_markup=remove_keyboard(),
-            parse_mode="HTML",
-        )
+        self.send_reply(chat_id, author_reply())
@@ -1,23 +1,25 @@
 """Callback query handlers for inline buttons."""
+from typing import Optional
+
 import telebot
 
-from config import STICKER_AUTHOR, STICKER_HELP
 from handlers.base import BaseHandler
-from handlers.messages_text import (
-    AUTHOR_INFO,
-    INSTRUCTION_LOCATION_BUTTON,
-    MSG_ENTER_CITY_OR_LOCATION,
-    MSG_PRESS_LOCATION_BUTTON,
-    get_forecast_help_message,
-)
-from utils.bot_helpers import create_inline_keyboard, create_location_keyboard
+from handlers.common import CALLBACK_REPLIES, forecast_prompt
+from services.exceptions import WeatherServiceUnavailable
+from utils.bot_helpers import parse_forecast_data, remove_keyboard
+from utils.outbound import OutboundDispatcher
 
 
 class CallbackHandlers(BaseHandler):
     """Handlers for inline button callbacks."""
 
-    def __init__(self, bot: telebot.TeleBot, command_handlers) -> None:
-        super().__init__(bot)
+    def __init__(
+        self,
+        bot: telebot.TeleBot,
+        command_handlers,
+        outbound: Optional[OutboundDispatcher] = None,
+    ) -> None:
+        super().__init__(bot, outbound)
         self.command_handlers = command_handlers
 
     def handle_callback(self, callback: telebot.types.CallbackQuery) -> None:
@@ -28,55 +30,35 @@ class CallbackHandlers(BaseHandler):
         username = self.get_username(callback)
         chat_id = callback.message.chat.id
 
-        handler = self._DISPATCH.get(callback.data)
-        if handler:
-            handler(self, chat_id, username, callback)
-
-    def _on_help(self, chat_id: int, username: str, _cb: telebot.types.CallbackQuery) -> None:
-        self.send_help(chat_id, username)
-
-    def _on_author(self, chat_id: int, _username: str, _cb: telebot.types.CallbackQuery) -> None:
-        self.send_author(chat_id)
-
-    def _on_location(self, chat_id: int, username: str, _cb: telebot.types.CallbackQuery) -> None:
-        self.send_response(
-            chat_id,
-            MSG_PRESS_LOCATION_BUTTON.format(username=username),
-            reply_markup=create_location_keyboard(),
-        )
+        action, _, _ = (callback.data or '').partition(':')
+        if action == "forecast":
+            self._on_forecast(chat_id, username, callback)
+        elif action in CALLBACK_REPLIES:
+            self.send_reply(chat_id, CALLBACK_REPLIES[action](username))
 
     def _on_forecast(self, chat_id: int, username: str, cb: telebot.types.CallbackQuery) -> None:
-        self.send_response(
-            chat_id,
-            MSG_ENTER_CITY_OR_LOCATION.format(username=username),
-            reply_markup=create_location_keyboard(),
-        )
-        self.bot.register_next_step_handler(cb.message, self.command_handlers.handle_forecast_input)
+        coords = parse_forecast_data(cb.data)
+        if coords and self._send_forecast(chat_id, username, *coords):
+            return
+        self.send_reply(chat_id, forecast_prompt(username))
+        self.command_handlers.await_forecast_input(chat_id)
 
-    def _on_forecast_help(self, chat_id: int, username: str, _cb: telebot.types.CallbackQuery) -> None:
-        keyboard = create_inline_keyboard(("author", "forecast_author"), row_width=1)
-        self.send_response(
-            chat_id,
-            get_forecast_help_message(username),
-            STICKER_HELP,
-            reply_markup=keyboard,
-            parse_mode="HTML",
-        )
+    def _send_forecast(self, chat_id: int, username: str, lat: float, lon: float) -> bool:
+        """Send the forecast for the coordinates of an earlier reply; False if there is none to send.
 
-    def _on_forecast_author(self, chat_id: int, _username: str, _cb: telebot.types.CallbackQuery) -> None:
+        With PREFETCH_FORECAST the forecast was cached together with the
+        current weather, so this needs no upstream call.
+        """
+        weather = self.command_handlers.weather
+        try:
+            forecast_data = weather.get_forecast(lat=lat, lon=lon)
+        except WeatherServiceUnavailable:
+            self.send_service_unavailable(chat_id, username)
+            return True
+        if not forecast_data:
+            return False
         self.send_response(
-            chat_id,
-            f"{AUTHOR_INFO}\n{INSTRUCTION_LOCATION_BUTTON}",
-            STICKER_AUTHOR,
-            reply_markup=create_location_keyboard(),
-            parse_mode="HTML",
+            chat_id, weather.format_forecast(username, forecast_data),
+            reply_markup=remove_keyboard(), parse_mode="HTML", webhook_reply=True,
         )
-
-    _DISPATCH = {
-        "help": _on_help,
-        "author": _on_author,
-        "location": _on_location,
-        "forecast": _on_forecast,
-        "forecast_help": _on_forecast_help,
-        "forecast_author": _on_forecast_author,
-    }
+        return True
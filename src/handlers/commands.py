@@ -1,84 +1,91 @@
 """Command handlers for the bot."""
+from typing import TYPE_CHECKING, Optional
+
 import telebot
 
-from config import STICKER_START
+from config import FORECAST_STATE_TTL
 from handlers.base import BaseHandler
-from handlers.messages_text import (
-    INSTRUCTION_HELP_BUTTON,
-    INSTRUCTION_LOCATION_BUTTON,
-    MSG_ENTER_CITY_OR_LOCATION,
-    MSG_PRESS_LOCATION_BUTTON,
-    get_start_message,
-)
-from services.weather_service import WeatherService
-from utils.bot_helpers import (
-    create_inline_keyboard,
-    create_location_keyboard,
-    remove_keyboard,
-    reply_to_message,
+from handlers.common import (
+    FORECAST_INPUT_INSTRUCTIONS,
+    forecast_input_keyboard,
+    forecast_prompt,
+    forecast_state_key,
+    location_prompt,
+    lookup_params,
+    not_found_name,
+    start_reply,
 )
+from services.exceptions import WeatherServiceUnavailable
+from services.state_store import MemoryStateStore, StateStore
+from utils.bot_helpers import remove_keyboard, reply_to_message
+from utils.outbound import OutboundDispatcher
+
+if TYPE_CHECKING:
+    from services.weather_service import WeatherService
 
 
 class CommandHandlers(BaseHandler):
     """Handlers for bot commands."""
 
-    def __init__(self, bot: telebot.TeleBot, weather_service: WeatherService) -> None:
-        super().__init__(bot)
+    def __init__(
+        self,
+        bot: telebot.TeleBot,
+        weather_service: 'WeatherService',
+        outbound: Optional[OutboundDispatcher] = None,
+        state_store: Optional[StateStore] = None,
+    ) -> None:
+        super().__init__(bot, outbound)
         self.weather = weather_service
+        self.state = state_store if state_store is not None else MemoryStateStore()
+
+    def await_forecast_input(self, chat_id: int) -> None:
+        """Mark the chat as waiting for a forecast city or location."""
+        self.state.set(forecast_state_key(chat_id), "awaiting", FORECAST_STATE_TTL)
+
+    def is_awaiting_forecast(self, message: telebot.types.Message) -> bool:
+        """Check whether the chat's next message is forecast input."""
+        return self.state.get(forecast_state_key(message.chat.id)) is not None
 
     def handle_start(self, message: telebot.types.Message) -> None:
         """Handle /start command."""
-        username = self.get_username(message)
-        keyboard = create_inline_keyboard(
-            ("location", "location"),
-            ("forecast", "forecast"),
-            ("help", "help"),
-            ("author", "author"),
-        )
-        self.send_response(
-            message.chat.id, get_start_message(username), STICKER_START, reply_markup=keyboard,
-        )
+        self.send_reply(message.chat.id, start_reply(self.get_username(message)))
 
     def handle_location(self, message: telebot.types.Message) -> None:
         """Handle /location command."""
-        username = self.get_username(message)
-        self.send_response(
-            message.chat.id,
-            MSG_PRESS_LOCATION_BUTTON.format(username=username),
-            reply_markup=create_location_keyboard(),
-        )
+        self.send_reply(message.chat.id, location_prompt(self.get_username(message)), webhook_reply=True)
 
     def handle_forecast_command(self, message: telebot.types.Message) -> None:
         """Handle /forecast command — prompt user then wait for input."""
-        username = self.get_username(message)
-        self.send_response(
-            message.chat.id,
-            MSG_ENTER_CITY_OR_LOCATION.format(username=username),
-            reply_markup=create_location_keyboard(),
-        )
-        self.bot.register_next_step_handler(message, self.handle_forecast_input)
+        self.send_reply(message.chat.id, forecast_prompt(self.get_username(message)), webhook_reply=True)
+        self.await_forecast_input(message.chat.id)
 
     def handle_forecast_input(self, message: telebot.types.Message) -> None:
         """Handle forecast input (city name or shared location)."""
+        self.state.delete(forecast_state_key(message.chat.id))
         username = self.get_username(message)
-        keyboard = create_inline_keyboard(("help", "forecast_help"))
+        keyboard = forecast_input_keyboard()
 
-        if message.location:
-            forecast_data = self.weather.get_forecast(lat=message.location.latitude, lon=message.location.longitude)
-        else:
-            forecast_data = self.weather.get_forecast(city=message.text)
+        params = lookup_params(message)
+        try:
+            forecast_data = self.weather.get_forecast(**params) if params else None
+        except WeatherServiceUnavailable:
+            self.send_service_unavailable(message.chat.id, username, reply_markup=keyboard)
+            self.await_forecast_input(message.chat.id)
+            return
 
         if not forecast_data:
-            city_name = message.text.capitalize() if message.text else "..."
             self.send_city_not_found(
-                message.chat.id, city_name, keyboard,
-                instructions=(INSTRUCTION_LOCATION_BUTTON, INSTRUCTION_HELP_BUTTON),
+                message.chat.id, not_found_name(message), keyboard,
+                instructions=FORECAST_INPUT_INSTRUCTIONS,
+                suggestions=self.weather.suggest_cities(message.text) if message.text else [],
             )
-            self.bot.register_next_step_handler(message, self.handle_forecast_input)
+            self.await_forecast_input(message.chat.id)
             return
 
         answer = self.weather.format_forecast(username, forecast_data)
-        reply_to_message(self.bot, message, answer, reply_markup=remove_keyboard(), parse_mode="HTML")
+        reply_to_message(
+            self.bot, message, answer, reply_markup=remove_keyboard(), parse_mode="HTML", webhook_reply=True,
+        )
 
     def handle_help(self, message: telebot.types.Message) -> None:
         """Handle /help command."""
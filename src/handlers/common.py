@@ -0,0 +1,153 @@
+"""Replies and input parsing shared by the sync handler classes and AsyncHandlers.
+
+The handlers only differ in how they send and fetch; what they answer with
+is built here, so both bots stay in step.
+"""
+import random
+from typing import Callable, NamedTuple, Optional, Sequence
+
+import telebot
+
+from config import (
+    ERROR_STICKERS,
+    STICKER_AUTHOR,
+    STICKER_CITY_NOT_FOUND,
+    STICKER_HELP,
+    STICKER_START,
+)
+from handlers.messages_text import (
+    AUTHOR_INFO,
+    INSTRUCTION_HELP_BUTTON,
+    INSTRUCTION_LOCATION_BUTTON,
+    MSG_ENTER_CITY_OR_LOCATION,
+    MSG_PRESS_LOCATION_BUTTON,
+    MSG_SERVICE_UNAVAILABLE,
+    get_city_not_found_message,
+    get_forecast_help_message,
+    get_help_message,
+    get_start_message,
+)
+from utils.bot_helpers import create_inline_keyboard, create_location_keyboard, remove_keyboard
+from utils.input_filter import InputKind, classify_text
+
+# Instructions under "not found" while the chat is waiting for forecast input
+FORECAST_INPUT_INSTRUCTIONS = (INSTRUCTION_LOCATION_BUTTON, INSTRUCTION_HELP_BUTTON)
+
+
+class Reply(NamedTuple):
+    """A response for send_response: message text, optional sticker and send_message options."""
+
+    text: str
+    sticker_id: Optional[str] = None
+    options: Optional[dict] = None
+
+
+def forecast_state_key(chat_id: int) -> str:
+    """State store key marking a chat that waits for forecast input."""
+    return f"forecast:{chat_id}"
+
+
+def weather_keyboard() -> telebot.types.InlineKeyboardMarkup:
+    """Inline navigation offered with weather lookup errors."""
+    return create_inline_keyboard(("location", "location"), ("forecast", "forecast"), ("help", "help"))
+
+
+def forecast_input_keyboard() -> telebot.types.InlineKeyboardMarkup:
+    """Inline navigation offered with forecast lookup errors."""
+    return create_inline_keyboard(("help", "forecast_help"))
+
+
+def lookup_params(message: telebot.types.Message) -> Optional[dict]:
+    """Return weather service arguments for a shared location or a city name, None for other input."""
+    if message.location:
+        return {'lat': message.location.latitude, 'lon': message.location.longitude}
+    if message.text and classify_text(message.text) is InputKind.CITY:
+        return {'city': message.text}
+    return None
+
+
+def start_reply(username: str) -> Reply:
+    """Greeting with the main inline navigation."""
+    keyboard = create_inline_keyboard(
+        ("location", "location"),
+        ("forecast", "forecast"),
+        ("help", "help"),
+        ("author", "author"),
+    )
+    return Reply(get_start_message(username), STICKER_START, {'reply_markup': keyboard})
+
+
+def help_reply(username: str) -> Reply:
+    """Help message with inline navigation."""
+    keyboard = create_inline_keyboard(("location", "location"), ("forecast", "forecast"), ("author", "author"))
+    return Reply(get_help_message(username), STICKER_HELP, {'reply_markup': keyboard, 'parse_mode': "HTML"})
+
+
+def author_reply(_username: str = '') -> Reply:
+    """Author information."""
+    return Reply(AUTHOR_INFO, STICKER_AUTHOR, {'reply_markup': remove_keyboard(), 'parse_mode': "HTML"})
+
+
+def location_prompt(username: str) -> Reply:
+    """Ask for the location, with the share-location keyboard."""
+    return Reply(
+        MSG_PRESS_LOCATION_BUTTON.format(username=username), options={'reply_markup': create_location_keyboard()},
+    )
+
+
+def forecast_prompt(username: str) -> Reply:
+    """Ask for the forecast city or location, with the share-location keyboard."""
+    return Reply(
+        MSG_ENTER_CITY_OR_LOCATION.format(username=username), options={'reply_markup': create_location_keyboard()},
+    )
+
+
+def forecast_help_reply(username: str) -> Reply:
+    """Help shown while the chat waits for forecast input."""
+    keyboard = create_inline_keyboard(("author", "forecast_author"), row_width=1)
+    return Reply(
+        get_forecast_help_message(username), STICKER_HELP, {'reply_markup': keyboard, 'parse_mode': "HTML"},
+    )
+
+
+def forecast_author_reply(_username: str = '') -> Reply:
+    """Author information shown while the chat waits for forecast input."""
+    return Reply(
+        f"{AUTHOR_INFO}\n{INSTRUCTION_LOCATION_BUTTON}",
+        STICKER_AUTHOR,
+        {'reply_markup': create_location_keyboard(), 'parse_mode': "HTML"},
+    )
+
+
+def service_unavailable_reply(username: str, **options) -> Reply:
+    """Service unavailable error with a random error sticker."""
+    return Reply(MSG_SERVICE_UNAVAILABLE.format(username=username), random.choice(ERROR_STICKERS), options)
+
+
+def city_not_found_reply(
+    city_name: str,
+    keyboard: Optional[telebot.types.InlineKeyboardMarkup],
+    instructions: tuple[str, ...] = (),
+    suggestions: Sequence[str] = (),
+) -> Reply:
+    """City-not-found message with optional city suggestions and configurable instructions."""
+    return Reply(
+        get_city_not_found_message(city_name, instructions, suggestions),
+        STICKER_CITY_NOT_FOUND,
+        {'reply_markup': keyboard, 'parse_mode': "HTML"},
+    )
+
+
+def not_found_name(message: telebot.types.Message) -> str:
+    """Name to show in a "not found" reply to a city or location message."""
+    return message.text.capitalize() if message.text else "..."
+
+
+# Inline buttons answered with a fixed reply; "forecast" needs the weather service and is handled apart
+CALLBACK_REPLIES: dict[str, Callable[[str], Reply]] = {
+    "help": help_reply,
+    "author": author_reply,
+    "location": location_prompt,
+    "forecast_help": forecast_help_reply,
+    "forecast_author": forecast_author_reply,
+}
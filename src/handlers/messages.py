@@ -1,57 +1,74 @@
 """Message handlers for the bot."""
 import random
+from typing import TYPE_CHECKING, Optional
 
 import telebot
 
-from config import WRONG_CONTENT_STICKERS
+from config import CITY_NAME_MAX_LENGTH, PREFETCH_FORECAST, WRONG_CONTENT_STICKERS
 from handlers.base import BaseHandler
-from services.weather_service import WeatherService
-from utils.bot_helpers import (
-    create_inline_keyboard,
-    is_emoji,
-    remove_keyboard,
-    reply_to_message,
-    send_sticker,
-)
+from handlers.common import lookup_params, not_found_name, weather_keyboard
+from services.exceptions import WeatherServiceUnavailable
+from utils.bot_helpers import create_forecast_keyboard, remove_keyboard, reply_to_message, send_sticker
+from utils.input_filter import InputKind, classify_text
+from utils.outbound import OutboundDispatcher
+
+if TYPE_CHECKING:
+    from services.weather_service import WeatherService
 
 
 class MessageHandlers(BaseHandler):
     """Handlers for free-text and location messages."""
 
-    def __init__(self, bot: telebot.TeleBot, weather_service: WeatherService) -> None:
-        super().__init__(bot)
+    def __init__(
+        self,
+        bot: telebot.TeleBot,
+        weather_service: 'WeatherService',
+        outbound: Optional[OutboundDispatcher] = None,
+    ) -> None:
+        super().__init__(bot, outbound)
         self.weather = weather_service
 
     def handle_weather_request(self, message: telebot.types.Message) -> None:
         """Handle weather request by city name or shared location."""
         username = self.get_username(message)
+        keyboard = weather_keyboard()
 
-        keyboard = create_inline_keyboard(
-            ("location", "location"),
-            ("forecast", "forecast"),
-            ("help", "help"),
-        )
-
-        if message.text and is_emoji(message.text):
-            self.handle_wrong_content(message)
-            return
+        if message.text:
+            kind = classify_text(message.text)
+            if kind is InputKind.EMOJI:
+                self.handle_wrong_content(message)
+                return
+            if kind is InputKind.COMMAND:
+                self.send_help(message.chat.id, username)
+                return
+            if kind is not InputKind.CITY:
+                self.send_city_not_found(message.chat.id, message.text[:CITY_NAME_MAX_LENGTH], keyboard)
+                return
 
-        if message.text == "...":
-            self.send_city_not_found(message.chat.id, message.text, keyboard)
+        params = lookup_params(message)
+        try:
+            weather_data = self._fetch_current(**params) if params else None
+        except WeatherServiceUnavailable:
+            self.send_service_unavailable(message.chat.id, username, reply_markup=keyboard)
             return
 
-        if message.location:
-            weather_data = self.weather.get_current_weather(lat=message.location.latitude, lon=message.location.longitude)
-        else:
-            weather_data = self.weather.get_current_weather(city=message.text)
-
         if not weather_data:
-            city_name = message.text.capitalize() if message.text else "..."
-            self.send_city_not_found(message.chat.id, city_name, keyboard)
+            suggestions = self.weather.suggest_cities(message.text) if message.text else []
+            self.send_city_not_found(message.chat.id, not_found_name(message), keyboard, suggestions=suggestions)
             return
 
         answer = self.weather.format_current_weather(username, weather_data)
-        reply_to_message(self.bot, message, answer, reply_markup=remove_keyboard(), parse_mode="HTML")
+        reply_to_message(
+            self.bot, message, answer, reply_markup=create_forecast_keyboard(weather_data), parse_mode="HTML",
+            webhook_reply=True,
+        )
+
+    def _fetch_current(self, **location) -> Optional[dict]:
+        """Fetch current weather, prefetching the forecast bundle when enabled."""
+        if not PREFETCH_FORECAST:
+            return self.weather.get_current_weather(**location)
+        bundle = self.weather.get_bundle(**location)
+        return bundle['current'] if bundle else None
 
     def handle_wrong_content(self, message: telebot.types.Message) -> None:
         """Reply with a random sticker for unsupported content."""
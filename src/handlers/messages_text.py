@@ -1,4 +1,5 @@
 """Message text constants for bot responses."""
+import html
 from typing import Sequence
 
 # Author information
@@ -14,6 +15,8 @@ INSTRUCTION_LOCATION = "\U0001F537 Узнать погоду по геолока
 INSTRUCTION_FORECAST = "\U0001F537 Прогноз на 5 дней - /forecast.\n"
 INSTRUCTION_HELP = "\U0001F537 Справка - /help.\n"
 INSTRUCTION_AUTHOR = "\U0001F537 Об авторе - /author.\n"
+INSTRUCTION_SUBSCRIBE = "\U0001F537 Погода каждый день - /subscribe город ЧЧ:ММ.\n"
+INSTRUCTION_UNSUBSCRIBE = "\U0001F537 Отписаться - /unsubscribe.\n"
 
 INSTRUCTION_LOCATION_BUTTON = "\U0001F537 Узнать погоду по геолокации - \U0001F310 location.\n"
 INSTRUCTION_HELP_BUTTON = "\U0001F537 Справка - help.\n"
@@ -23,11 +26,21 @@ INSTRUCTION_AUTHOR_BUTTON = "\U0001F537 Об авторе - author.\n"
 MSG_ENTER_CITY_LATIN = "{username}, введите город, чтобы узнать погоду.\n"
 MSG_EXAMPLE_CITY = "\U0001F537 Пример: <b>Kharkiv</b>.\n"
 MSG_CITY_NOT_FOUND = "<b>{city}</b> не найден.\n"
+MSG_DID_YOU_MEAN = "\U0001F537 Возможно, вы имели в виду: <b>{cities}</b>.\n"
 MSG_PRESS_LOCATION_BUTTON = "{username}, нажмите \U0001F310 location, чтобы отправить геолокацию.\n"
 MSG_ENTER_CITY_OR_LOCATION = (
     "{username}, для получения прогноза на 5 дней, введите город или\n"
     "нажмите \U0001F310 location, чтобы отправить геолокацию.\n"
 )
+MSG_SUBSCRIBE_USAGE = (
+    "{username}, укажите город и время по местному времени города.\n"
+    "\U0001F537 Пример: <b>/subscribe Kharkiv 07:30</b>.\n"
+)
+MSG_SUBSCRIBED = "{username}, погода в <b>{city}</b> будет приходить каждый день в <b>{time}</b> ({timezone}).\n"
+MSG_SUBSCRIPTION = "{username}, погода в <b>{city}</b> приходит каждый день в <b>{time}</b> ({timezone}).\n"
+MSG_UNSUBSCRIBED = "{username}, ежедневная погода отключена.\n"
+MSG_NOT_SUBSCRIBED = "{username}, у вас нет подписки на ежедневную погоду.\n"
+MSG_SUBSCRIPTIONS_UNAVAILABLE = "{username}, ежедневная погода сейчас недоступна.\n"
 MSG_SERVICE_UNAVAILABLE = (
     "{username}, извините, сервис погоды сейчас недоступен.\n"
     "Попробуйте снова немного позже.\n"
@@ -52,15 +65,20 @@ def get_help_message(username: str) -> str:
         f"{MSG_EXAMPLE_CITY}"
         f"{INSTRUCTION_LOCATION}"
         f"{INSTRUCTION_FORECAST}"
+        f"{INSTRUCTION_SUBSCRIBE}"
         f"{INSTRUCTION_AUTHOR}"
     )
 
 
-def get_city_not_found_message(city: str, instructions: Sequence[str] = ()) -> str:
-    """Get city not found message with configurable instructions."""
+def get_city_not_found_message(city: str, instructions: Sequence[str] = (), suggestions: Sequence[str] = ()) -> str:
+    """Get city not found message with optional city suggestions and configurable instructions.
+
+    The city is user input echoed in an HTML message, so it is escaped.
+    """
     if not instructions:
         instructions = (INSTRUCTION_LOCATION, INSTRUCTION_FORECAST, INSTRUCTION_HELP)
-    return MSG_CITY_NOT_FOUND.format(city=city) + "".join(instructions)
+    hint = MSG_DID_YOU_MEAN.format(cities=", ".join(suggestions)) if suggestions else ""
+    return MSG_CITY_NOT_FOUND.format(city=html.escape(city)) + hint + "".join(instructions)
 
 
 def get_forecast_help_message(username: str) -> str:
@@ -0,0 +1,204 @@
+"""Daily weather subscription commands and scheduled delivery."""
+import contextvars
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Optional
+
+import telebot
+from telebot.apihelper import ApiTelegramException
+
+from config import SCHEDULER_CATCH_UP, SCHEDULER_DEADLINE, SCHEDULER_WORKERS
+from handlers.base import BaseHandler
+from handlers.messages_text import (
+    INSTRUCTION_SUBSCRIBE,
+    INSTRUCTION_UNSUBSCRIBE,
+    MSG_NOT_SUBSCRIBED,
+    MSG_SUBSCRIBE_USAGE,
+    MSG_SUBSCRIBED,
+    MSG_SUBSCRIPTION,
+    MSG_SUBSCRIPTIONS_UNAVAILABLE,
+    MSG_UNSUBSCRIBED,
+)
+from services.exceptions import WeatherServiceUnavailable
+from services.gazetteer import normalize_name
+from services.subscriptions import Subscription, SubscriptionStore, parse_time
+from utils.bot_helpers import create_inline_keyboard, send_message
+from utils.input_filter import InputKind, classify_text
+from utils.metrics import metrics
+from utils.outbound import OutboundDispatcher
+from utils.rate_limiter import RateLimiter
+from utils.retry import request_deadline
+
+if TYPE_CHECKING:
+    from services.weather_service import WeatherService
+
+logger = logging.getLogger(__name__)
+
+
+class SubscriptionHandlers(BaseHandler):
+    """/subscribe and /unsubscribe, and the scheduler tick delivering due subscriptions."""
+
+    def __init__(
+        self,
+        bot: telebot.TeleBot,
+        weather_service: 'WeatherService',
+        subscriptions: SubscriptionStore,
+        limiter: RateLimiter,
+        outbound: Optional[OutboundDispatcher] = None,
+    ) -> None:
+        super().__init__(bot, outbound)
+        self.weather = weather_service
+        self.subscriptions = subscriptions
+        self.limiter = limiter
+
+    def handle_subscribe(self, message: telebot.types.Message) -> None:
+        """Handle /subscribe <city> <HH:MM>; without arguments show the current subscription.
+
+        Refused with the memory state backend, whose subscriptions would vanish on restart and never
+        reach the instance running the scheduler.
+        """
+        username = self.get_username(message)
+        chat_id = message.chat.id
+        if not self.subscriptions.persistent:
+            logger.warning('Refusing /subscribe: the memory state backend would lose subscriptions')
+            text = MSG_SUBSCRIPTIONS_UNAVAILABLE.format(username=username)
+            self.send_response(chat_id, text, webhook_reply=True)
+            return
+        _, _, arguments = (message.text or '').partition(' ')
+        city, _, time_text = arguments.strip().rpartition(' ')
+        local_time = parse_time(time_text) if city else None
+        if not local_time:
+            text = MSG_SUBSCRIBE_USAGE.format(username=username)
+            current = self.subscriptions.get(chat_id)
+            if current:
+                text = MSG_SUBSCRIPTION.format(
+                    username=username, city=current.city, time=current.time, timezone=current.timezone,
+                ) + INSTRUCTION_UNSUBSCRIBE + text
+            self.send_response(chat_id, text, parse_mode="HTML", webhook_reply=True)
+            return
+
+        keyboard = create_inline_keyboard(("help", "help"))
+        city = city.strip()
+        try:
+            weather_data = None
+            if classify_text(city) is InputKind.CITY:
+                weather_data = self.weather.get_current_weather(city=city)
+        except WeatherServiceUnavailable:
+            self.send_service_unavailable(chat_id, username, reply_markup=keyboard)
+            return
+        if not weather_data:
+            self.send_city_not_found(
+                chat_id, city.capitalize(), keyboard,
+                instructions=(INSTRUCTION_SUBSCRIBE,), suggestions=self.weather.suggest_cities(city),
+            )
+            return
+
+        self.subscriptions.save(Subscription(chat_id, city, local_time, weather_data['timezone'], username))
+        metrics.inc('subscriptions_changed_total', action='subscribe')
+        text = MSG_SUBSCRIBED.format(
+            username=username, city=weather_data['location_name'], time=local_time, timezone=weather_data['timezone'],
+        )
+        self.send_response(chat_id, text + INSTRUCTION_UNSUBSCRIBE, parse_mode="HTML", webhook_reply=True)
+
+    def handle_unsubscribe(self, message: telebot.types.Message) -> None:
+        """Handle /unsubscribe."""
+        username = self.get_username(message)
+        if self.subscriptions.delete(message.chat.id):
+            metrics.inc('subscriptions_changed_total', action='unsubscribe')
+            text = MSG_UNSUBSCRIBED.format(username=username)
+        else:
+            text = MSG_NOT_SUBSCRIBED.format(username=username) + INSTRUCTION_SUBSCRIBE
+        self.send_response(message.chat.id, text, parse_mode="HTML", webhook_reply=True)
+
+    def _deliver(self, subscription: Subscription, text: str, deadline: float) -> str:
+        """Send one scheduled message within the rate limits; return the delivery result."""
+        if not self.limiter.acquire(subscription.chat_id, deadline):
+            return 'expired'
+        try:
+            send_message(self.bot, subscription.chat_id, text, parse_mode="HTML")
+        except ApiTelegramException as e:
+            if e.error_code == 403:
+                logger.info(f'Chat {subscription.chat_id} blocked the bot, removing its subscription')
+                self.subscriptions.delete(subscription.chat_id)
+                return 'blocked'
+            logger.error(f'Error delivering subscription to chat {subscription.chat_id}: {e}')
+            return 'failed'
+        except Exception as e:
+            logger.error(f'Error delivering subscription to chat {subscription.chat_id}: {e}')
+            return 'failed'
+        self.subscriptions.renew(subscription)
+        return 'sent'
+
+    def _fetch(self, city: str) -> Optional[dict]:
+        """Fetch current weather for a subscribed city; None if not found or OWM is unavailable."""
+        try:
+            return self.weather.get_current_weather(city=city)
+        except WeatherServiceUnavailable:
+            logger.error(f'Weather service unavailable for subscribed city {city}')
+            return None
+
+    def run_tick(self, now: Optional[float] = None) -> dict[str, Any]:
+        """Deliver the subscriptions due in the last SCHEDULER_CATCH_UP minutes and return delivery counts.
+
+        Each delivery is claimed for its local date first, so subscriptions
+        already delivered by an earlier or concurrent tick are skipped. Due
+        subscriptions are grouped by normalized city name, each city is
+        fetched once and its reply body rendered once (the reply cache only
+        splices in each username), and the sends fan out on a worker pool
+        under the global and per-chat rate limits. Sends that cannot start
+        within SCHEDULER_DEADLINE, fail or have no weather are released, so
+        the next tick retries them while they are within the catch-up window.
+        """
+        now = time.time() if now is None else now
+        with metrics.timer('scheduler_tick_seconds'):
+            due: dict[int, tuple[Subscription, int]] = {}
+            skipped = 0
+            for minute in self.subscriptions.recent_minutes(now, SCHEDULER_CATCH_UP):
+                for subscription in self.subscriptions.due(minute):
+                    if subscription.chat_id in due:
+                        continue
+                    if self.subscriptions.claim_delivery(subscription, minute):
+                        due[subscription.chat_id] = (subscription, minute)
+                    else:
+                        skipped += 1
+            groups: dict[str, list[tuple[Subscription, int]]] = {}
+            for subscription, minute in due.values():
+                groups.setdefault(normalize_name(subscription.city), []).append((subscription, minute))
+
+            results: dict[str, int] = {'due': len(due), 'locations': len(groups)}
+            if skipped:
+                logger.info(f'Scheduler tick: {skipped} subscriptions already delivered today')
+            if not groups:
+                return results
+            deadline = time.monotonic() + SCHEDULER_DEADLINE
+            with request_deadline(SCHEDULER_DEADLINE), ThreadPoolExecutor(
+                max_workers=SCHEDULER_WORKERS, thread_name_prefix='scheduler',
+            ) as pool:
+                fetches = {
+                    city: pool.submit(contextvars.copy_context().run, self._fetch, members[0][0].city)
+                    for city, members in groups.items()
+                }
+                sends: list[tuple[Subscription, int, Future]] = []
+                for city, members in groups.items():
+                    data = fetches[city].result()
+                    if not data:
+                        results['not_delivered'] = results.get('not_delivered', 0) + len(members)
+                        for subscription, minute in members:
+                            self.subscriptions.release_delivery(subscription, minute)
+                        continue
+                    for subscription, minute in members:
+                        text = self.weather.format_current_weather(subscription.username, data)
+                        context = contextvars.copy_context()
+                        send = pool.submit(context.run, self._deliver, subscription, text, deadline)
+                        sends.append((subscription, minute, send))
+                for subscription, minute, send in sends:
+                    result = send.result()
+                    if result in ('expired', 'failed'):
+                        self.subscriptions.release_delivery(subscription, minute)
+                    results[result] = results.get(result, 0) + 1
+        for result, count in results.items():
+            if result not in ('due', 'locations'):
+                metrics.inc('subscription_deliveries_total', count, result=result)
+        logger.info(f'Scheduler tick: {results}')
+        return results
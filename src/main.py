@@ -1,17 +1,16 @@
 #!/usr/bin/env python
 """Main bot entry point."""
+import hmac
+import json
 import logging
+import threading
+import time
+from contextlib import nullcontext
 
-from typing import Any
-
-import functions_framework
-import telebot
+from typing import Any, Union
 
 import config
-from handlers.callbacks import CallbackHandlers
-from handlers.commands import CommandHandlers
-from handlers.messages import MessageHandlers
-from services.weather_service import WeatherService
+from utils.startup_timer import ImportProfiler, StartupTimer
 
 logging.basicConfig(
     level=logging.INFO,
@@ -19,14 +18,98 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Third-party modules timed individually in the startup report; in lazy mode the ones only
+# the weather service needs are loaded on its first use instead
+_TIMED_IMPORTS = ('functions_framework', 'telebot', 'pytz') if config.LAZY_INIT else (
+    'functions_framework', 'telebot', 'pyowm', 'babel.dates', 'pytz'
+)
+
+startup_timer = StartupTimer()
+import_profiler = ImportProfiler() if config.STARTUP_IMPORT_REPORT > 0 else nullcontext()
+with import_profiler:
+    for _module in _TIMED_IMPORTS:
+        with startup_timer.phase(f'import {_module}'):
+            __import__(_module)
+
+    with startup_timer.phase('import app modules'):
+        import functions_framework
+        import telebot
+
+        from handlers.callbacks import CallbackHandlers
+        from handlers.commands import CommandHandlers
+        from handlers.messages import MessageHandlers
+        from handlers.subscriptions import SubscriptionHandlers
+        from services.state_store import create_state_store
+        from services.subscriptions import SubscriptionStore
+        from utils.http_pool import connection_stats, create_session, install_telebot_session
+        from utils.lazy import LazyObject
+        from utils.metrics import metrics
+        from utils.outbound import OutboundDispatcher
+        from utils.rate_limiter import RateLimiter
+        from utils.retry import request_deadline
+        from utils.update_dispatcher import DispatcherOverloaded, UpdateDispatcher
+        from utils.webhook_reply import collect_webhook_reply
+        if not config.LAZY_INIT:
+            from services.weather_service import WeatherService
+
 # Initialize bot and services
-bot = telebot.TeleBot(config.TELEBOT_KEY, threaded=False)
-weather_service = WeatherService(config.OWM_KEY)
+with startup_timer.phase('init bot'):
+    bot = telebot.TeleBot(config.TELEBOT_KEY, threaded=False)
+    telegram_session = create_session(config.HTTP_POOL_SIZE)
+    install_telebot_session(telegram_session, config.TELEGRAM_CONNECT_TIMEOUT, config.TELEGRAM_READ_TIMEOUT)
+    outbound = OutboundDispatcher(bot, config.OUTBOUND_WORKERS) if config.OUTBOUND_WORKERS else None
+    update_dispatcher = UpdateDispatcher(
+        bot.process_new_updates,
+        config.UPDATE_WORKERS,
+        config.UPDATE_MAX_IN_FLIGHT,
+        config.UPDATE_QUEUE_TIMEOUT,
+    ) if config.UPDATE_WORKERS else None
+
+
+def _create_weather_service() -> 'WeatherService':
+    """Deferred factory LazyObject calls on first use of the weather service when LAZY_INIT is on."""
+    from services.weather_service import WeatherService
+    return WeatherService(config.OWM_KEY)
+
+
+with startup_timer.phase('init WeatherService'):
+    if config.LAZY_INIT:
+        weather_service = LazyObject('WeatherService', _create_weather_service)
+    else:
+        weather_service = WeatherService(config.OWM_KEY)
 
 # Initialize handlers
-cmd_handlers = CommandHandlers(bot, weather_service)
-msg_handlers = MessageHandlers(bot, weather_service)
-callback_handlers = CallbackHandlers(bot, cmd_handlers)
+with startup_timer.phase('init handlers'):
+    state_store = create_state_store(config.STATE_BACKEND, config.STATE_SQLITE_PATH, config.REDIS_URL)
+    cmd_handlers = CommandHandlers(bot, weather_service, outbound, state_store)
+    msg_handlers = MessageHandlers(bot, weather_service, outbound)
+    callback_handlers = CallbackHandlers(bot, cmd_handlers, outbound)
+    subscription_handlers = SubscriptionHandlers(
+        bot,
+        weather_service,
+        SubscriptionStore(state_store, config.SUBSCRIPTION_TTL),
+        RateLimiter(config.SEND_RATE_GLOBAL, config.SEND_INTERVAL_PER_CHAT),
+        outbound,
+    )
+
+
+def _weather_stats(method: str) -> Any:
+    """Return a collector reading weather service stats without forcing a lazy service to load."""
+    def collect() -> dict[str, Any]:
+        if isinstance(weather_service, LazyObject) and not weather_service.loaded:
+            return {}
+        return getattr(weather_service, method)()
+    return collect
+
+
+metrics.register_collector('weather_cache', _weather_stats('cache_stats'), label='cache')
+metrics.register_collector('singleflight', _weather_stats('singleflight_stats'))
+metrics.register_collector('owm_connections', _weather_stats('connection_stats'), label='host')
+metrics.register_collector('telegram_connections', lambda: connection_stats(telegram_session), label='host')
+
+startup_timer.report()
+if isinstance(import_profiler, ImportProfiler):
+    import_profiler.report(config.STARTUP_IMPORT_REPORT)
 
 
 # Register handlers
@@ -55,11 +138,26 @@ def author_command(message: telebot.types.Message) -> None:
     cmd_handlers.handle_author(message)
 
 
+@bot.message_handler(commands=['subscribe'])
+def subscribe_command(message: telebot.types.Message) -> None:
+    subscription_handlers.handle_subscribe(message)
+
+
+@bot.message_handler(commands=['unsubscribe'])
+def unsubscribe_command(message: telebot.types.Message) -> None:
+    subscription_handlers.handle_unsubscribe(message)
+
+
 @bot.callback_query_handler(func=lambda c: True)
 def callback_query(callback: telebot.types.CallbackQuery) -> None:
     callback_handlers.handle_callback(callback)
 
 
+@bot.message_handler(func=cmd_handlers.is_awaiting_forecast, content_types=config.CONTENT_TO_HANDLE)
+def forecast_input_message(message: telebot.types.Message) -> None:
+    cmd_handlers.handle_forecast_input(message)
+
+
 @bot.message_handler(func=lambda m: True, content_types=config.CONTENT_TO_HANDLE)
 def weather_message(message: telebot.types.Message) -> None:
     msg_handlers.handle_weather_request(message)
@@ -71,8 +169,17 @@ def wrong_content_message(message: telebot.types.Message) -> None:
 
 
 @functions_framework.http
-def webhook_run(request: Any) -> tuple[str, int]:
-    """Handle incoming Telegram webhook requests."""
+def webhook_run(request: Any) -> Union[tuple[str, int], tuple[str, int, dict[str, str]]]:
+    """Handle incoming Telegram webhook requests.
+
+    In webhook reply mode the final reply of a handler may be returned as the
+    response body instead of being sent through the bot API. GET /metrics is
+    answered by metrics_run and POST /scheduler by scheduler_run.
+    """
+    if request.method == 'GET' and request.path.rstrip('/').endswith('/metrics'):
+        return metrics_run(request)
+    if request.method == 'POST' and request.path.rstrip('/').endswith('/scheduler'):
+        return scheduler_run(request)
     if request.method != 'POST':
         logger.warning('Non-POST request received')
         return 'Method Not Allowed', 405
@@ -82,6 +189,7 @@ def webhook_run(request: Any) -> tuple[str, int]:
         logger.warning('Invalid secret token')
         return 'Forbidden', 403
 
+    reply = None
     try:
         body = request.get_json(silent=True)
         if not body:
@@ -89,24 +197,122 @@ def webhook_run(request: Any) -> tuple[str, int]:
             return 'Bad Request', 400
 
         update = telebot.types.Update.de_json(body)
-        logger.info(
-            f'Update received: id={update.update_id}, '
-            f'type={"message" if update.message else "callback" if update.callback_query else "other"}'
-        )
-        bot.process_new_updates([update])
+        update_type = 'message' if update.message else 'callback' if update.callback_query else 'other'
+        logger.info(f'Update received: id={update.update_id}, type={update_type}')
+        reply_context = collect_webhook_reply() if config.WEBHOOK_REPLY else nullcontext()
+        update_timer = metrics.timer('update_seconds', type=update_type)
+        with request_deadline(config.WEBHOOK_DEADLINE), reply_context as reply, update_timer:
+            if update_dispatcher:
+                # On a timeout the handler keeps running; leaving this block closes the reply,
+                # so a reply it produces later is sent through the bot API instead of being lost
+                update_dispatcher.submit(update).result(timeout=config.WEBHOOK_DEADLINE)
+            else:
+                bot.process_new_updates([update])
+    except DispatcherOverloaded:
+        metrics.inc('updates_rejected_total')
+        logger.warning('Update queue is full, asking Telegram to retry later')
+        return 'Service Unavailable', 503
     except Exception:
+        metrics.inc('update_errors_total')
         logger.exception('Error processing update')
 
+    if outbound and config.OUTBOUND_DRAIN_TIMEOUT:
+        outbound.drain(config.OUTBOUND_DRAIN_TIMEOUT)
+    metrics.log_if_due(config.METRICS_LOG_INTERVAL)
+
+    if reply and reply.payload:
+        return reply.to_json(), 200, {'Content-Type': 'application/json'}
     return 'OK', 200
 
 
+def _has_bearer_token(request: Any, token: str) -> bool:
+    """Check the request's Authorization header against a bearer token in constant time."""
+    return hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+
+
+@functions_framework.http
+def metrics_run(request: Any) -> tuple[str, int, dict[str, str]]:
+    """Serve metrics in Prometheus text format, or as JSON with ?format=json.
+
+    Disabled (404) unless metrics are enabled and METRICS_TOKEN is set, since the webhook URL is public.
+    """
+    if not metrics.enabled or not config.METRICS_TOKEN:
+        return 'Metrics are disabled', 404, {}
+    if request.method != 'GET':
+        return 'Method Not Allowed', 405, {}
+    if not _has_bearer_token(request, config.METRICS_TOKEN):
+        return 'Forbidden', 403, {}
+    if request.args.get('format') == 'json':
+        return metrics.to_json(), 200, {'Content-Type': 'application/json'}
+    return metrics.to_prometheus(), 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
+
+@functions_framework.http
+def scheduler_run(request: Any) -> tuple[str, int, dict[str, str]]:
+    """Deliver due weather subscriptions; meant to be POSTed every minute by Cloud Scheduler.
+
+    Disabled (404) until SCHEDULER_TOKEN is set, since the webhook URL is public.
+    """
+    if not config.SCHEDULER_TOKEN:
+        return 'Scheduler is disabled', 404, {}
+    if request.method != 'POST':
+        return 'Method Not Allowed', 405, {}
+    if not _has_bearer_token(request, config.SCHEDULER_TOKEN):
+        return 'Forbidden', 403, {}
+    try:
+        results = subscription_handlers.run_tick()
+    except Exception:
+        logger.exception('Error running scheduler tick')
+        return 'Internal Server Error', 500, {}
+    return json.dumps(results), 200, {'Content-Type': 'application/json'}
+
+
+def _run_scheduler_locally() -> None:
+    """Run a subscription scheduler tick at the start of every minute from a daemon thread."""
+    def loop() -> None:
+        while True:
+            time.sleep(60 - time.time() % 60)
+            try:
+                subscription_handlers.run_tick()
+            except Exception:
+                logger.exception('Error running scheduler tick')
+
+    threading.Thread(target=loop, name='scheduler', daemon=True).start()
+
+
+def _poll_concurrently() -> None:
+    """Long polling loop feeding updates to the update dispatcher; blocks when it is full."""
+    offset = None
+    while True:
+        try:
+            updates = bot.get_updates(offset=offset, timeout=100, long_polling_timeout=100)
+        except Exception:
+            logger.exception('Error fetching updates, retrying')
+            time.sleep(3)
+            continue
+        for update in updates:
+            offset = update.update_id + 1
+            while True:
+                try:
+                    update_dispatcher.submit(update)
+                    break
+                except DispatcherOverloaded:
+                    logger.warning('Update queue is full, waiting')
+
+
 def local_run() -> None:
     """Local long polling."""
     logger.info('Starting bot in local polling mode...')
+    metrics.log_periodically(config.METRICS_LOG_INTERVAL)
+    _run_scheduler_locally()
     try:
         bot.remove_webhook()
-        logger.info('Webhook removed. Starting infinity polling.')
-        bot.infinity_polling(timeout=100, long_polling_timeout=100)
+        if update_dispatcher:
+            logger.info('Webhook removed. Starting concurrent polling.')
+            _poll_concurrently()
+        else:
+            logger.info('Webhook removed. Starting infinity polling.')
+            bot.infinity_polling(timeout=100, long_polling_timeout=100)
     except Exception:
         logger.exception('Bot stopped due to an unexpected error in local polling')
 
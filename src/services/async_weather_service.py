@@ -0,0 +1,267 @@
+"""Asyncio weather service calling OpenWeatherMap endpoints over a pooled aiohttp client."""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+import aiohttp
+import pytz
+
+from config import (
+    ASYNC_HTTP_POOL_SIZE,
+    GEO_CACHE_PRECISION,
+    LOCALE,
+    OWM_API_URL,
+    UPSTREAM_DEADLINE,
+)
+from services.base import BaseWeatherService
+from services.cache import TTLCache, location_key
+from services.exceptions import WeatherServiceUnavailable
+from services.gazetteer import City, Gazetteer
+from services.owm_parser import parse_current_json, parse_forecast_json
+from services.timezone_resolver import TimezoneResolver
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncWeatherService(BaseWeatherService):
+    """Async counterpart of WeatherService with the same result dict and error contract.
+
+    Talks to the OWM REST endpoints directly instead of going through pyowm,
+    so one event loop can serve many lookups without a thread per request.
+    Caching, stale data and the circuit breaker follow BaseWeatherService.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        current_cache: Optional[TTLCache] = None,
+        forecast_cache: Optional[TTLCache] = None,
+        geo_cache: Optional[TTLCache] = None,
+        timezones: Optional[TimezoneResolver] = None,
+        gazetteer: Optional[Gazetteer] = None,
+    ) -> None:
+        super().__init__(current_cache, forecast_cache, geo_cache, timezones, gazetteer)
+        self.api_key = api_key
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._refresh_tasks: set[asyncio.Task] = set()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Keep-alive client session, created on first use inside the running event loop."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=ASYNC_HTTP_POOL_SIZE, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=UPSTREAM_DEADLINE),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Close the pooled HTTP session."""
+        if self._session is not None:
+            await self._session.close()
+
+    async def _get_json(self, path: str, params: dict[str, Any]) -> Optional[Any]:
+        """GET an OWM endpoint; return parsed JSON, or None if the location is not found."""
+        params = {**params, 'appid': self.api_key, 'lang': LOCALE}
+        async with self.session.get(f'{OWM_API_URL}{path}', params=params) as response:
+            if response.status == 404:
+                return None
+            response.raise_for_status()
+            return await response.json()
+
+    @staticmethod
+    def _location_params(city: Optional[str], lat: Optional[float], lon: Optional[float]) -> Optional[dict]:
+        if lat is not None and lon is not None:
+            return {'lat': lat, 'lon': lon}
+        if city:
+            return {'q': city}
+        return None
+
+    async def _get_geo_info(self, lat: float, lon: float) -> dict[str, str]:
+        """Get country code and state via reverse geocoding API, cached per grid cell."""
+        key = location_key(lat=lat, lon=lon, precision=GEO_CACHE_PRECISION)
+        cached = self.geo_cache.get(key)
+        if cached:
+            return cached
+
+        try:
+            json_data = await self._get_json('/geo/1.0/reverse', {'lat': lat, 'lon': lon, 'limit': 1})
+            geo_info = {'country': '', 'state': ''}
+            if json_data:
+                geo_info = {
+                    'country': json_data[0].get('country', ''),
+                    'state': json_data[0].get('state', ''),
+                }
+            # a persistent geo cache may write its file here
+            await asyncio.to_thread(self.geo_cache.set, key, geo_info)
+            return geo_info
+        except Exception as e:
+            logger.error(f'Error fetching geo info: {e!r}')
+        return {'country': '', 'state': ''}
+
+    async def _fetch(
+        self,
+        path: str,
+        city: Optional[str],
+        lat: Optional[float],
+        lon: Optional[float],
+        place: Optional[City] = None,
+    ) -> Optional[tuple[dict, pytz.BaseTzInfo, str, dict[str, str]]]:
+        """Fetch an endpoint plus timezone and geo info, overlapping geo when coordinates are known.
+
+        For a gazetteer place, timezone and geo info come from the index instead.
+        """
+        if place is not None:
+            payload = await self._get_json(path, {'lat': place.lat, 'lon': place.lon})
+            return (payload, pytz.timezone(place.timezone), place.timezone, place.geo_info()) if payload else None
+        params = self._location_params(city, lat, lon)
+        if params is None:
+            return None
+        if lat is not None and lon is not None:
+            payload, geo_info = await asyncio.gather(
+                self._get_json(path, params), self._get_geo_info(lat, lon),
+            )
+        else:
+            payload = await self._get_json(path, params)
+            geo_info = None
+        if not payload:
+            return None
+
+        lat, lon = self._payload_coords(payload)
+        if geo_info is None:
+            geo_info = await self._get_geo_info(lat, lon)
+        timezone, tz_name = await asyncio.to_thread(self.timezones.resolve, lat, lon)
+        return payload, timezone, tz_name, geo_info
+
+    @staticmethod
+    def _payload_coords(payload: dict) -> tuple[float, float]:
+        """Return the coordinates OWM reports for a current weather or forecast payload."""
+        coord = payload['coord'] if 'coord' in payload else payload['city']['coord']
+        return coord['lat'], coord['lon']
+
+    async def _call_upstream(self, load: Callable[..., Awaitable[Optional[dict]]], *args) -> Optional[dict]:
+        """Run an upstream load through the circuit breaker within UPSTREAM_DEADLINE.
+
+        Returns the load result (None means the location was not found) and
+        raises WeatherServiceUnavailable if the circuit is open or the call
+        fails. With no local pool to wait for, running out of the deadline
+        means OWM is slow, so it counts as a breaker failure.
+        """
+        self._check_breaker()
+        endpoint = load.__name__.removeprefix('_load_')
+        try:
+            result = await asyncio.wait_for(load(*args), UPSTREAM_DEADLINE)
+        except Exception as e:
+            raise self._upstream_failed(endpoint, e) from e
+        self.breaker.record_success()
+        return result
+
+    async def _load_found(self, load: Callable[..., Awaitable[Optional[dict]]], key: tuple, *args) -> Optional[dict]:
+        """Run an upstream load unless OWM recently reported the location as not found, and remember misses."""
+        if self.not_found_cache.get(key):
+            return None
+        data = await self._call_upstream(load, key, *args)
+        if data is None:
+            self.not_found_cache.set(key, True)
+        return data
+
+    def _refresh_in_background(self, load: Callable[..., Awaitable[Optional[dict]]], key: tuple, *args) -> None:
+        """Reload a stale entry in a task of its own unless a refresh for it is already running."""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def refresh() -> None:
+            try:
+                await self._call_upstream(load, key, *args)
+            except WeatherServiceUnavailable:
+                pass
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.create_task(refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _load_current(
+        self,
+        key: tuple,
+        city: Optional[str],
+        lat: Optional[float],
+        lon: Optional[float],
+        place: Optional[City] = None,
+    ) -> Optional[dict]:
+        """Fetch current weather upstream and cache it; None if the location is not found."""
+        result = await self._fetch('/data/2.5/weather', city, lat, lon, place)
+        if not result:
+            return None
+        data = self._localized_name(parse_current_json(*result), place)
+        return self._store(self.current_cache, key, data, *self._payload_coords(result[0]))
+
+    async def _load_forecast(
+        self,
+        key: tuple,
+        city: Optional[str],
+        lat: Optional[float],
+        lon: Optional[float],
+        place: Optional[City] = None,
+    ) -> Optional[dict]:
+        """Fetch the forecast upstream and cache it; None if the location is not found."""
+        result = await self._fetch('/data/2.5/forecast', city, lat, lon, place)
+        if not result:
+            return None
+        data = self._localized_name(parse_forecast_json(*result), place)
+        return self._store(self.forecast_cache, key, data, *self._payload_coords(result[0]))
+
+    async def get_current_weather(
+        self,
+        city: Optional[str] = None,
+        lat: Optional[float] = None,
+        lon: Optional[float] = None,
+    ) -> Optional[dict]:
+        """Fetch current weather data for a city or coordinates.
+
+        Same caching, stale-while-revalidate and error contract as WeatherService.get_current_weather:
+        returns None if the location is not found and raises
+        WeatherServiceUnavailable if OWM fails with nothing cached.
+        """
+        key, city, lat, lon, place = self._locate(city, lat, lon)
+        if not key:
+            return None
+        data, refresh = self._serve_cached(self.current_cache, key, local_time=True)
+        if refresh:
+            self._refresh_in_background(self._load_current, key, city, lat, lon, place)
+        if data:
+            return data
+
+        try:
+            return await self._load_found(self._load_current, key, city, lat, lon, place)
+        except WeatherServiceUnavailable:
+            data = self._serve_degraded(self.current_cache, key, local_time=True)
+            if not data:
+                raise
+            return data
+
+    async def get_forecast(
+        self,
+        city: Optional[str] = None,
+        lat: Optional[float] = None,
+        lon: Optional[float] = None,
+    ) -> Optional[dict]:
+        """Fetch 5-day forecast data for a city or coordinates, with the get_current_weather contract."""
+        key, city, lat, lon, place = self._locate(city, lat, lon)
+        if not key:
+            return None
+        data, refresh = self._serve_cached(self.forecast_cache, key)
+        if refresh:
+            self._refresh_in_background(self._load_forecast, key, city, lat, lon, place)
+        if data:
+            return data
+
+        try:
+            return await self._load_found(self._load_forecast, key, city, lat, lon, place)
+        except WeatherServiceUnavailable:
+            data = self._serve_degraded(self.forecast_cache, key)
+            if not data:
+                raise
+            return data
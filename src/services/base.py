@@ -0,0 +1,222 @@
+"""Caching, stale-serving and circuit breaker policy shared by the sync and async weather services."""
+import logging
+import time
+from typing import Optional
+
+import pytz
+
+from config import (
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_RESET_TIMEOUT,
+    CITY_SUGGESTIONS,
+    COORD_CACHE_PRECISION,
+    GAZETTEER_PATH,
+    GEO_CACHE_FILE,
+    GEO_CACHE_FLUSH_INTERVAL,
+    GEO_CACHE_SIZE,
+    GEO_CACHE_TTL,
+    LOCALE,
+    NOT_FOUND_CACHE_SIZE,
+    NOT_FOUND_CACHE_TTL,
+    REPLY_CACHE_SIZE,
+    UPSTREAM_DEADLINE,
+    WEATHER_CACHE_SIZE,
+    WEATHER_CACHE_TTL_CURRENT,
+    WEATHER_CACHE_TTL_FORECAST,
+    WEATHER_STALE_TTL,
+)
+from services.cache import PersistentTTLCache, TTLCache, location_key
+from services.circuit_breaker import CircuitBreaker
+from services.exceptions import WeatherServiceUnavailable
+from services.gazetteer import City, Gazetteer
+from services.owm_parser import local_time_fields
+from services.reply_cache import ReplyCache
+from services.timezone_resolver import TimezoneResolver
+from services.weather_formatter import WeatherFormatter
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class BaseWeatherService:
+    """Cache, stale data, breaker and reply rendering rules common to WeatherService and AsyncWeatherService.
+
+    Subclasses only differ in how they talk to OWM; both serve fresh entries
+    as is, expired ones within one more TTL as stale while refreshing them,
+    and older ones as degraded when OWM fails or the circuit is open.
+    """
+
+    def __init__(
+        self,
+        current_cache: Optional[TTLCache] = None,
+        forecast_cache: Optional[TTLCache] = None,
+        geo_cache: Optional[TTLCache] = None,
+        timezones: Optional[TimezoneResolver] = None,
+        gazetteer: Optional[Gazetteer] = None,
+    ) -> None:
+        if current_cache is None:
+            current_cache = TTLCache(WEATHER_CACHE_SIZE, WEATHER_CACHE_TTL_CURRENT, WEATHER_STALE_TTL)
+        if forecast_cache is None:
+            forecast_cache = TTLCache(WEATHER_CACHE_SIZE, WEATHER_CACHE_TTL_FORECAST, WEATHER_STALE_TTL)
+        if geo_cache is None:
+            geo_cache = PersistentTTLCache(GEO_CACHE_SIZE, GEO_CACHE_TTL, GEO_CACHE_FILE, GEO_CACHE_FLUSH_INTERVAL)
+        self.current_cache = current_cache
+        self.forecast_cache = forecast_cache
+        self.geo_cache = geo_cache
+        self.not_found_cache = TTLCache(NOT_FOUND_CACHE_SIZE, NOT_FOUND_CACHE_TTL)
+        self.gazetteer = gazetteer if gazetteer is not None else Gazetteer(GAZETTEER_PATH)
+        self.timezones = timezones if timezones is not None else TimezoneResolver(self.gazetteer)
+        self.formatter = WeatherFormatter()
+        self.replies = ReplyCache(REPLY_CACHE_SIZE)
+        self.breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT)
+        self._refreshing: set[tuple] = set()
+
+    def _locate(
+        self,
+        city: Optional[str],
+        lat: Optional[float],
+        lon: Optional[float],
+    ) -> tuple[Optional[tuple], Optional[str], Optional[float], Optional[float], Optional[City]]:
+        """Resolve a city name through the gazetteer and build the cache key.
+
+        Known names and their aliases are replaced by the place coordinates, so
+        they share one cache entry. Returns (key, city, lat, lon, place).
+        """
+        if city and (lat is None or lon is None):
+            with metrics.timer('stage_seconds', stage='gazetteer'):
+                place = self.gazetteer.lookup(city)
+            if place is not None:
+                key = location_key(lat=place.lat, lon=place.lon, precision=COORD_CACHE_PRECISION)
+                return key, None, place.lat, place.lon, place
+        return location_key(city, lat, lon, COORD_CACHE_PRECISION), city, lat, lon, None
+
+    def suggest_cities(self, text: str) -> list[str]:
+        """Return names of known cities similar to text, for a "did you mean" hint."""
+        return [place.name(LOCALE) for place in self.gazetteer.suggest(text, CITY_SUGGESTIONS)]
+
+    @staticmethod
+    def _localized_name(data: dict, place: Optional[City]) -> dict:
+        """Show a gazetteer place under its name in the bot locale."""
+        if place is not None:
+            data['location_name'] = place.name(LOCALE)
+        return data
+
+    @staticmethod
+    def _mark_stale(data: dict, degraded: bool = False) -> dict:
+        """Return a copy of cached data flagged for the formatter as stale, and as degraded if OWM failed."""
+        return {**data, 'stale': True, 'degraded': degraded}
+
+    @staticmethod
+    def _fresh_stale(cache: TTLCache, key: tuple) -> Optional[dict]:
+        """Return an expired entry still within one more TTL, which is served while it is refreshed."""
+        return cache.get_stale(key, max_age=2 * cache.ttl)
+
+    @staticmethod
+    def _with_local_time(data: dict) -> dict:
+        """Return a copy of current weather data with the local date and time recomputed for now."""
+        return {**data, **local_time_fields(pytz.timezone(data['timezone']))}
+
+    def _serve_cached(self, cache: TTLCache, key: tuple, local_time: bool = False) -> tuple[Optional[dict], bool]:
+        """Look key up for serving; returns (data, refresh).
+
+        A fresh entry is returned as is; one expired for less than one more
+        TTL is returned flagged stale with refresh set, and the caller reloads
+        it in the background. (None, False) means it must be loaded now.
+        """
+        data, refresh = cache.get(key), False
+        if not data:
+            data, refresh = self._fresh_stale(cache, key), True
+            if not data:
+                return None, False
+        if local_time:
+            data = self._with_local_time(data)
+        return (self._mark_stale(data), True) if refresh else (data, False)
+
+    def _serve_degraded(self, cache: TTLCache, key: tuple, local_time: bool = False) -> Optional[dict]:
+        """Return any cached entry for key flagged degraded, for use after an upstream failure."""
+        data = cache.get_stale(key)
+        if not data:
+            return None
+        if local_time:
+            data = self._with_local_time(data)
+        return self._mark_stale(data, degraded=True)
+
+    @staticmethod
+    def _store(cache: TTLCache, key: tuple, data: dict, lat: float, lon: float) -> dict:
+        """Stamp and cache freshly built data under key and under the coordinates it belongs to.
+
+        The coordinates go into the data as 'lat'/'lon', so a reply can point
+        at them (the forecast button does); a lookup by city name is also
+        cached under its coordinates, so following such a pointer hits the cache.
+        """
+        coords = key
+        if key[0] != 'coords':
+            coords = location_key(lat=lat, lon=lon, precision=COORD_CACHE_PRECISION)
+        data.update(fetched_at=time.time(), lat=coords[1], lon=coords[2])
+        cache.set(key, data)
+        if coords != key:
+            cache.set(coords, data)
+        return data
+
+    def _check_breaker(self) -> None:
+        """Raise WeatherServiceUnavailable if the circuit breaker refuses an upstream call now."""
+        if not self.breaker.allow():
+            metrics.inc('owm_rejected_total')
+            raise WeatherServiceUnavailable('Circuit breaker is open')
+
+    def _upstream_failed(self, endpoint: str, error: Exception) -> WeatherServiceUnavailable:
+        """Count an upstream error against the breaker and return the exception to raise for it."""
+        metrics.inc('owm_errors_total', endpoint=endpoint)
+        self.breaker.record_failure()
+        logger.error(f'Upstream weather call failed: {error!r}')
+        return WeatherServiceUnavailable(repr(error))
+
+    def _upstream_timed_out(self, endpoint: str) -> WeatherServiceUnavailable:
+        """Give up on a call that ran out of the local deadline without counting it as an upstream error."""
+        metrics.inc('owm_timeouts_total', endpoint=endpoint)
+        self.breaker.cancel_trial()
+        logger.error(f'Upstream weather call timed out after {UPSTREAM_DEADLINE:g} s')
+        return WeatherServiceUnavailable('Upstream deadline exceeded')
+
+    def cache_stats(self) -> dict[str, dict[str, int]]:
+        """Return hit/miss counters and sizes of the service caches."""
+        caches = {
+            'current': self.current_cache,
+            'forecast': self.forecast_cache,
+            'geo': self.geo_cache,
+            'timezone': self.timezones.cache,
+            'reply': self.replies,
+            'not_found': self.not_found_cache,
+        }
+        return {
+            name: {'hits': cache.hits, 'misses': cache.misses, 'size': len(cache)}
+            for name, cache in caches.items()
+        }
+
+    @staticmethod
+    def _reply_key(kind: str, data: dict) -> tuple:
+        """Identify a rendered reply by the cache entry it was built from."""
+        return (
+            kind, data['location_name'], data['timezone'], data['fetched_at'],
+            data.get('date'), data.get('stale', False), data.get('degraded', False),
+        )
+
+    def _render_current(self, username: str, local_time: str, data: dict) -> str:
+        """Format current weather with the local time passed separately, so it can be a reply cache field."""
+        return self.formatter.format_current_weather(username, {**data, 'time': local_time})
+
+    @metrics.timed('render_seconds', kind='current')
+    def format_current_weather(self, username: str, data: dict) -> str:
+        """Format current weather data as message, reusing the rendered body per location and minute."""
+        if 'fetched_at' not in data:
+            return self.formatter.format_current_weather(username, data)
+        return self.replies.render(
+            self._reply_key('current', data), self._render_current, (username, data['time']), data,
+        )
+
+    @metrics.timed('render_seconds', kind='forecast')
+    def format_forecast(self, username: str, data: dict) -> str:
+        """Format forecast data as message, reusing the rendered body per location and minute."""
+        if 'fetched_at' not in data:
+            return self.formatter.format_forecast(username, data)
+        return self.replies.render(self._reply_key('forecast', data), self.formatter.format_forecast, (username,), data)
@@ -0,0 +1,185 @@
+"""In-process result caches for weather lookups."""
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Thread-safe LRU cache with a per-entry time to live.
+
+    Entries older than ``ttl`` seconds are treated as missing by ``get``, but
+    are kept for another ``stale_ttl`` seconds and remain available through
+    ``get_stale``. When the cache grows beyond ``maxsize`` the least recently
+    used entry is evicted.
+    """
+
+    _clock = staticmethod(time.monotonic)
+
+    def __init__(self, maxsize: int, ttl: float, stale_ttl: float = 0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return cached value for key, or None if missing or expired."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            stored_at, value = item
+            age = self._clock() - stored_at
+            if age > self.ttl:
+                if age > self.ttl + self.stale_ttl:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_stale(self, key: Hashable, max_age: Optional[float] = None) -> Optional[Any]:
+        """Return the value for key even if expired, as long as it is within the stale window.
+
+        With max_age, entries older than that many seconds are not returned (but kept).
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            stored_at, value = item
+            age = self._clock() - stored_at
+            if age > self.ttl + self.stale_ttl:
+                del self._data[key]
+                return None
+            if max_age is not None and age > max_age:
+                return None
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store value under key, evicting the least recently used entry if full."""
+        with self._lock:
+            self._data[key] = (self._clock(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """Remove key from the cache if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class PersistentTTLCache(TTLCache):
+    """TTL cache mirrored to a JSON file so warm entries survive restarts.
+
+    Keys must be tuples of JSON-serializable values. Entries are timestamped
+    with wall-clock time so their age stays meaningful across processes.
+    Writes are debounced: a set() writes the file at most once per
+    flush_interval seconds, later changes are flushed by a timer, and
+    pending changes are flushed at interpreter exit.
+    """
+
+    _clock = staticmethod(time.time)
+
+    def __init__(self, maxsize: int, ttl: float, path: Optional[str] = None, flush_interval: float = 0) -> None:
+        super().__init__(maxsize, ttl)
+        self.path = path
+        self.flush_interval = flush_interval
+        self._dirty = False
+        self._last_save = float('-inf')
+        self._timer: Optional[threading.Timer] = None
+        self._save_lock = threading.Lock()
+        if path:
+            self._load()
+            atexit.register(self.flush)
+
+    def _load(self) -> None:
+        """Load non-expired entries from the persistence file."""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                entries = json.load(f)
+            now = self._clock()
+            for key, stored_at, value in entries[-self.maxsize:]:
+                if now - stored_at <= self.ttl:
+                    self._data[tuple(key)] = (stored_at, value)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.error(f'Error loading cache file {self.path}: {e}')
+            self._data.clear()
+
+    def _save(self) -> None:
+        """Atomically write all entries to the persistence file."""
+        with self._lock:
+            entries = [[list(key), stored_at, value] for key, (stored_at, value) in self._data.items()]
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f'Error saving cache file {self.path}: {e}')
+
+    def flush(self) -> None:
+        """Write pending changes to the persistence file now."""
+        with self._save_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+            self._last_save = time.monotonic()
+            self._save()
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store value under key and persist the cache, debounced, if a file is configured."""
+        super().set(key, value)
+        if not self.path:
+            return
+        with self._save_lock:
+            self._dirty = True
+            delay = self._last_save + self.flush_interval - time.monotonic()
+            if delay > 0:
+                if self._timer is None:
+                    self._timer = threading.Timer(delay, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        self.flush()
+
+
+def location_key(
+    city: Optional[str] = None,
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    precision: int = 2,
+) -> Optional[tuple]:
+    """Build a cache key from a normalized city name or a rounded lat/lon grid cell."""
+    if lat is not None and lon is not None:
+        return ('coords', round(lat, precision), round(lon, precision))
+    if city:
+        return ('city', ' '.join(city.casefold().split()))
+    return None
@@ -0,0 +1,5 @@
+"""Exceptions raised by weather services."""
+
+
+class WeatherServiceUnavailable(Exception):
+    """Upstream weather API is failing or the circuit breaker is open, and no cached data exists."""
@@ -0,0 +1,322 @@
+"""Bundled city gazetteer: a memory-mapped name index with prefix and trigram search.
+
+The index file is built from ``data/cities.tsv`` with::
+
+    python -m services.gazetteer data/cities.tsv data/gazetteer.idx
+
+Layout (little-endian): a header, fixed-size city records, a sorted table of
+normalized name keys for exact and prefix lookups by binary search, a sorted
+trigram table with posting lists of key indexes for fuzzy suggestions, and a
+pool of length-prefixed UTF-8 strings.
+"""
+import csv
+import logging
+import mmap
+import struct
+import sys
+import threading
+import unicodedata
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b'SKBGAZ01'
+# magic, city/key/trigram counts, offsets of the city, key, trigram, posting and string sections
+_HEADER = struct.Struct('<8s3I5I')
+# lat, lon, string offsets of the ru/uk/en names, country, state and timezone
+_CITY = struct.Struct('<dd6I')
+# lat, lon at the start of a city record
+_COORDS = struct.Struct('<dd')
+# string offset of the normalized key, city index, number of distinct key trigrams
+_KEY = struct.Struct('<3I')
+# string offset of the trigram, first posting, posting count
+_TRIGRAM = struct.Struct('<3I')
+_POSTING = struct.Struct('<I')
+_LENGTH = struct.Struct('<H')
+
+# Punctuation dropped or treated as a word break when normalizing names
+_NAME_TRANSLATION = str.maketrans({
+    '-': ' ', '.': ' ', ',': ' ', '(': ' ', ')': ' ', '_': ' ',
+    "'": None, '’': None, '`': None, 'ʼ': None,
+})
+
+# Locale codes used by the bot mapped to gazetteer name columns
+_LOCALE_COLUMNS = {'ru': 'name_ru', 'ua': 'name_uk', 'uk': 'name_uk', 'en': 'name_en'}
+
+
+def normalize_name(text: str) -> str:
+    """Casefold a place name, strip diacritics and punctuation and collapse whitespace."""
+    text = unicodedata.normalize('NFKD', text.casefold())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.translate(_NAME_TRANSLATION).split())
+
+
+def trigrams(key: str) -> set[str]:
+    """Return the space-padded character trigrams of a normalized name."""
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass(frozen=True)
+class City:
+    """A gazetteer entry."""
+
+    name_ru: str
+    name_uk: str
+    name_en: str
+    country: str
+    state: str
+    lat: float
+    lon: float
+    timezone: str
+
+    def name(self, locale: str) -> str:
+        """Return the city name for a bot locale, falling back to English."""
+        return getattr(self, _LOCALE_COLUMNS.get(locale, 'name_en')) or self.name_en
+
+    def geo_info(self) -> dict[str, str]:
+        """Return country and state in the reverse-geocoding result format."""
+        return {'country': self.country, 'state': self.state}
+
+
+class Gazetteer:
+    """Read-only city index, memory-mapped on first use.
+
+    Without a path, or with a missing or corrupt index file (logged once),
+    every lookup misses, so callers simply fall back to OWM.
+    """
+
+    def __init__(self, path: Optional[str]) -> None:
+        self.path = path
+        self._buf: Optional[mmap.mmap] = None
+        self._header: Optional[tuple] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> bool:
+        """Map the index file once; return False if it is unavailable."""
+        if self._loaded:
+            return self._buf is not None
+        with self._lock:
+            if not self._loaded and self.path:
+                try:
+                    with open(self.path, 'rb') as f:
+                        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    header = _HEADER.unpack_from(buf, 0)
+                    if header[0] != _MAGIC:
+                        raise ValueError('bad magic')
+                    self._buf, self._header = buf, header
+                except Exception as e:
+                    logger.error(f'Error loading gazetteer {self.path}: {e}')
+            self._loaded = True
+        return self._buf is not None
+
+    def __len__(self) -> int:
+        return self._header[1] if self._load() else 0
+
+    def _bytes(self, offset: int) -> bytes:
+        """Read a raw string from the string pool."""
+        start = self._header[8] + offset
+        (length,) = _LENGTH.unpack_from(self._buf, start)
+        return self._buf[start + 2:start + 2 + length]
+
+    def _city(self, index: int) -> City:
+        lat, lon, *strings = _CITY.unpack_from(self._buf, self._header[4] + index * _CITY.size)
+        ru, uk, en, country, state, tz = (self._bytes(offset).decode('utf-8') for offset in strings)
+        return City(ru, uk, en, country, state, lat, lon, tz)
+
+    def _key(self, index: int) -> tuple[bytes, int, int]:
+        """Return (normalized key, city index, trigram count) of a key table row."""
+        offset, city, n_trigrams = _KEY.unpack_from(self._buf, self._header[5] + index * _KEY.size)
+        return self._bytes(offset), city, n_trigrams
+
+    def _lower_bound(self, key: bytes) -> int:
+        """Index of the first key table row not less than key."""
+        lo, hi = 0, self._header[2]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _postings(self, trigram: str) -> range:
+        """Return the posting positions of a trigram, or an empty range."""
+        needle = trigram.encode('utf-8')
+        lo, hi = 0, self._header[3]
+        base = self._header[6]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset, first, count = _TRIGRAM.unpack_from(self._buf, base + mid * _TRIGRAM.size)
+            value = self._bytes(offset)
+            if value < needle:
+                lo = mid + 1
+            elif value > needle:
+                hi = mid
+            else:
+                return range(first, first + count)
+        return range(0)
+
+    def lookup(self, text: str) -> Optional[City]:
+        """Resolve an exact city name or alias, optionally suffixed with ', <country code>'.
+
+        When several cities share a name the first one in the source file wins.
+        """
+        if not text or not self._load():
+            return None
+        name, _, country = text.partition(',')
+        country = country.strip().upper()
+        key = normalize_name(name).encode('utf-8')
+        if not key:
+            return None
+        index = self._lower_bound(key)
+        while index < self._header[2]:
+            value, city_index, _ = self._key(index)
+            if value != key:
+                break
+            city = self._city(city_index)
+            if not country or city.country == country:
+                return city
+            index += 1
+        return None
+
+    def nearest(self, lat: float, lon: float, radius: float) -> Optional[City]:
+        """Return the city closest to the point within radius degrees in both axes, if any.
+
+        Scans the fixed-size city records, reading only their coordinates;
+        the index holds few cities and callers memoize the result per area.
+        """
+        if not self._load():
+            return None
+        best, best_distance = None, None
+        base = self._header[4]
+        for index in range(self._header[1]):
+            city_lat, city_lon = _COORDS.unpack_from(self._buf, base + index * _CITY.size)
+            d_lat, d_lon = abs(lat - city_lat), abs(lon - city_lon)
+            if d_lat <= radius and d_lon <= radius and (best is None or d_lat + d_lon < best_distance):
+                best, best_distance = index, d_lat + d_lon
+        return self._city(best) if best is not None else None
+
+    def complete(self, prefix: str, limit: int = 5) -> list[City]:
+        """Return up to limit distinct cities having a name or alias that starts with prefix."""
+        key = normalize_name(prefix).encode('utf-8')
+        if not key or not self._load():
+            return []
+        seen: dict[int, City] = {}
+        index = self._lower_bound(key)
+        while index < self._header[2] and len(seen) < limit:
+            value, city_index, _ = self._key(index)
+            if not value.startswith(key):
+                break
+            if city_index not in seen:
+                seen[city_index] = self._city(city_index)
+            index += 1
+        return list(seen.values())
+
+    def suggest(self, text: str, limit: int = 3, min_score: float = 0.4) -> list[City]:
+        """Return up to limit cities whose names are closest to text by trigram similarity.
+
+        Candidates are scored with the Dice coefficient over distinct trigrams,
+        counting shared trigrams from the posting lists.
+        """
+        key = normalize_name(text.partition(',')[0])
+        if not key or not self._load():
+            return []
+        query = trigrams(key)
+        shared: dict[int, int] = {}
+        posting_base = self._header[7]
+        for trigram in query:
+            for position in self._postings(trigram):
+                (key_index,) = _POSTING.unpack_from(self._buf, posting_base + position * _POSTING.size)
+                shared[key_index] = shared.get(key_index, 0) + 1
+
+        best: dict[int, float] = {}
+        for key_index, count in shared.items():
+            _, city_index, n_trigrams = self._key(key_index)
+            score = 2 * count / (len(query) + n_trigrams)
+            if score >= min_score and score > best.get(city_index, 0.0):
+                best[city_index] = score
+        ranked = sorted(best.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [self._city(city_index) for city_index, _ in ranked]
+
+
+def read_tsv(path: str) -> list[tuple[City, list[str]]]:
+    """Read gazetteer source rows (en, ru, uk, aliases, country, state, lat, lon, timezone)."""
+    rows = []
+    with open(path, encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f, delimiter='\t'):
+            city = City(
+                row['ru'], row['uk'], row['en'], row['country'], row['state'],
+                float(row['lat']), float(row['lon']), row['timezone'],
+            )
+            aliases = [alias for alias in row['aliases'].split(',') if alias]
+            rows.append((city, aliases))
+    return rows
+
+
+def build_index(rows: Iterable[tuple[City, list[str]]], path: str) -> None:
+    """Write a gazetteer index file for (city, aliases) rows."""
+    pool = bytearray()
+    offsets: dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        if value not in offsets:
+            data = value.encode('utf-8')
+            offsets[value] = len(pool)
+            pool.extend(_LENGTH.pack(len(data)) + data)
+        return offsets[value]
+
+    cities = bytearray()
+    keys: set[tuple[bytes, int]] = set()
+    for city_index, (city, aliases) in enumerate(rows):
+        cities.extend(_CITY.pack(
+            city.lat, city.lon, intern(city.name_ru), intern(city.name_uk), intern(city.name_en),
+            intern(city.country), intern(city.state), intern(city.timezone),
+        ))
+        for name in (city.name_ru, city.name_uk, city.name_en, *aliases):
+            key = normalize_name(name)
+            if key:
+                keys.add((key.encode('utf-8'), city_index))
+
+    key_table = bytearray()
+    postings: dict[bytes, list[int]] = {}
+    for key_index, (key, city_index) in enumerate(sorted(keys)):
+        key_trigrams = trigrams(key.decode('utf-8'))
+        key_table.extend(_KEY.pack(intern(key.decode('utf-8')), city_index, len(key_trigrams)))
+        for trigram in key_trigrams:
+            postings.setdefault(trigram.encode('utf-8'), []).append(key_index)
+
+    trigram_table = bytearray()
+    posting_table = bytearray()
+    position = 0
+    for trigram in sorted(postings):
+        key_indexes = postings[trigram]
+        trigram_table.extend(_TRIGRAM.pack(intern(trigram.decode('utf-8')), position, len(key_indexes)))
+        for key_index in key_indexes:
+            posting_table.extend(_POSTING.pack(key_index))
+        position += len(key_indexes)
+
+    sections = (cities, key_table, trigram_table, posting_table)
+    section_offsets = []
+    offset = _HEADER.size
+    for section in sections:
+        section_offsets.append(offset)
+        offset += len(section)
+    header = _HEADER.pack(
+        _MAGIC, len(cities) // _CITY.size, len(keys), len(postings), *section_offsets, offset,
+    )
+    with open(path, 'wb') as f:
+        f.write(header)
+        for section in sections:
+            f.write(section)
+        f.write(pool)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit('usage: python -m services.gazetteer <cities.tsv> <gazetteer.idx>')
+    source_rows = read_tsv(sys.argv[1])
+    build_index(source_rows, sys.argv[2])
+    print(f'{len(source_rows)} cities written to {sys.argv[2]}')
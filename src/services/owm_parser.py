@@ -0,0 +1,309 @@
+"""Conversion of OpenWeatherMap data into the bot's weather dicts."""
+import datetime
+import re
+from typing import Any, Iterable
+
+import numpy as np
+import pytz
+
+from config import LOCALE
+from utils.bot_helpers import format_localized_weekday
+
+# Weather icon code → emoji mapping
+_ICON_MAP: dict[str, str] = {
+    '01d': '\U00002600', '01n': '\U0001F311', '02': '\U000026C5',
+    '03': '\U00002601', '04': '\U00002601', '09': '\U00002614',
+    '10': '\U00002614', '11': '\U000026A1', '13': '\U00002744',
+    '50': '\U0001F32B',
+}
+
+# Pressure conversion factor: hPa → mmHg
+HPA_TO_MMHG = 0.75
+
+# Kelvin → Celsius offset, as used by pyowm
+_KELVIN_OFFSET = 273.15
+
+# Ordinal of 1970-01-01, to turn days since the epoch into dates
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+_SECONDS_PER_DAY = 86400
+
+
+def icon_to_emoji(icon: str) -> str:
+    """Convert weather icon code to emoji."""
+    if '01' not in icon:
+        icon = re.sub(r'\D', '', icon)
+    return _ICON_MAP.get(icon, '')
+
+
+def kelvin_to_celsius(kelvin: float) -> float:
+    """Convert Kelvin to Celsius rounded to 2 decimals, matching pyowm's conversion."""
+    return float(f'{kelvin - _KELVIN_OFFSET:.2f}')
+
+
+def local_time_fields(timezone: pytz.BaseTzInfo) -> dict[str, str]:
+    """Build the localized date and time fields for the current moment."""
+    local_time = datetime.datetime.now(tz=pytz.utc).astimezone(timezone)
+    formatted_date = format_localized_weekday(local_time.date(), LOCALE)
+    return {
+        'date': formatted_date.capitalize(),
+        'time': local_time.strftime('%H:%M:%S'),
+    }
+
+
+class ForecastSeries:
+    """3h forecast entries stored as columnar arrays.
+
+    Temperatures are kept in Kelvin and pressure in hPa, as delivered by OWM.
+    Status and icon are stored as integer codes into ``statuses`` and
+    ``icons``, numbered in order of first appearance.
+    """
+
+    __slots__ = (
+        'timestamps', 'temp', 'humidity', 'pressure', 'wind_speed',
+        'status_codes', 'icon_codes', 'statuses', 'icons',
+    )
+
+    def __init__(self, rows: Iterable[tuple[int, float, float, float, float, str, str]]) -> None:
+        """Build the columns from (timestamp, temp, humidity, pressure, wind speed, status, icon name) rows."""
+        timestamps, temp, humidity, pressure, wind_speed = [], [], [], [], []
+        status_codes, icon_codes = [], []
+        statuses: dict[str, int] = {}
+        icon_names: dict[str, int] = {}
+        icons: dict[str, int] = {}
+        for ts, t, h, p, w, status, icon_name in rows:
+            timestamps.append(ts)
+            temp.append(t)
+            humidity.append(h)
+            pressure.append(p)
+            wind_speed.append(w)
+            status_codes.append(statuses.setdefault(status, len(statuses)))
+            code = icon_names.get(icon_name)
+            if code is None:
+                emoji = icon_to_emoji(icon_name)
+                code = icon_names[icon_name] = icons.setdefault(emoji, len(icons))
+            icon_codes.append(code)
+        self.timestamps = np.array(timestamps, dtype=np.int64)
+        self.temp = np.array(temp, dtype=np.float64)
+        self.humidity = np.array(humidity, dtype=np.float64)
+        self.pressure = np.array(pressure, dtype=np.float64)
+        self.wind_speed = np.array(wind_speed, dtype=np.float64)
+        self.status_codes = np.array(status_codes, dtype=np.int64)
+        self.icon_codes = np.array(icon_codes, dtype=np.int64)
+        self.statuses = list(statuses)
+        self.icons = list(icons)
+
+    @classmethod
+    def from_weathers(cls, weathers: Iterable[Any]) -> 'ForecastSeries':
+        """Build a series from pyowm Weather objects, reading their raw fields."""
+        return cls(
+            (w.ref_time, w.temp['temp'], w.humidity, w.pressure['press'],
+             w.wnd['speed'], w.detailed_status, w.weather_icon_name)
+            for w in weathers
+        )
+
+    @classmethod
+    def from_json(cls, items: Iterable[dict[str, Any]]) -> 'ForecastSeries':
+        """Build a series from the ``list`` of a raw OWM /forecast response."""
+        return cls(
+            (item['dt'], item['main']['temp'], item['main']['humidity'], item['main']['pressure'],
+             item['wind']['speed'], item['weather'][0]['description'], item['weather'][0]['icon'])
+            for item in items
+        )
+
+    def __len__(self) -> int:
+        return self.timestamps.size
+
+
+def _local_days(timestamps: np.ndarray, timezone: pytz.BaseTzInfo) -> np.ndarray:
+    """Return local calendar days (days since the epoch) for UTC timestamps."""
+    def offset(ts: int) -> int:
+        return int(datetime.datetime.fromtimestamp(ts, tz=timezone).utcoffset().total_seconds())
+
+    # A 5 day window crosses at most one DST change, so equal offsets at both
+    # ends mean the offset is constant over the whole series.
+    start, end = offset(int(timestamps.min())), offset(int(timestamps.max()))
+    if start == end:
+        offsets = start
+    else:
+        offsets = np.array([offset(ts) for ts in timestamps.tolist()], dtype=np.int64)
+    return (timestamps + offsets) // _SECONDS_PER_DAY
+
+
+def _grouped_mode(codes: np.ndarray, groups: np.ndarray, n_groups: int, n_codes: int) -> np.ndarray:
+    """Return the most common code per group, breaking ties by first occurrence like Counter.most_common."""
+    counts = np.zeros((n_groups, n_codes), dtype=np.int64)
+    np.add.at(counts, (groups, codes), 1)
+    first_seen = np.full((n_groups, n_codes), codes.size, dtype=np.int64)
+    np.minimum.at(first_seen, (groups, codes), np.arange(codes.size))
+    return (counts * (codes.size + 1) - first_seen).argmax(axis=1)
+
+
+def aggregate_daily(series: ForecastSeries, timezone: pytz.BaseTzInfo) -> list[dict]:
+    """Aggregate a 3h forecast series into daily summaries per local day."""
+    if not len(series):
+        return []
+    days = _local_days(series.timestamps, timezone)
+    order = np.argsort(days, kind='stable')
+    days, starts, counts = np.unique(days[order], return_index=True, return_counts=True)
+    groups = np.repeat(np.arange(days.size), counts)
+
+    temp = np.round(series.temp[order] - _KELVIN_OFFSET, 2)
+    temp_min = np.rint(np.minimum.reduceat(temp, starts)).astype(np.int64).tolist()
+    temp_max = np.rint(np.maximum.reduceat(temp, starts)).astype(np.int64).tolist()
+    humidity = np.rint(np.add.reduceat(series.humidity[order], starts) / counts).astype(np.int64).tolist()
+    pressure = np.rint(
+        np.add.reduceat(series.pressure[order] * HPA_TO_MMHG, starts) / counts
+    ).astype(np.int64).tolist()
+    wind_speed = np.rint(np.add.reduceat(series.wind_speed[order], starts) / counts).astype(np.int64).tolist()
+    status = _grouped_mode(series.status_codes[order], groups, days.size, len(series.statuses)).tolist()
+    icon = _grouped_mode(series.icon_codes[order], groups, days.size, len(series.icons)).tolist()
+
+    forecasts = []
+    for i, day in enumerate(days.tolist()):
+        formatted_date = format_localized_weekday(datetime.date.fromordinal(_EPOCH_ORDINAL + day), LOCALE)
+        forecasts.append({
+            'date': formatted_date.capitalize(),
+            'temp_min': temp_min[i],
+            'temp_max': temp_max[i],
+            'humidity_avg': humidity[i],
+            'pressure_avg': pressure[i],
+            'wind_speed_avg': wind_speed[i],
+            'status': series.statuses[status[i]],
+            'icon': series.icons[icon[i]],
+        })
+    return forecasts
+
+
+class CurrentRecord:
+    """The fields of a current weather observation used by the bot, in OWM units."""
+
+    __slots__ = ('name', 'lat', 'lon', 'temp', 'pressure', 'humidity', 'wind_speed', 'status', 'icon_name')
+
+    def __init__(
+        self,
+        name: str,
+        lat: float,
+        lon: float,
+        temp: float,
+        pressure: float,
+        humidity: int,
+        wind_speed: float,
+        status: str,
+        icon_name: str,
+    ) -> None:
+        self.name = name
+        self.lat = lat
+        self.lon = lon
+        self.temp = temp
+        self.pressure = pressure
+        self.humidity = humidity
+        self.wind_speed = wind_speed
+        self.status = status
+        self.icon_name = icon_name
+
+    @classmethod
+    def from_json(cls, payload: dict[str, Any]) -> 'CurrentRecord':
+        """Read the record from a raw OWM /weather response."""
+        main = payload['main']
+        weather = payload['weather'][0]
+        coord = payload['coord']
+        return cls(
+            payload['name'], coord['lat'], coord['lon'],
+            main['temp'], main['pressure'], main['humidity'], payload['wind']['speed'],
+            weather['description'], weather['icon'],
+        )
+
+    @classmethod
+    def from_observation(cls, observation: Any) -> 'CurrentRecord':
+        """Read the record from a pyowm Observation."""
+        location = observation.location
+        weather = observation.weather
+        return cls(
+            location.name, location.lat, location.lon,
+            weather.temp['temp'], weather.pressure['press'], weather.humidity, weather.wnd['speed'],
+            weather.detailed_status, weather.weather_icon_name,
+        )
+
+
+class ForecastRecord:
+    """A location and its 3h forecast series."""
+
+    __slots__ = ('name', 'lat', 'lon', 'series')
+
+    def __init__(self, name: str, lat: float, lon: float, series: ForecastSeries) -> None:
+        self.name = name
+        self.lat = lat
+        self.lon = lon
+        self.series = series
+
+    @classmethod
+    def from_json(cls, payload: dict[str, Any]) -> 'ForecastRecord':
+        """Read the record from a raw OWM /forecast response."""
+        city = payload['city']
+        coord = city['coord']
+        return cls(city['name'], coord['lat'], coord['lon'], ForecastSeries.from_json(payload['list']))
+
+    @classmethod
+    def from_forecaster(cls, forecaster: Any) -> 'ForecastRecord':
+        """Read the record from a pyowm Forecaster."""
+        fc = forecaster.forecast
+        location = fc.location
+        return cls(location.name, location.lat, location.lon, ForecastSeries.from_weathers(fc))
+
+
+def build_current(
+    record: CurrentRecord,
+    timezone: pytz.BaseTzInfo,
+    tz_name: str,
+    geo_info: dict[str, str],
+) -> dict:
+    """Build the current weather dict from a current weather record."""
+    return {
+        'location_name': record.name,
+        'country': geo_info['country'],
+        'state': geo_info['state'],
+        'icon': icon_to_emoji(record.icon_name),
+        'status': record.status,
+        'temp': round(kelvin_to_celsius(record.temp)),
+        'pressure': round(record.pressure * HPA_TO_MMHG),
+        'humidity': record.humidity,
+        'wind_speed': round(record.wind_speed),
+        'timezone': tz_name,
+        **local_time_fields(timezone),
+    }
+
+
+def build_forecast(
+    record: ForecastRecord,
+    timezone: pytz.BaseTzInfo,
+    tz_name: str,
+    geo_info: dict[str, str],
+) -> dict:
+    """Build the daily forecast dict by aggregating the 3h series per local day."""
+    return {
+        'location_name': record.name,
+        'country': geo_info['country'],
+        'state': geo_info['state'],
+        'timezone': tz_name,
+        'forecasts': aggregate_daily(record.series, timezone),
+    }
+
+
+def parse_current_json(
+    payload: dict[str, Any],
+    timezone: pytz.BaseTzInfo,
+    tz_name: str,
+    geo_info: dict[str, str],
+) -> dict:
+    """Build the current weather dict from a raw OWM /weather response."""
+    return build_current(CurrentRecord.from_json(payload), timezone, tz_name, geo_info)
+
+
+def parse_forecast_json(
+    payload: dict[str, Any],
+    timezone: pytz.BaseTzInfo,
+    tz_name: str,
+    geo_info: dict[str, str],
+) -> dict:
+    """Build the daily forecast dict from a raw OWM /forecast response."""
+    return build_forecast(ForecastRecord.from_json(payload), timezone, tz_name, geo_info)
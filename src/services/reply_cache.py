@@ -0,0 +1,61 @@
+"""Cache of rendered reply bodies with per-user fields spliced in."""
+import re
+import time
+from typing import Callable, Hashable
+
+# Control characters used as field placeholders while rendering a body
+_PLACEHOLDERS = ('\x00', '\x01', '\x02', '\x03')
+_PLACEHOLDER_RE = re.compile('([\x00-\x03])')
+
+
+class ReplyCache:
+    """Rendered messages per key and minute, with per-user fields left as gaps.
+
+    A body is rendered once with placeholders in place of the variable
+    fields and split into literal segments; later calls for the same key
+    only join the segments with the actual field values. Entries live for
+    the current wall-clock minute: the whole cache is dropped when the
+    minute changes. Lookups take no lock, so concurrent misses may render
+    the same body twice, which is harmless.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._minute = 0
+        self._data: dict[Hashable, tuple[list[str], list[tuple[int, int]]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _compile(render: Callable[..., str], field_count: int, *args) -> tuple[list[str], list[tuple[int, int]]]:
+        """Render with placeholders and split the result into segments and (segment index, field) slots."""
+        segments = _PLACEHOLDER_RE.split(render(*_PLACEHOLDERS[:field_count], *args))
+        slots = [(i, _PLACEHOLDERS.index(segments[i])) for i in range(1, len(segments), 2)]
+        return segments, slots
+
+    def render(self, key: Hashable, render: Callable[..., str], values: tuple[str, ...], *args) -> str:
+        """Return render(*values, *args), reusing the body rendered for key in the current minute.
+
+        ``values`` are the leading arguments of ``render`` that vary per user;
+        the remaining arguments must be fully described by key.
+        """
+        minute = int(time.time() // 60)
+        if minute != self._minute:
+            self._minute = minute
+            self._data = {}
+        compiled = self._data.get(key)
+        if compiled is None:
+            self.misses += 1
+            compiled = self._compile(render, len(values), *args)
+            if len(self._data) < self.maxsize:
+                self._data[key] = compiled
+        else:
+            self.hits += 1
+        segments, slots = compiled
+        parts = segments.copy()
+        for index, field in slots:
+            parts[index] = values[field]
+        return ''.join(parts)
+
+    def __len__(self) -> int:
+        return len(self._data)
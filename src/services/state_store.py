@@ -0,0 +1,231 @@
+"""Pluggable key-value and set stores for conversation state shared across instances."""
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Optional, Sequence
+
+# SQLite allows 999 bound parameters per statement in older builds
+_SQLITE_BATCH = 500
+
+
+class StateStore(ABC):
+    """Interface for string key-value stores with per-key TTL in seconds, plus string sets without TTL.
+
+    ``persistent`` tells whether state survives restarts and is shared between instances.
+    """
+
+    persistent = True
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Return the value for key, or None if missing or expired."""
+
+    def get_many(self, keys: Sequence[str]) -> list[Optional[str]]:
+        """Return the values for keys in order, None for missing or expired ones, in as few round trips as possible."""
+        return [self.get(key) for key in keys]
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: int) -> None:
+        """Store value under key for ttl seconds."""
+
+    @abstractmethod
+    def add_if_absent(self, key: str, value: str, ttl: int) -> bool:
+        """Atomically store value under key for ttl seconds unless it exists; return True if stored."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove key if present."""
+
+    @abstractmethod
+    def add_member(self, key: str, member: str) -> None:
+        """Add member to the set stored under key."""
+
+    @abstractmethod
+    def remove_member(self, key: str, member: str) -> None:
+        """Remove member from the set stored under key if present."""
+
+    @abstractmethod
+    def members(self, key: str) -> frozenset[str]:
+        """Return the members of the set stored under key (empty if missing)."""
+
+
+class MemoryStateStore(StateStore):
+    """Process-local store; state is lost on restart and not shared between instances."""
+
+    persistent = False
+
+    def __init__(self) -> None:
+        self._data: dict[str, tuple[float, str]] = {}
+        self._sets: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if time.time() >= expires_at:
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+
+    def add_if_absent(self, key: str, value: str, ttl: int) -> bool:
+        with self._lock:
+            now = time.time()
+            item = self._data.get(key)
+            if item is not None and now < item[0]:
+                return False
+            self._data[key] = (now + ttl, value)
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def add_member(self, key: str, member: str) -> None:
+        with self._lock:
+            self._sets.setdefault(key, set()).add(member)
+
+    def remove_member(self, key: str, member: str) -> None:
+        with self._lock:
+            members = self._sets.get(key)
+            if members is not None:
+                members.discard(member)
+                if not members:
+                    del self._sets[key]
+
+    def members(self, key: str) -> frozenset[str]:
+        with self._lock:
+            return frozenset(self._sets.get(key, ()))
+
+
+class SQLiteStateStore(StateStore):
+    """Store backed by an SQLite file, shared by processes that can reach the file."""
+
+    def __init__(self, path: str) -> None:
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS state '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS members '
+                '(key TEXT NOT NULL, member TEXT NOT NULL, PRIMARY KEY (key, member))'
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value FROM state WHERE key = ? AND expires_at > ?', (key, time.time()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_many(self, keys: Sequence[str]) -> list[Optional[str]]:
+        values: dict[str, str] = {}
+        with self._lock:
+            now = time.time()
+            for start in range(0, len(keys), _SQLITE_BATCH):
+                batch = keys[start:start + _SQLITE_BATCH]
+                rows = self._conn.execute(
+                    f'SELECT key, value FROM state WHERE key IN ({", ".join("?" * len(batch))}) AND expires_at > ?',
+                    (*batch, now),
+                ).fetchall()
+                values.update(rows)
+        return [values.get(key) for key in keys]
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        with self._lock:
+            now = time.time()
+            self._conn.execute('DELETE FROM state WHERE expires_at <= ?', (now,))
+            self._conn.execute(
+                'INSERT OR REPLACE INTO state (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, value, now + ttl),
+            )
+
+    def add_if_absent(self, key: str, value: str, ttl: int) -> bool:
+        with self._lock:
+            now = time.time()
+            self._conn.execute('DELETE FROM state WHERE key = ? AND expires_at <= ?', (key, now))
+            cursor = self._conn.execute(
+                'INSERT OR IGNORE INTO state (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, value, now + ttl),
+            )
+            return cursor.rowcount == 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM state WHERE key = ?', (key,))
+
+    def add_member(self, key: str, member: str) -> None:
+        with self._lock:
+            self._conn.execute('INSERT OR IGNORE INTO members (key, member) VALUES (?, ?)', (key, member))
+
+    def remove_member(self, key: str, member: str) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM members WHERE key = ? AND member = ?', (key, member))
+
+    def members(self, key: str) -> frozenset[str]:
+        with self._lock:
+            rows = self._conn.execute('SELECT member FROM members WHERE key = ?', (key,)).fetchall()
+        return frozenset(row[0] for row in rows)
+
+
+class RedisStateStore(StateStore):
+    """Store backed by any client with the redis-py ``get``/``mget``/``set(ex=)``/``delete``/``s*`` set interface."""
+
+    def __init__(self, client: Any, prefix: str = 'skbweatherbot:') -> None:
+        self.client = client
+        self.prefix = prefix
+
+    @staticmethod
+    def _decode(value: Any) -> Optional[str]:
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
+    def get(self, key: str) -> Optional[str]:
+        return self._decode(self.client.get(self.prefix + key))
+
+    def get_many(self, keys: Sequence[str]) -> list[Optional[str]]:
+        if not keys:
+            return []
+        return [self._decode(value) for value in self.client.mget([self.prefix + key for key in keys])]
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+    def add_if_absent(self, key: str, value: str, ttl: int) -> bool:
+        return bool(self.client.set(self.prefix + key, value, ex=ttl, nx=True))
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+    def add_member(self, key: str, member: str) -> None:
+        self.client.sadd(self.prefix + key, member)
+
+    def remove_member(self, key: str, member: str) -> None:
+        self.client.srem(self.prefix + key, member)
+
+    def members(self, key: str) -> frozenset[str]:
+        members = self.client.smembers(self.prefix + key)
+        return frozenset(m.decode('utf-8') if isinstance(m, bytes) else m for m in members)
+
+
+def create_state_store(backend: str, sqlite_path: str, redis_url: Optional[str]) -> StateStore:
+    """Create the configured state store: 'memory', 'sqlite' or 'redis'."""
+    if backend == 'sqlite':
+        return SQLiteStateStore(sqlite_path)
+    if backend == 'redis':
+        if not redis_url:
+            raise ValueError('STATE_BACKEND=redis requires REDIS_URL')
+        import redis
+        return RedisStateStore(redis.Redis.from_url(redis_url))
+    if backend == 'memory':
+        return MemoryStateStore()
+    raise ValueError(f'Unknown state backend: {backend}')
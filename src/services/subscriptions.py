@@ -0,0 +1,159 @@
+"""Daily weather subscriptions kept in the shared state store.
+
+Each chat has at most one subscription, stored as JSON under
+``subscription:<chat_id>``. Delivery times are local to the city, so chat ids
+are also indexed in sets per timezone and local time
+(``subscriptions:<timezone>:<HH:MM>``), with the timezones in use listed in
+``subscriptions:timezones``. A scheduler tick looks up the slots of the
+recent local minutes in each timezone, which keeps working across DST
+changes. Each delivery is claimed with an atomic
+``subscriptions:sent:<chat_id>:<local date>`` marker, so overlapping ticks,
+retried ticks and the repeated hour of a DST fall-back never deliver twice
+on one day, and released again if the send does not go out.
+"""
+import json
+import logging
+import re
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Optional
+
+import pytz
+
+from services.state_store import StateStore
+
+logger = logging.getLogger(__name__)
+
+_TIME_RE = re.compile(r'^([01]?\d|2[0-3])[:.]([0-5]\d)$')
+_TIMEZONES_KEY = 'subscriptions:timezones'
+# Delivery markers only need to outlive the local day they are for, in any timezone
+_SENT_TTL = 2 * 24 * 3600
+
+
+@dataclass(frozen=True)
+class Subscription:
+    """A chat's daily weather subscription."""
+
+    chat_id: int
+    city: str
+    time: str
+    timezone: str
+    username: str
+
+
+def parse_time(text: str) -> Optional[str]:
+    """Parse 'H:MM', 'HH:MM' or 'HH.MM' into 'HH:MM'; None if it is not a valid time of day."""
+    match = _TIME_RE.match(text.strip())
+    if not match:
+        return None
+    return f'{int(match.group(1)):02d}:{match.group(2)}'
+
+
+class SubscriptionStore:
+    """Subscriptions and their per-timezone delivery slots on top of a StateStore.
+
+    Records live for ttl seconds and are renewed on every delivery, so only
+    chats that stopped receiving messages expire. Slot entries of expired or
+    changed records are dropped lazily when a tick reads them.
+    """
+
+    def __init__(self, state: StateStore, ttl: int) -> None:
+        self.state = state
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(chat_id: int) -> str:
+        return f'subscription:{chat_id}'
+
+    @staticmethod
+    def _slot_key(timezone: str, local_time: str) -> str:
+        return f'subscriptions:{timezone}:{local_time}'
+
+    @property
+    def persistent(self) -> bool:
+        """True if subscriptions survive restarts and are seen by every instance, which delivery requires."""
+        return self.state.persistent
+
+    @staticmethod
+    def _parse(chat_id: int, value: Optional[str]) -> Optional[Subscription]:
+        if value is None:
+            return None
+        try:
+            return Subscription(**json.loads(value))
+        except (TypeError, ValueError) as e:
+            logger.error(f'Error reading subscription of chat {chat_id}: {e}')
+            return None
+
+    def get(self, chat_id: int) -> Optional[Subscription]:
+        """Return the subscription of a chat, or None."""
+        return self._parse(chat_id, self.state.get(self._key(chat_id)))
+
+    def save(self, subscription: Subscription) -> None:
+        """Create or replace the subscription of a chat."""
+        previous = self.get(subscription.chat_id)
+        if previous and (previous.timezone, previous.time) != (subscription.timezone, subscription.time):
+            self.state.remove_member(self._slot_key(previous.timezone, previous.time), str(previous.chat_id))
+        self.state.set(self._key(subscription.chat_id), json.dumps(asdict(subscription)), self.ttl)
+        self.state.add_member(_TIMEZONES_KEY, subscription.timezone)
+        self.state.add_member(self._slot_key(subscription.timezone, subscription.time), str(subscription.chat_id))
+
+    def renew(self, subscription: Subscription) -> None:
+        """Extend the lifetime of a subscription after a delivery."""
+        self.state.set(self._key(subscription.chat_id), json.dumps(asdict(subscription)), self.ttl)
+
+    def delete(self, chat_id: int) -> bool:
+        """Remove the subscription of a chat; return False if there was none."""
+        subscription = self.get(chat_id)
+        if subscription is None:
+            return False
+        self.state.delete(self._key(chat_id))
+        self.state.remove_member(self._slot_key(subscription.timezone, subscription.time), str(chat_id))
+        return True
+
+    def due(self, minute: int) -> list[Subscription]:
+        """Return the subscriptions due at a minute (Unix time // 60) in their local time.
+
+        Each timezone costs one set read and one batched read of its subscribers.
+        """
+        moment = datetime.fromtimestamp(minute * 60, pytz.utc)
+        due = []
+        for timezone in sorted(self.state.members(_TIMEZONES_KEY)):
+            try:
+                local_time = moment.astimezone(pytz.timezone(timezone)).strftime('%H:%M')
+            except pytz.UnknownTimeZoneError:
+                logger.error(f'Unknown subscription timezone: {timezone}')
+                continue
+            slot_key = self._slot_key(timezone, local_time)
+            members = sorted(self.state.members(slot_key))
+            values = self.state.get_many([self._key(int(member)) for member in members])
+            for member, value in zip(members, values):
+                subscription = self._parse(int(member), value)
+                if subscription is None or (subscription.timezone, subscription.time) != (timezone, local_time):
+                    self.state.remove_member(slot_key, member)
+                    continue
+                due.append(subscription)
+        return due
+
+    @staticmethod
+    def recent_minutes(now: float, catch_up: int) -> range:
+        """Return the minutes (Unix time // 60) up to now, catch_up minutes back, that a tick delivers."""
+        minute = int(now // 60)
+        return range(minute - max(catch_up, 1) + 1, minute + 1)
+
+    @staticmethod
+    def _sent_key(subscription: Subscription, minute: int) -> str:
+        local_date = datetime.fromtimestamp(minute * 60, pytz.timezone(subscription.timezone)).date()
+        return f'subscriptions:sent:{subscription.chat_id}:{local_date.isoformat()}'
+
+    def claim_delivery(self, subscription: Subscription, minute: int) -> bool:
+        """Atomically claim the delivery due at minute; False if it was claimed for that local date already.
+
+        A claim is kept once the message is sent. If the send fails or runs
+        out of time, release_delivery() lets a later tick within the catch-up
+        window retry it; only a crash between claim and send loses a delivery.
+        """
+        return self.state.add_if_absent(self._sent_key(subscription, minute), '1', _SENT_TTL)
+
+    def release_delivery(self, subscription: Subscription, minute: int) -> None:
+        """Drop the claim of a delivery that did not go out."""
+        self.state.delete(self._sent_key(subscription, minute))
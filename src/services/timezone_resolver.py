@@ -0,0 +1,66 @@
+"""Timezone resolution for coordinates with lazy TimezoneFinder and grid-cell memo."""
+import logging
+import math
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+
+import pytz
+
+from config import KNOWN_TZ_RADIUS, TZ_CACHE_CELL_SIZE, TZ_CACHE_SIZE, TZ_FINDER_IN_MEMORY
+from services.cache import TTLCache
+from services.gazetteer import Gazetteer
+
+if TYPE_CHECKING:
+    from timezonefinder import TimezoneFinder
+
+logger = logging.getLogger(__name__)
+
+
+class TimezoneResolver:
+    """Resolves coordinates to timezones, cheapest source first, memoized per grid cell.
+
+    Points near a gazetteer city take its timezone; others go to TimezoneFinder.
+    """
+
+    def __init__(self, gazetteer: Optional[Gazetteer] = None) -> None:
+        self.gazetteer = gazetteer
+        self._tz_finder: Optional['TimezoneFinder'] = None
+        self._tz_finder_lock = threading.Lock()
+        self._tz_lookup_lock = threading.Lock()
+        self.cache = TTLCache(TZ_CACHE_SIZE, math.inf)
+
+    @property
+    def tz_finder(self) -> 'TimezoneFinder':
+        """TimezoneFinder created on first use, since loading its dataset dominates cold start."""
+        if self._tz_finder is None:
+            with self._tz_finder_lock:
+                if self._tz_finder is None:
+                    start = time.perf_counter()
+                    from timezonefinder import TimezoneFinder
+                    self._tz_finder = TimezoneFinder(in_memory=TZ_FINDER_IN_MEMORY)
+                    logger.info(f'TimezoneFinder initialized in {(time.perf_counter() - start) * 1000:.1f} ms')
+        return self._tz_finder
+
+    def _lookup_name(self, lat: float, lon: float) -> Optional[str]:
+        """Find the timezone name, cheapest source first: gazetteer cities, unique-zone shortcut, polygons."""
+        place = self.gazetteer.nearest(lat, lon, KNOWN_TZ_RADIUS) if self.gazetteer is not None else None
+        if place is not None and place.timezone:
+            return place.timezone
+        # TimezoneFinder reads its data files through shared handles and is not thread-safe
+        with self._tz_lookup_lock:
+            tz_name = self.tz_finder.unique_timezone_at(lng=lon, lat=lat)
+            if tz_name:
+                return tz_name
+            return self.tz_finder.timezone_at(lng=lon, lat=lat)
+
+    def resolve(self, lat: float, lon: float) -> tuple[pytz.BaseTzInfo, str]:
+        """Resolve timezone for given coordinates, memoized per grid cell of TZ_CACHE_CELL_SIZE degrees."""
+        key = (math.floor(lat / TZ_CACHE_CELL_SIZE), math.floor(lon / TZ_CACHE_CELL_SIZE))
+        tz_name = self.cache.get(key)
+        if tz_name is None:
+            tz_name = self._lookup_name(lat, lon) or ''
+            self.cache.set(key, tz_name)
+        if tz_name:
+            return pytz.timezone(tz_name), tz_name
+        return pytz.utc, 'UTC'
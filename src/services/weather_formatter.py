@@ -1,63 +1,98 @@
 """Weather data formatting for bot messages."""
+import time
+from functools import lru_cache
+
 from config import DEGREE_SIGN
+from utils.metrics import metrics
+
+# Static message fragments, built once at import
+_CELSIUS = f' {DEGREE_SIGN}C</b>\n'
+_TEMP_LABEL = '\U0001F321 <i>Температура воздуха:</i> <b>'
+_TEMP_AVG_LABEL = '\U0001F321 <i>Средняя температура воздуха:</i> <b>'
 
 
 class WeatherFormatter:
-    """Formats weather data dicts into HTML messages for Telegram."""
+    """Formats weather data dicts into HTML messages for Telegram.
+
+    Location lines and country flags are memoized, and each message is
+    assembled with a single f-string or join.
+    """
 
     @staticmethod
+    @lru_cache(maxsize=256)
     def _country_flag(country_code: str) -> str:
         """Convert country code (e.g. 'UA') to flag emoji."""
         return ''.join(chr(0x1F1E6 + ord(c) - ord('A')) for c in country_code.upper())
 
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _format_location_lines(state: str, country: str, timezone: str) -> str:
+        """Format the region, country and timezone lines, memoized per location."""
+        lines = []
+        if state:
+            lines.append(f"\U0001F5FA <i>Регион:</i> <b>{state}</b>\n")
+        if country:
+            flag = WeatherFormatter._country_flag(country)
+            lines.append(f"{flag} <i>Код страны:</i> <b>{country}</b>\n")
+        lines.append(f"\U0001F30D <i>Часовой пояс:</i> <b>{timezone}</b>\n")
+        return ''.join(lines)
+
     @classmethod
     def _format_location_header(cls, username: str, data: dict, trailing_newline: bool = True) -> str:
         """Format the common location header for weather messages."""
-        lines = [f"{username}, в <b>{data['location_name']}</b>\n"]
-        if data.get('state'):
-            lines.append(f"\U0001F5FA <i>Регион:</i> <b>{data['state']}</b>")
-        if data.get('country'):
-            flag = cls._country_flag(data['country'])
-            lines.append(f"{flag} <i>Код страны:</i> <b>{data['country']}</b>")
-        lines.append(f"\U0001F30D <i>Часовой пояс:</i> <b>{data['timezone']}</b>")
-        result = '\n'.join(lines) + '\n'
-        if trailing_newline:
-            result += '\n'
-        return result
+        lines = cls._format_location_lines(data.get('state') or '', data.get('country') or '', data['timezone'])
+        header = f"{username}, в <b>{data['location_name']}</b>\n\n{lines}"
+        return header + '\n' if trailing_newline else header
+
+    @staticmethod
+    def _format_stale_notice(data: dict) -> str:
+        """Format a notice with the data age when expired cached data is served.
+
+        The "unavailable" wording is only used when OWM failed (data flagged as degraded).
+        """
+        if not data.get('stale'):
+            return ''
+        minutes = int((time.time() - data['fetched_at']) // 60)
+        if data.get('degraded'):
+            return (
+                "\U000026A0 <i>Сервис погоды недоступен, "
+                f"данные обновлены {minutes} мин. назад.</i>\n\n"
+            )
+        return f"\U0001F552 <i>Данные обновлены {minutes} мин. назад.</i>\n\n"
 
     @classmethod
+    @metrics.timed('format_seconds', kind='current')
     def format_current_weather(cls, username: str, data: dict) -> str:
         """Format current weather data as message."""
-        header = cls._format_location_header(username, data, trailing_newline=False)
         return (
-            f"{header}"
+            f"{cls._format_location_header(username, data, trailing_newline=False)}"
             f"\U0001F4C5 <i>Дата:</i> <b>{data['date']}</b>\n"
             f"\U000023F0 <i>Текущее время:</i> <b>{data['time']}</b>\n"
             f"{data['icon']} <i>Статус:</i> <b>{data['status'].capitalize()}</b>\n"
-            f"\U0001F321 <i>Температура воздуха:</i> <b>{data['temp']} {DEGREE_SIGN}C</b>\n"
+            f"{_TEMP_LABEL}{data['temp']}{_CELSIUS}"
             f"\U0001F4CA <i>Давление:</i> <b>{data['pressure']} мм</b>\n"
             f"\U0001F4A7 <i>Влажность:</i> <b>{data['humidity']} %</b>\n"
             f"\U0001F4A8 <i>Скорость ветра:</i> <b>{data['wind_speed']} м/c</b>\n\n"
+            f"{cls._format_stale_notice(data)}"
         )
 
     @classmethod
+    @metrics.timed('format_seconds', kind='forecast')
     def format_forecast(cls, username: str, data: dict) -> str:
         """Format forecast data as message."""
-        answer = cls._format_location_header(username, data)
+        parts = [cls._format_location_header(username, data)]
         for day in data['forecasts']:
             if day['temp_min'] == day['temp_max']:
-                temp_label = 'Средняя температура воздуха'
-                temp_str = str(day['temp_min'])
+                temp = f"{_TEMP_AVG_LABEL}{day['temp_min']}{_CELSIUS}"
             else:
-                temp_label = 'Температура воздуха'
-                temp_str = f"{day['temp_min']}...{day['temp_max']}"
-
-            answer += (
+                temp = f"{_TEMP_LABEL}{day['temp_min']}...{day['temp_max']}{_CELSIUS}"
+            parts.append(
                 f"\U0001F4C5 <i>Дата:</i> <b>{day['date']}</b>\n"
                 f"{day['icon']} <i>Статус:</i> <b>{day['status'].capitalize()}</b>\n"
-                f"\U0001F321 <i>{temp_label}:</i> <b>{temp_str} {DEGREE_SIGN}C</b>\n"
+                f"{temp}"
                 f"\U0001F4CA <i>Давление:</i> <b>{day['pressure_avg']} мм</b>\n"
                 f"\U0001F4A7 <i>Влажность:</i> <b>{day['humidity_avg']} %</b>\n"
                 f"\U0001F4A8 <i>Скорость ветра:</i> <b>{day['wind_speed_avg']} м/c</b>\n\n"
             )
-        return answer
+        parts.append(cls._format_stale_notice(data))
+        return ''.join(parts)
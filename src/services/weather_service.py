@@ -1,205 +1,459 @@
 """Weather service for fetching weather data from OpenWeatherMap API."""
-import datetime
 import logging
-import re
-from collections import Counter, defaultdict
-from typing import Optional
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Optional
 
 import pytz
+from pyowm.commons.exceptions import NotFoundError
 from pyowm.owm import OWM
 from pyowm.utils.config import get_default_config
-from pyowm.weatherapi30.forecaster import Forecaster
-from pyowm.weatherapi30.observation import Observation
-from timezonefinder import TimezoneFinder
+from pyowm.weatherapi30.uris import OBSERVATION_URI, THREE_HOURS_FORECAST_URI
 
-from config import FORECAST_INTERVAL, LOCALE
-from services.weather_formatter import WeatherFormatter
-from utils.bot_helpers import format_localized_weekday
+from config import (
+    COORD_CACHE_PRECISION,
+    FORECAST_INTERVAL,
+    GEO_CACHE_PRECISION,
+    HTTP_POOL_SIZE,
+    LOCALE,
+    OWM_CONNECT_TIMEOUT,
+    OWM_READ_TIMEOUT,
+    OWM_RAW_JSON,
+    UPSTREAM_DEADLINE,
+    UPSTREAM_WORKERS,
+)
+from services.base import BaseWeatherService
+from services.cache import TTLCache, location_key
+from services.exceptions import WeatherServiceUnavailable
+from services.gazetteer import City, Gazetteer
+from services.owm_parser import CurrentRecord, ForecastRecord, build_current, build_forecast, icon_to_emoji
+from services.singleflight import SingleFlight
+from utils.http_pool import connection_stats, create_session
+from utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
-# Weather icon code → emoji mapping
-_ICON_MAP: dict[str, str] = {
-    '01d': '\U00002600', '01n': '\U0001F311', '02': '\U000026C5',
-    '03': '\U00002601', '04': '\U00002601', '09': '\U00002614',
-    '10': '\U00002614', '11': '\U000026A1', '13': '\U00002744',
-    '50': '\U0001F32B',
-}
 
-# Pressure conversion factor: hPa → mmHg
-_HPA_TO_MMHG = 0.75
-
-
-class WeatherService:
+class WeatherService(BaseWeatherService):
     """Service for weather data operations using OpenWeatherMap API."""
 
-    def __init__(self, api_key: str) -> None:
-        """Initialize weather service with API key."""
+    def __init__(
+        self,
+        api_key: str,
+        current_cache: Optional[TTLCache] = None,
+        forecast_cache: Optional[TTLCache] = None,
+        geo_cache: Optional[TTLCache] = None,
+        raw_json: bool = OWM_RAW_JSON,
+        gazetteer: Optional[Gazetteer] = None,
+    ) -> None:
+        """Initialize weather service with API key, optional result caches, parsing mode and city index.
+
+        With raw_json, OWM responses are parsed straight into compact records
+        instead of building pyowm objects. Names found in the gazetteer are
+        fetched by coordinates, with country, state and timezone taken from it.
+        All OWM endpoints share one keep-alive connection pool.
+        """
         config = get_default_config()
         config['language'] = LOCALE
+        config['connection']['timeout_secs'] = (OWM_CONNECT_TIMEOUT, OWM_READ_TIMEOUT)
         self.owm = OWM(api_key, config)
         self.mgr = self.owm.weather_manager()
         self.geo_mgr = self.owm.geocoding_manager()
-        self.tz_finder = TimezoneFinder()
-        self.formatter = WeatherFormatter()
+        self.session = create_session(HTTP_POOL_SIZE, config['connection']['max_retries'])
+        self.mgr.http_client.http = self.session
+        self.geo_mgr.http_client.http = self.session
+        super().__init__(current_cache, forecast_cache, geo_cache, gazetteer=gazetteer)
+        self.raw_json = raw_json
+        self.flight = SingleFlight()
+        self._refresh_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=UPSTREAM_WORKERS, thread_name_prefix='owm')
+        # Refreshes wait on fetch and geo tasks of the pool above, so they need workers of their own
+        self._refresh_executor = ThreadPoolExecutor(max_workers=UPSTREAM_WORKERS, thread_name_prefix='owm-refresh')
 
     @staticmethod
     def icon_handler(icon: str) -> str:
         """Convert weather icon code to emoji."""
-        if '01' not in icon:
-            icon = re.sub(r'\D', '', icon)
-        return _ICON_MAP.get(icon, '')
+        return icon_to_emoji(icon)
 
     def _get_geo_info(self, lat: float, lon: float) -> dict[str, str]:
-        """Get country code and state via reverse geocoding API."""
+        """Get country code and state via reverse geocoding API.
+
+        Successful lookups are cached per grid cell, since country and state
+        practically never change for a location.
+        """
+        key = location_key(lat=lat, lon=lon, precision=GEO_CACHE_PRECISION)
+        cached = self.geo_cache.get(key)
+        if cached:
+            return cached
+
         try:
-            _, json_data = self.geo_mgr.http_client.get_json(
-                'reverse', params={'lat': lat, 'lon': lon, 'limit': 1}
-            )
+            with metrics.timer('owm_request_seconds', endpoint='geo'):
+                _, json_data = self.flight.do(
+                    ('geo', key),
+                    self.geo_mgr.http_client.get_json,
+                    'reverse', params={'lat': lat, 'lon': lon, 'limit': 1},
+                )
+            geo_info = {'country': '', 'state': ''}
             if json_data:
-                return {
+                geo_info = {
                     'country': json_data[0].get('country', ''),
                     'state': json_data[0].get('state', ''),
                 }
+            self.geo_cache.set(key, geo_info)
+            return geo_info
         except Exception as e:
+            metrics.inc('owm_errors_total', endpoint='geo')
             logger.error(f'Error fetching geo info: {e}')
         return {'country': '', 'state': ''}
 
+    @metrics.timed('stage_seconds', stage='timezone')
     def _resolve_timezone(self, lat: float, lon: float) -> tuple[pytz.BaseTzInfo, str]:
         """Resolve timezone for given coordinates."""
-        tz_name = self.tz_finder.timezone_at(lng=lon, lat=lat)
-        if tz_name:
-            return pytz.timezone(tz_name), tz_name
-        return pytz.utc, 'UTC'
+        return self.timezones.resolve(lat, lon)
 
-    def _get_observation(
+    def _fetch_with_geo(
+        self,
+        fetch: Callable[..., Any],
+        city: Optional[str],
+        lat: Optional[float],
+        lon: Optional[float],
+        deadline: float,
+        place: Optional[City] = None,
+    ) -> tuple[Any, Optional[Future]]:
+        """Run an upstream fetch, overlapping the reverse-geocode when coordinates are known.
+
+        Returns the fetch result and the pending geo info future, if one was started.
+        No reverse-geocode is needed for a gazetteer place.
+        """
+        if lat is None or lon is None or place is not None:
+            return fetch(city, lat, lon), None
+        geo_future = self._executor.submit(self._get_geo_info, lat, lon)
+        fetch_future = self._executor.submit(fetch, city, lat, lon)
+        return fetch_future.result(timeout=self._remaining(deadline)), geo_future
+
+    @staticmethod
+    def _remaining(deadline: float) -> float:
+        """Return seconds left until the monotonic deadline, never negative."""
+        return max(0.0, deadline - time.monotonic())
+
+    def _join_geo_info(self, geo_future: Future, deadline: float) -> dict[str, str]:
+        """Wait for geo info until the shared deadline, falling back to empty values."""
+        try:
+            return geo_future.result(timeout=self._remaining(deadline))
+        except FutureTimeoutError:
+            logger.error('Timed out waiting for geo info')
+            return {'country': '', 'state': ''}
+
+    def _location_context(
+        self,
+        location: Any,
+        place: Optional[City],
+        geo_future: Optional[Future],
+        deadline: float,
+    ) -> tuple[pytz.BaseTzInfo, str, dict[str, str]]:
+        """Resolve timezone and geo info for a fetched record, from the gazetteer place when known."""
+        if place is not None:
+            return pytz.timezone(place.timezone), place.timezone, place.geo_info()
+        if geo_future is None:
+            geo_future = self._executor.submit(self._get_geo_info, location.lat, location.lon)
+        timezone, tz_name = self._resolve_timezone(location.lat, location.lon)
+        return timezone, tz_name, self._join_geo_info(geo_future, deadline)
+
+    @staticmethod
+    def _location_params(city: Optional[str], lat: Optional[float], lon: Optional[float]) -> dict[str, Any]:
+        """Build OWM query params for coordinates or a city name."""
+        if lat is not None and lon is not None:
+            return {'lat': lat, 'lon': lon}
+        return {'q': city}
+
+    @metrics.timed('owm_request_seconds', endpoint='weather')
+    def _fetch_current_record(
+        self,
+        city: Optional[str],
+        lat: Optional[float],
+        lon: Optional[float],
+    ) -> Optional[CurrentRecord]:
+        """Fetch current weather as a record, from raw JSON or through the pyowm object model."""
+        if self.raw_json:
+            _, payload = self.mgr.http_client.get_json(OBSERVATION_URI, params=self._location_params(city, lat, lon))
+            return CurrentRecord.from_json(payload)
+        if lat is not None and lon is not None:
+            observation = self.mgr.weather_at_coords(lat, lon)
+        else:
+            observation = self.mgr.weather_at_place(city)
+        return CurrentRecord.from_observation(observation) if observation else None
+
+    @metrics.timed('owm_request_seconds', endpoint='forecast')
+    def _fetch_forecast_record(
+        self,
+        city: Optional[str],
+        lat: Optional[float],
+        lon: Optional[float],
+    ) -> Optional[ForecastRecord]:
+        """Fetch the 3h forecast as a record, from raw JSON or through the pyowm object model."""
+        if self.raw_json:
+            _, payload = self.mgr.http_client.get_json(
+                THREE_HOURS_FORECAST_URI, params=self._location_params(city, lat, lon),
+            )
+            return ForecastRecord.from_json(payload)
+        if lat is not None and lon is not None:
+            forecaster = self.mgr.forecast_at_coords(lat, lon, FORECAST_INTERVAL)
+        else:
+            forecaster = self.mgr.forecast_at_place(city, FORECAST_INTERVAL)
+        return ForecastRecord.from_forecaster(forecaster) if forecaster else None
+
+    def _get_current_record(
         self,
         city: Optional[str] = None,
         lat: Optional[float] = None,
         lon: Optional[float] = None,
-    ) -> Optional[Observation]:
-        """Get weather observation by city or coordinates."""
-        if lat is not None and lon is not None:
-            return self.mgr.weather_at_coords(lat, lon)
-        if city:
-            return self.mgr.weather_at_place(city)
-        return None
+    ) -> Optional[CurrentRecord]:
+        """Get current weather by city or coordinates, sharing in-flight calls per location."""
+        key = location_key(city, lat, lon, COORD_CACHE_PRECISION)
+        if not key:
+            return None
+        return self.flight.do(('observation', key), self._fetch_current_record, city, lat, lon)
 
-    def _get_forecaster(
+    def _get_forecast_record(
         self,
         city: Optional[str] = None,
         lat: Optional[float] = None,
         lon: Optional[float] = None,
-    ) -> Optional[Forecaster]:
-        """Get forecast by city or coordinates."""
-        if lat is not None and lon is not None:
-            return self.mgr.forecast_at_coords(lat, lon, FORECAST_INTERVAL)
-        if city:
-            return self.mgr.forecast_at_place(city, FORECAST_INTERVAL)
-        return None
+    ) -> Optional[ForecastRecord]:
+        """Get forecast by city or coordinates, sharing in-flight calls per location."""
+        key = location_key(city, lat, lon, COORD_CACHE_PRECISION)
+        if not key:
+            return None
+        return self.flight.do(('forecast', key), self._fetch_forecast_record, city, lat, lon)
 
+    def _call_upstream(self, load: Callable[..., Optional[dict]], *args) -> Optional[dict]:
+        """Run an upstream load through the circuit breaker.
+
+        Returns the load result (None means the location was not found) and
+        raises WeatherServiceUnavailable if the circuit is open or the call fails.
+        Only upstream errors count as breaker failures; running out of the
+        local deadline while waiting for pool tasks does not.
+        """
+        self._check_breaker()
+        endpoint = load.__name__.removeprefix('_load_')
+        try:
+            result = load(*args)
+        except FutureTimeoutError as e:
+            raise self._upstream_timed_out(endpoint) from e
+        except Exception as e:
+            raise self._upstream_failed(endpoint, e) from e
+        self.breaker.record_success()
+        return result
+
+    def _load_found(self, load: Callable[..., Optional[dict]], key: tuple, *args) -> Optional[dict]:
+        """Run an upstream load unless OWM recently reported the location as not found, and remember misses."""
+        if self.not_found_cache.get(key):
+            return None
+        data = self._call_upstream(load, key, *args)
+        if data is None:
+            self.not_found_cache.set(key, True)
+        return data
+
+    def _refresh_in_background(self, load: Callable[..., Optional[dict]], key: tuple, *args) -> None:
+        """Reload a stale entry on the refresh executor unless a refresh for it is already running."""
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh() -> None:
+            try:
+                self._call_upstream(load, key, *args)
+            except WeatherServiceUnavailable:
+                pass
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(key)
+
+        self._refresh_executor.submit(refresh)
+
+    def _load_current(
+        self,
+        key: tuple,
+        city: Optional[str],
+        lat: Optional[float],
+        lon: Optional[float],
+        place: Optional[City] = None,
+    ) -> Optional[dict]:
+        """Fetch current weather upstream and cache it; None if the location is not found."""
+        deadline = time.monotonic() + UPSTREAM_DEADLINE
+        try:
+            record, geo_future = self._fetch_with_geo(self._get_current_record, city, lat, lon, deadline, place)
+        except NotFoundError:
+            return None
+        if not record:
+            return None
+
+        timezone, tz_name, geo_info = self._location_context(record, place, geo_future, deadline)
+        with metrics.timer('stage_seconds', stage='build'):
+            data = self._localized_name(build_current(record, timezone, tz_name, geo_info), place)
+        return self._store(self.current_cache, key, data, record.lat, record.lon)
+
+    def _load_forecast(
+        self,
+        key: tuple,
+        city: Optional[str],
+        lat: Optional[float],
+        lon: Optional[float],
+        place: Optional[City] = None,
+    ) -> Optional[dict]:
+        """Fetch the forecast upstream and cache it; None if the location is not found."""
+        deadline = time.monotonic() + UPSTREAM_DEADLINE
+        try:
+            record, geo_future = self._fetch_with_geo(self._get_forecast_record, city, lat, lon, deadline, place)
+        except NotFoundError:
+            return None
+        if not record:
+            return None
+
+        timezone, tz_name, geo_info = self._location_context(record, place, geo_future, deadline)
+        with metrics.timer('stage_seconds', stage='build'):
+            data = self._localized_name(build_forecast(record, timezone, tz_name, geo_info), place)
+        return self._store(self.forecast_cache, key, data, record.lat, record.lon)
+
+    @metrics.timed('weather_lookup_seconds', kind='current')
     def get_current_weather(
         self,
         city: Optional[str] = None,
         lat: Optional[float] = None,
         lon: Optional[float] = None,
     ) -> Optional[dict]:
-        """Fetch current weather data for a city or coordinates."""
-        try:
-            observation = self._get_observation(city, lat, lon)
-            if not observation:
-                return None
-
-            location = observation.location
-            weather = observation.weather
-            timezone, tz_name = self._resolve_timezone(location.lat, location.lon)
-
-            utc_now = datetime.datetime.now(tz=pytz.utc)
-            local_time = utc_now.astimezone(timezone)
-            formatted_date = format_localized_weekday(local_time.date(), LOCALE)
-
-            geo_info = self._get_geo_info(location.lat, location.lon)
-
-            return {
-                'location_name': location.name,
-                'country': geo_info['country'],
-                'state': geo_info['state'],
-                'icon': self.icon_handler(weather.weather_icon_name),
-                'status': weather.detailed_status,
-                'temp': round(weather.temperature('celsius')['temp']),
-                'pressure': round(weather.barometric_pressure()['press'] * _HPA_TO_MMHG),
-                'humidity': weather.humidity,
-                'wind_speed': round(weather.wind()['speed']),
-                'timezone': tz_name,
-                'date': formatted_date.capitalize(),
-                'time': local_time.strftime('%H:%M:%S'),
-            }
-        except Exception as e:
-            logger.error(f'Error fetching current weather: {e}')
+        """Fetch current weather data for a city or coordinates.
+
+        Results are cached per location; on a cache hit only the local date and
+        time are recomputed. Entries expired for less than one more TTL are
+        served as stale while they are refreshed in the background; older ones
+        are served, flagged as degraded, only if OWM fails or the circuit is
+        open. Returns None if the location is not found and raises
+        WeatherServiceUnavailable if OWM fails with nothing cached.
+        """
+        key, city, lat, lon, place = self._locate(city, lat, lon)
+        if not key:
             return None
+        data, refresh = self._serve_cached(self.current_cache, key, local_time=True)
+        if refresh:
+            self._refresh_in_background(self._load_current, key, city, lat, lon, place)
+        if data:
+            return data
+
+        try:
+            return self._load_found(self._load_current, key, city, lat, lon, place)
+        except WeatherServiceUnavailable:
+            data = self._serve_degraded(self.current_cache, key, local_time=True)
+            if not data:
+                raise
+            return data
 
+    @metrics.timed('weather_lookup_seconds', kind='forecast')
     def get_forecast(
         self,
         city: Optional[str] = None,
         lat: Optional[float] = None,
         lon: Optional[float] = None,
     ) -> Optional[dict]:
-        """Fetch 5-day forecast data for a city or coordinates."""
+        """Fetch 5-day forecast data for a city or coordinates.
+
+        Same caching, stale-while-revalidate and error contract as get_current_weather.
+        """
+        key, city, lat, lon, place = self._locate(city, lat, lon)
+        if not key:
+            return None
+        data, refresh = self._serve_cached(self.forecast_cache, key)
+        if refresh:
+            self._refresh_in_background(self._load_forecast, key, city, lat, lon, place)
+        if data:
+            return data
+
+        try:
+            return self._load_found(self._load_forecast, key, city, lat, lon, place)
+        except WeatherServiceUnavailable:
+            data = self._serve_degraded(self.forecast_cache, key)
+            if not data:
+                raise
+            return data
+
+    def _load_bundle(
+        self,
+        key: tuple,
+        city: Optional[str],
+        lat: Optional[float],
+        lon: Optional[float],
+        current: Optional[dict],
+        forecast: Optional[dict],
+        place: Optional[City] = None,
+    ) -> Optional[dict]:
+        """Fetch the missing bundle parts in parallel and cache them; None if not found."""
+        deadline = time.monotonic() + UPSTREAM_DEADLINE
+        geo_future = None
+        if lat is not None and lon is not None and place is None:
+            geo_future = self._executor.submit(self._get_geo_info, lat, lon)
+        current_future = None if current else self._executor.submit(self._get_current_record, city, lat, lon)
+        forecast_future = None if forecast else self._executor.submit(self._get_forecast_record, city, lat, lon)
+
         try:
-            forecaster = self._get_forecaster(city, lat, lon)
-            if not forecaster:
-                return None
-
-            fc = forecaster.forecast
-            location = fc.location
-            timezone, tz_name = self._resolve_timezone(location.lat, location.lon)
-            geo_info = self._get_geo_info(location.lat, location.lon)
-
-            daily_data: defaultdict[datetime.date, list[dict]] = defaultdict(list)
-            for weather_obj in fc:
-                dt_local = datetime.datetime.fromtimestamp(
-                    weather_obj.reference_time(), tz=timezone,
-                )
-                daily_data[dt_local.date()].append({
-                    'temp': weather_obj.temperature('celsius')['temp'],
-                    'humidity': weather_obj.humidity,
-                    'pressure': weather_obj.barometric_pressure()['press'] * _HPA_TO_MMHG,
-                    'wind_speed': weather_obj.wind()['speed'],
-                    'status': weather_obj.detailed_status,
-                    'icon': self.icon_handler(weather_obj.weather_icon_name),
-                })
-
-            forecasts = []
-            for day, entries in sorted(daily_data.items()):
-                formatted_date = format_localized_weekday(day, LOCALE)
-                temps = [e['temp'] for e in entries]
-                n = len(entries)
-                forecasts.append({
-                    'date': formatted_date.capitalize(),
-                    'temp_min': round(min(temps)),
-                    'temp_max': round(max(temps)),
-                    'humidity_avg': round(sum(e['humidity'] for e in entries) / n),
-                    'pressure_avg': round(sum(e['pressure'] for e in entries) / n),
-                    'wind_speed_avg': round(sum(e['wind_speed'] for e in entries) / n),
-                    'status': Counter(e['status'] for e in entries).most_common(1)[0][0],
-                    'icon': Counter(e['icon'] for e in entries).most_common(1)[0][0],
-                })
-
-            return {
-                'location_name': location.name,
-                'country': geo_info['country'],
-                'state': geo_info['state'],
-                'timezone': tz_name,
-                'forecasts': forecasts,
-            }
-        except Exception as e:
-            logger.error(f'Error fetching forecast: {e}')
+            current_record = current_future.result(timeout=self._remaining(deadline)) if current_future else None
+            forecast_record = forecast_future.result(timeout=self._remaining(deadline)) if forecast_future else None
+        except NotFoundError:
+            return None
+        if (current_future and not current_record) or (forecast_future and not forecast_record):
+            return None
+
+        timezone, tz_name, geo_info = self._location_context(
+            current_record or forecast_record, place, geo_future, deadline,
+        )
+        if current_record:
+            current = self._localized_name(build_current(current_record, timezone, tz_name, geo_info), place)
+            self._store(self.current_cache, key, current, current_record.lat, current_record.lon)
+        if forecast_record:
+            forecast = self._localized_name(build_forecast(forecast_record, timezone, tz_name, geo_info), place)
+            self._store(self.forecast_cache, key, forecast, forecast_record.lat, forecast_record.lon)
+        return {'current': current, 'forecast': forecast}
+
+    @metrics.timed('weather_lookup_seconds', kind='bundle')
+    def get_bundle(
+        self,
+        city: Optional[str] = None,
+        lat: Optional[float] = None,
+        lon: Optional[float] = None,
+    ) -> Optional[dict]:
+        """Fetch current weather and 5-day forecast together for a city or coordinates.
+
+        Missing parts are fetched in parallel, timezone and geo info are resolved
+        once, and both results are stored in the per-kind caches so a follow-up
+        forecast request for the same location needs no upstream calls.
+        Returns a dict with 'current' and 'forecast' keys. If OWM fails, stale
+        cached parts are served when both are available.
+        """
+        key, city, lat, lon, place = self._locate(city, lat, lon)
+        if not key:
             return None
+        current = self.current_cache.get(key)
+        forecast = self.forecast_cache.get(key)
+        if current:
+            current = self._with_local_time(current)
+        if current and forecast:
+            return {'current': current, 'forecast': forecast}
+
+        try:
+            return self._load_found(self._load_bundle, key, city, lat, lon, current, forecast, place)
+        except WeatherServiceUnavailable:
+            current = current or self._serve_degraded(self.current_cache, key, local_time=True)
+            forecast = forecast or self._serve_degraded(self.forecast_cache, key)
+            if not (current and forecast):
+                raise
+            return {'current': current, 'forecast': forecast}
 
-    def format_current_weather(self, username: str, data: dict) -> str:
-        """Format current weather data as message. Delegates to WeatherFormatter."""
-        return self.formatter.format_current_weather(username, data)
+    def connection_stats(self) -> dict[str, dict[str, int]]:
+        """Return opened and reused OWM connections per host."""
+        return connection_stats(self.session)
 
-    def format_forecast(self, username: str, data: dict) -> str:
-        """Format forecast data as message. Delegates to WeatherFormatter."""
-        return self.formatter.format_forecast(username, data)
+    def singleflight_stats(self) -> dict[str, int]:
+        """Return how many upstream calls were made and how many requests were coalesced into them."""
+        return {'calls': self.flight.calls, 'coalesced': self.flight.coalesced}
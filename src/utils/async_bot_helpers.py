@@ -0,0 +1,73 @@
+"""Async counterparts of the bot send helpers for telebot's AsyncTeleBot."""
+from typing import Any, Optional
+
+import aiohttp
+from telebot import asyncio_helper
+from telebot.async_telebot import AsyncTeleBot
+
+from utils.bot_helpers import _filter_kwargs
+from utils.retry import ErrorKind, async_call_with_retry
+
+
+def classify_async_error(error: Exception) -> tuple[ErrorKind, Optional[float]]:
+    """Classify an AsyncTeleBot error like utils.retry.classify_error does for the sync bot."""
+    if isinstance(error, asyncio_helper.ApiTelegramException):
+        if error.error_code == 429:
+            parameters = (error.result_json or {}).get('parameters') or {}
+            return ErrorKind.RATE_LIMITED, parameters.get('retry_after')
+        if error.error_code >= 500:
+            return ErrorKind.SERVER, None
+        return ErrorKind.FATAL, None
+    if isinstance(error, (aiohttp.ClientConnectionError, TimeoutError)):
+        return ErrorKind.NETWORK, None
+    return ErrorKind.UNKNOWN, None
+
+
+async def send_action(bot: AsyncTeleBot, chat_id: int, action: str) -> None:
+    """Send chat action with retry."""
+    await async_call_with_retry(bot.send_chat_action, chat_id, action, classify=classify_async_error)
+
+
+async def send_message(
+    bot: AsyncTeleBot,
+    chat_id: int,
+    text: str,
+    reply_markup: Optional[Any] = None,
+    parse_mode: Optional[str] = None,
+) -> None:
+    """Send message with retry."""
+    await async_call_with_retry(
+        bot.send_message, chat_id, text,
+        classify=classify_async_error,
+        **_filter_kwargs(reply_markup=reply_markup, parse_mode=parse_mode),
+    )
+
+
+async def reply_to_message(
+    bot: AsyncTeleBot,
+    message: Any,
+    text: str,
+    reply_markup: Optional[Any] = None,
+    parse_mode: Optional[str] = None,
+) -> None:
+    """Reply to message with retry."""
+    await async_call_with_retry(
+        bot.reply_to, message, text,
+        classify=classify_async_error,
+        **_filter_kwargs(reply_markup=reply_markup, parse_mode=parse_mode),
+    )
+
+
+async def send_sticker(
+    bot: AsyncTeleBot,
+    chat_id: int,
+    sticker: str,
+    reply_to_message_id: Optional[int] = None,
+    reply_markup: Optional[Any] = None,
+) -> None:
+    """Send sticker with retry."""
+    await async_call_with_retry(
+        bot.send_sticker, chat_id, sticker,
+        classify=classify_async_error,
+        **_filter_kwargs(reply_to_message_id=reply_to_message_id, reply_markup=reply_markup),
+    )
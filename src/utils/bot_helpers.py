@@ -1,29 +1,24 @@
 """Utility functions for bot operations."""
 import logging
-import time
 from datetime import date as date_type
+from functools import lru_cache
 from typing import Any, Callable, Optional, Union
 
-import emoji
 import telebot
-from babel.dates import format_date
+
+from utils.metrics import metrics
+from utils.retry import DEFAULT_POLICY, RetryPolicy, call_with_retry
+from utils.webhook_reply import claim_webhook_reply
 
 logger = logging.getLogger(__name__)
 
 MessageOrCallback = Union[telebot.types.Message, telebot.types.CallbackQuery]
 
 
-def send_with_retry(func: Callable, *args, max_retries: int = 5, delay: int = 5, **kwargs) -> Any:
-    """Generic retry wrapper for bot API calls."""
-    for attempt in range(max_retries):
-        try:
-            return func(*args, **kwargs)
-        except Exception as e:
-            logger.error(f"{e} - Retry {attempt + 1}/{max_retries} after {delay}s")
-            if attempt < max_retries - 1:
-                time.sleep(delay)
-            else:
-                raise
+def send_with_retry(func: Callable, *args, policy: RetryPolicy = DEFAULT_POLICY, **kwargs) -> Any:
+    """Generic retry wrapper for bot API calls (backoff, jitter, deadline, fail-fast on 4xx)."""
+    with metrics.timer('telegram_call_seconds', method=getattr(func, '__name__', 'call')):
+        return call_with_retry(func, *args, policy=policy, **kwargs)
 
 
 def _filter_kwargs(**kwargs) -> dict[str, Any]:
@@ -42,8 +37,13 @@ def send_message(
     text: str,
     reply_markup: Optional[Any] = None,
     parse_mode: Optional[str] = None,
+    webhook_reply: bool = False,
 ) -> None:
-    """Send message with retry."""
+    """Send message with retry, or return it in the webhook response if webhook_reply is allowed."""
+    if webhook_reply and claim_webhook_reply(
+        'sendMessage', chat_id=chat_id, text=text, reply_markup=reply_markup, parse_mode=parse_mode,
+    ):
+        return
     send_with_retry(bot.send_message, chat_id, text, **_filter_kwargs(reply_markup=reply_markup, parse_mode=parse_mode))
 
 
@@ -53,8 +53,18 @@ def reply_to_message(
     text: str,
     reply_markup: Optional[Any] = None,
     parse_mode: Optional[str] = None,
+    webhook_reply: bool = False,
 ) -> None:
-    """Reply to message with retry."""
+    """Reply to message with retry, or return it in the webhook response if webhook_reply is allowed."""
+    if webhook_reply and claim_webhook_reply(
+        'sendMessage',
+        chat_id=message.chat.id,
+        text=text,
+        reply_to_message_id=message.message_id,
+        reply_markup=reply_markup,
+        parse_mode=parse_mode,
+    ):
+        return
     send_with_retry(bot.reply_to, message, text, **_filter_kwargs(reply_markup=reply_markup, parse_mode=parse_mode))
 
 
@@ -87,9 +97,29 @@ def create_inline_keyboard(*buttons: tuple[str, str], row_width: int = 2) -> tel
     return keyboard
 
 
+def create_forecast_keyboard(weather_data: dict) -> telebot.types.InlineKeyboardMarkup:
+    """Create a forecast button pointing at the coordinates of a weather reply, when known.
+
+    Its callback data is 'forecast:<lat>:<lon>', so the forecast can be served
+    without asking for the location again.
+    """
+    if weather_data.get('lat') is None or weather_data.get('lon') is None:
+        return create_inline_keyboard(("forecast", "forecast"))
+    return create_inline_keyboard(("forecast", f"forecast:{weather_data['lat']}:{weather_data['lon']}"))
+
+
+def parse_forecast_data(data: str) -> Optional[tuple[float, float]]:
+    """Return the coordinates of 'forecast:<lat>:<lon>' callback data, or None."""
+    try:
+        _, lat, lon = data.split(':')
+        return float(lat), float(lon)
+    except ValueError:
+        return None
+
+
 def create_location_keyboard() -> telebot.types.ReplyKeyboardMarkup:
-    """Create keyboard with location request button."""
-    keyboard = telebot.types.ReplyKeyboardMarkup(row_width=1, resize_keyboard=True)
+    """Create keyboard with location request button, hidden again once used."""
+    keyboard = telebot.types.ReplyKeyboardMarkup(row_width=1, resize_keyboard=True, one_time_keyboard=True)
     keyboard.add(telebot.types.KeyboardButton(text="\U0001F310 location", request_location=True))
     return keyboard
 
@@ -99,14 +129,15 @@ def remove_keyboard() -> telebot.types.ReplyKeyboardRemove:
     return telebot.types.ReplyKeyboardRemove(selective=False)
 
 
-def is_emoji(text: str) -> bool:
-    """Check if text contains any emoji."""
-    if not text:
-        return False
-    return bool(emoji.emoji_list(text))
+@lru_cache(maxsize=1024)
+def format_localized_weekday(day: date_type, locale: str) -> str:
+    """Return a localized full weekday and date string, mapping 'ua' to 'uk' for babel.
 
+    Results are memoized per (day, locale), since babel formatting is costly
+    and only a handful of dates are live at any time. babel is imported on
+    first use to keep it off the cold-start path.
+    """
+    from babel.dates import format_date
 
-def format_localized_weekday(day: date_type, locale: str) -> str:
-    """Return a localized full weekday and date string, mapping 'ua' to 'uk' for babel."""
     babel_locale = 'uk' if locale.lower() == 'ua' else locale.lower()
     return format_date(day, 'EEEE, d MMMM y', locale=babel_locale)
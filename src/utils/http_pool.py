@@ -0,0 +1,56 @@
+"""Shared keep-alive HTTP sessions with bounded connection pools and reuse counters."""
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from telebot import apihelper
+from urllib3.util.retry import Retry
+
+# Idempotent methods retried by the OWM session, matching pyowm's own adapter
+_RETRY_METHODS = ['HEAD', 'GET', 'PUT', 'DELETE', 'OPTIONS', 'TRACE']
+_RETRY_STATUSES = [429, 500, 502, 503, 504]
+
+
+def create_session(pool_size: int, max_retries: Optional[int] = None) -> requests.Session:
+    """Create a thread-safe keep-alive session keeping up to pool_size connections per host.
+
+    With max_retries, idempotent requests are retried on connection errors and
+    429/5xx responses, like pyowm does when its own retries are configured.
+    """
+    retries = Retry(
+        total=max_retries, status_forcelist=_RETRY_STATUSES, allowed_methods=_RETRY_METHODS,
+    ) if max_retries else 0
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def install_telebot_session(session: requests.Session, connect_timeout: float, read_timeout: float) -> None:
+    """Route all synchronous telebot API calls through session with the given timeouts."""
+    apihelper.session = session
+    apihelper.CONNECT_TIMEOUT = connect_timeout
+    apihelper.READ_TIMEOUT = read_timeout
+
+
+def connection_stats(session: requests.Session) -> dict[str, dict[str, int]]:
+    """Return opened connections, requests and reused connections per host of a session.
+
+    Counters live in the urllib3 pools, so a host whose pool was evicted (more
+    hosts than pool slots) starts again from zero.
+    """
+    stats: dict[str, dict[str, int]] = {}
+    adapters = {id(adapter): adapter for adapter in session.adapters.values()}.values()
+    for adapter in adapters:
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = f'{key.key_scheme}://{key.key_host}:{key.key_port}'
+            entry = stats.setdefault(host, {'connections': 0, 'requests': 0, 'reused': 0})
+            entry['connections'] += pool.num_connections
+            entry['requests'] += pool.num_requests
+            entry['reused'] += max(0, pool.num_requests - pool.num_connections)
+    return stats
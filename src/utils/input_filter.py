@@ -0,0 +1,80 @@
+"""Local classification of free-text input before it is sent to OWM as a city name."""
+import re
+import unicodedata
+from bisect import bisect_right
+from enum import Enum
+
+from config import CITY_NAME_MAX_LENGTH
+
+# Codepoint ranges (inclusive) that contain emoji or emoji components:
+# symbols, pictographs, dingbats, regional indicators, ZWJ, keycap and variation selectors
+_EMOJI_RANGES = (
+    (0x00A9, 0x00A9), (0x00AE, 0x00AE), (0x200D, 0x200D), (0x203C, 0x203C), (0x2049, 0x2049),
+    (0x20E3, 0x20E3), (0x2122, 0x2122), (0x2139, 0x2139), (0x2194, 0x2199), (0x21A9, 0x21AA),
+    (0x231A, 0x231B), (0x2328, 0x2328), (0x23CF, 0x23CF), (0x23E9, 0x23F3), (0x23F8, 0x23FA),
+    (0x24C2, 0x24C2), (0x25AA, 0x25AB), (0x25B6, 0x25B6), (0x25C0, 0x25C0), (0x25FB, 0x25FE),
+    (0x2600, 0x27BF), (0x2934, 0x2935), (0x2B05, 0x2B07), (0x2B1B, 0x2B1C), (0x2B50, 0x2B50),
+    (0x2B55, 0x2B55), (0x3030, 0x3030), (0x303D, 0x303D), (0x3297, 0x3297), (0x3299, 0x3299),
+    (0xFE0E, 0xFE0F), (0x1F000, 0x1FAFF), (0xE0020, 0xE007F),
+)
+# Flattened range bounds for bisect: an odd insertion point means "inside a range"
+_EMOJI_BOUNDS = tuple(bound for start, end in _EMOJI_RANGES for bound in (start, end + 1))
+
+# Punctuation that appears in real place names ("St. Petersburg", "Ivano-Frankivsk", "L'Aquila", "Paris, FR",
+# "Biel/Bienne"); other Unicode dashes are accepted by category
+_NAME_PUNCTUATION = frozenset(" -'’`.,()/")
+
+_URL_RE = re.compile(r'(?i)\b(?:[a-z][a-z0-9+.-]*://|www\.)|\bt\.me/')
+
+
+class InputKind(Enum):
+    """What a piece of free text is, as far as city lookup is concerned."""
+
+    CITY = 'city'
+    EMPTY = 'empty'
+    EMOJI = 'emoji'
+    COMMAND = 'command'
+    URL = 'url'
+    TOO_LONG = 'too_long'
+    INVALID = 'invalid'
+
+
+def contains_emoji(text: str) -> bool:
+    """Check if text contains any emoji codepoint, without tokenizing it."""
+    if text.isascii():
+        return False
+    for char in text:
+        code = ord(char)
+        if code >= 0xA9 and bisect_right(_EMOJI_BOUNDS, code) % 2:
+            return True
+    return False
+
+
+def _is_name_char(char: str) -> bool:
+    """Check if a character may appear in a place name."""
+    if char.isalnum() or char in _NAME_PUNCTUATION:
+        return True
+    if char.isascii():
+        return False
+    # Combining accents typed as separate codepoints (e.g. decomposed diacritics), and dashes
+    # such as the non-breaking hyphen in "Saint‑Denis" or the en dash in "Ivano–Frankivsk"
+    category = unicodedata.category(char)
+    return category.startswith('M') or category == 'Pd'
+
+
+def classify_text(text: str) -> InputKind:
+    """Classify text as a possible city name or the reason it cannot be one."""
+    text = text.strip() if text else ''
+    if not text:
+        return InputKind.EMPTY
+    if text.startswith('/'):
+        return InputKind.COMMAND
+    if contains_emoji(text):
+        return InputKind.EMOJI
+    if len(text) > CITY_NAME_MAX_LENGTH:
+        return InputKind.TOO_LONG
+    if _URL_RE.search(text):
+        return InputKind.URL
+    if not any(char.isalpha() for char in text) or not all(_is_name_char(char) for char in text):
+        return InputKind.INVALID
+    return InputKind.CITY
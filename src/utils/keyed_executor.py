@@ -0,0 +1,84 @@
+"""Thread pool that keeps tasks sharing a key in submission order."""
+import contextvars
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Hashable
+
+_Task = tuple[Future, contextvars.Context, Callable, tuple, dict]
+
+
+class KeyedExecutor:
+    """Runs tasks concurrently across keys and sequentially within a key.
+
+    Only the head task of each key is handed to the pool; later tasks wait in
+    a per-key queue and the next one is submitted when its predecessor is
+    done. A worker therefore never blocks on another task, and a burst for
+    one key cannot occupy the pool while other keys wait. Tasks run in a copy
+    of the submitting thread's context, so context variables carry over.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = '') -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._queues: dict[Hashable, deque[_Task]] = {}
+        self._idle = threading.Condition(threading.Lock())
+
+    def submit(self, key: Hashable, fn: Callable, *args, **kwargs) -> Future:
+        """Schedule fn(*args, **kwargs) after all earlier tasks submitted with key."""
+        task = (Future(), contextvars.copy_context(), fn, args, kwargs)
+        with self._idle:
+            queue = self._queues.get(key)
+            if queue is not None:
+                queue.append(task)
+                return task[0]
+            self._queues[key] = deque()
+        try:
+            self._start(key, task)
+        except Exception:
+            with self._idle:
+                del self._queues[key]
+                self._idle.notify_all()
+            raise
+        return task[0]
+
+    def _start(self, key: Hashable, task: _Task) -> None:
+        self._executor.submit(self._run, task).add_done_callback(lambda _: self._next(key))
+
+    @staticmethod
+    def _run(task: _Task) -> None:
+        future, context, fn, args, kwargs = task
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = context.run(fn, *args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    def _next(self, key: Hashable) -> None:
+        """Hand the next queued task of key to the pool, or mark the key idle."""
+        with self._idle:
+            queue = self._queues[key]
+            if not queue:
+                del self._queues[key]
+                self._idle.notify_all()
+                return
+            task = queue.popleft()
+        try:
+            self._start(key, task)
+        except RuntimeError as e:
+            # the pool was shut down without waiting: fail this task and everything queued behind it
+            with self._idle:
+                pending = [task, *self._queues.pop(key)]
+                self._idle.notify_all()
+            for future, *_ in pending:
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(e)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the pool, after all queued tasks have run if wait is set."""
+        if wait:
+            with self._idle:
+                self._idle.wait_for(lambda: not self._queues)
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,52 @@
+"""Deferred construction of heavy services until a handler first needs them."""
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class LazyObject:
+    """Proxy that builds its target with factory() on first attribute access.
+
+    Construction happens once, under a lock, so concurrent first requests
+    share one instance. Attributes of the proxy itself (get, loaded) never
+    trigger construction.
+    """
+
+    __slots__ = ('_name', '_factory', '_target', '_lock')
+
+    def __init__(self, name: str, factory: Callable[[], Any]) -> None:
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_target', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the target has been built."""
+        return self._target is not None
+
+    def get(self) -> Any:
+        """Return the target, building it on the first call."""
+        target = self._target
+        if target is None:
+            with self._lock:
+                target = self._target
+                if target is None:
+                    start = time.perf_counter()
+                    target = self._factory()
+                    object.__setattr__(self, '_target', target)
+                    logger.info(f'Lazy init of {self._name}: {(time.perf_counter() - start) * 1000:.1f} ms')
+        return target
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self.get(), name, value)
+
+    def __repr__(self) -> str:
+        state = repr(self._target) if self.loaded else 'not loaded'
+        return f'<LazyObject {self._name}: {state}>'
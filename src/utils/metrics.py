@@ -0,0 +1,271 @@
+"""In-process metrics: counters, latency histograms and Prometheus/JSON export."""
+import bisect
+import functools
+import json
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from config import METRICS_ENABLED
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the latency histogram buckets (the last one catches everything)
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, math.inf,
+)
+QUANTILES = (0.5, 0.95, 0.99)
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def _label_key(labels: dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels: LabelKey, extra: Optional[tuple[str, str]] = None) -> str:
+    pairs = [*labels, extra] if extra else list(labels)
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Histogram:
+    """Fixed-bucket histogram; quantiles are interpolated within buckets like Prometheus does."""
+
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self) -> None:
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-quantile, capped at the largest finite bucket bound."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                upper = LATENCY_BUCKETS[index]
+                lower = LATENCY_BUCKETS[index - 1] if index else 0.0
+                if math.isinf(upper):
+                    return lower
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return LATENCY_BUCKETS[-2]
+
+
+class _Timer:
+    """Context manager recording the elapsed time of its block into a histogram."""
+
+    __slots__ = ('registry', 'name', 'labels', 'start')
+
+    def __init__(self, registry: 'Metrics', name: str, labels: dict[str, Any]) -> None:
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self) -> '_Timer':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+
+class _NullTimer:
+    """Shared no-op timer handed out while metrics are disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> '_NullTimer':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """Thread-safe registry of counters, latency histograms and gauge collectors.
+
+    While disabled, inc/observe return immediately and timers are a shared
+    no-op object, so instrumented code pays one attribute check per call.
+    Gauges are pulled from registered collectors only at export time.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._counters: dict[tuple[str, LabelKey], float] = {}
+        self._histograms: dict[tuple[str, LabelKey], Histogram] = {}
+        self._collectors: dict[str, tuple[Callable[[], dict[str, Any]], str]] = {}
+        self._lock = threading.Lock()
+        self._last_log = time.monotonic()
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Add value to a counter."""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        """Record one duration sample in a latency histogram."""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def timer(self, name: str, **labels: Any) -> Any:
+        """Return a context manager timing its block into the named histogram."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def timed(self, name: str, **labels: Any) -> Callable[[Callable], Callable]:
+        """Decorate a function so every call is timed into the named histogram."""
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start, **labels)
+            return wrapper
+        return decorator
+
+    def register_collector(self, name: str, collect: Callable[[], dict[str, Any]], label: str = 'key') -> None:
+        """Export the numeric dict returned by collect() as gauges prefixed with name.
+
+        Nested dicts become labelled series: {'current': {'hits': 3}} under
+        'weather_cache' with label 'cache' is weather_cache_hits{cache="current"} 3.
+        """
+        self._collectors[name] = (collect, label)
+
+    def _gauges(self) -> list[tuple[str, LabelKey, float]]:
+        """Collect gauge samples, grouped by metric name."""
+        gauges = []
+        for prefix, (collect, label) in self._collectors.items():
+            try:
+                values = collect()
+            except Exception as e:
+                logger.error(f'Error collecting {prefix} metrics: {e}')
+                continue
+            for key, value in values.items():
+                if isinstance(value, dict):
+                    for field, number in value.items():
+                        gauges.append((f'{prefix}_{field}', ((label, str(key)),), float(number)))
+                else:
+                    gauges.append((f'{prefix}_{key}', (), float(value)))
+        return sorted(gauges, key=lambda gauge: gauge[0])
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return counters, histogram summaries (count, sum, p50/p95/p99) and gauges as plain data."""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {
+                key: (h.count, h.sum, [h.quantile(q) for q in QUANTILES]) for key, h in self._histograms.items()
+            }
+        return {
+            'counters': [{'name': name, 'labels': dict(labels), 'value': value}
+                         for (name, labels), value in sorted(counters.items())],
+            'histograms': [
+                {
+                    'name': name, 'labels': dict(labels), 'count': count, 'sum': total,
+                    **{f'p{round(q * 100)}': value for q, value in zip(QUANTILES, quantiles)},
+                }
+                for (name, labels), (count, total, quantiles) in sorted(histograms.items())
+            ],
+            'gauges': [{'name': name, 'labels': dict(labels), 'value': value}
+                       for name, labels, value in self._gauges()],
+        }
+
+    def to_json(self) -> str:
+        """Return the snapshot as one JSON line for structured logs."""
+        return json.dumps(self.snapshot(), ensure_ascii=False, separators=(',', ':'))
+
+    def to_prometheus(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, list(h.counts), h.sum, h.count) for key, h in self._histograms.items()
+            )
+        lines = []
+        typed = set()
+
+        def declare(name: str, kind: str) -> None:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f'# TYPE {name} {kind}')
+
+        for (name, labels), value in counters:
+            declare(name, 'counter')
+            lines.append(f'{name}{_format_labels(labels)} {value:g}')
+        for (name, labels), counts, total, count in histograms:
+            declare(name, 'histogram')
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, counts):
+                cumulative += bucket_count
+                le = '+Inf' if math.isinf(bound) else f'{bound:g}'
+                lines.append(f'{name}_bucket{_format_labels(labels, ("le", le))} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {total:g}')
+            lines.append(f'{name}_count{_format_labels(labels)} {count}')
+        for name, labels, value in self._gauges():
+            declare(name, 'gauge')
+            lines.append(f'{name}{_format_labels(labels)} {value:g}')
+        return '\n'.join(lines) + '\n'
+
+    def log_if_due(self, interval: float) -> None:
+        """Log the snapshot as a JSON line if at least interval seconds passed since the last one."""
+        if not self.enabled or interval <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_log < interval:
+                return
+            self._last_log = now
+        logger.info(f'metrics {self.to_json()}')
+
+    def log_periodically(self, interval: float) -> None:
+        """Log the snapshot every interval seconds from a daemon thread (long-running processes only)."""
+        if not self.enabled or interval <= 0:
+            return
+
+        def loop() -> None:
+            while True:
+                time.sleep(interval)
+                self.log_if_due(interval)
+
+        threading.Thread(target=loop, name='metrics-log', daemon=True).start()
+
+    def reset(self) -> None:
+        """Drop all recorded counters and histograms."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+# Process-wide registry used by the instrumented modules
+metrics = Metrics(METRICS_ENABLED)
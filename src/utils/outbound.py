@@ -0,0 +1,55 @@
+"""Outbound Telegram send dispatcher with per-chat ordering."""
+import logging
+import threading
+from concurrent.futures import Future, wait
+from typing import Callable
+
+import telebot
+
+from utils.bot_helpers import send_with_retry
+from utils.keyed_executor import KeyedExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class OutboundDispatcher:
+    """Sends bot API calls on a worker pool, keeping calls for one chat in order.
+
+    Chat actions are fire-and-forget; other calls return a future so the caller
+    can wait only for the sends the user has to see first. Worker threads share
+    the pooled keep-alive session installed in telebot's apihelper, so
+    connections are reused across calls and threads.
+    """
+
+    def __init__(self, bot: telebot.TeleBot, max_workers: int) -> None:
+        self.bot = bot
+        self._lanes = KeyedExecutor(max_workers, thread_name_prefix='outbound')
+        self._pending: set[Future] = set()
+        self._lock = threading.Lock()
+
+    def _track(self, future: Future) -> Future:
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._untrack)
+        return future
+
+    def _untrack(self, future: Future) -> None:
+        with self._lock:
+            self._pending.discard(future)
+        if not future.cancelled() and future.exception():
+            logger.error(f'Outbound send failed: {future.exception()}')
+
+    def send_action(self, chat_id: int, action: str) -> None:
+        """Queue a chat action in the chat's lane without waiting, so it goes out before the reply it announces."""
+        self._track(self._lanes.submit(chat_id, send_with_retry, self.bot.send_chat_action, chat_id, action))
+
+    def submit(self, chat_id: int, func: Callable, *args, **kwargs) -> Future:
+        """Queue func(*args, **kwargs) after earlier sends to the same chat."""
+        return self._track(self._lanes.submit(chat_id, func, *args, **kwargs))
+
+    def drain(self, timeout: float) -> None:
+        """Wait up to timeout seconds for all queued sends to finish."""
+        with self._lock:
+            pending = list(self._pending)
+        if pending:
+            wait(pending, timeout=timeout)
@@ -0,0 +1,66 @@
+"""Send rate limiting for bulk Telegram deliveries."""
+import bisect
+import math
+import threading
+import time
+from typing import Hashable, Optional
+
+# Length in seconds of the sliding window the global limit applies to
+WINDOW = 1.0
+# Per-chat next-send times are pruned of past entries once this many chats are tracked
+CHAT_PRUNE_THRESHOLD = 10000
+
+
+class RateLimiter:
+    """Blocking limiter with a global sliding-window limit and a minimum interval per chat.
+
+    acquire() waits for the earliest moment that keeps both limits (at most
+    global_rate sends in any sliding window of one second, at most one send per
+    per_chat_interval seconds to the same chat). Sends are recorded under a
+    lock, so concurrent senders share the limits; a caller whose next slot is
+    past its deadline gives up without sending.
+    """
+
+    def __init__(self, global_rate: float, per_chat_interval: float) -> None:
+        self.limit = max(1, math.floor(global_rate)) if global_rate > 0 else 0
+        self.per_chat_interval = per_chat_interval
+        self._sent: list[float] = []
+        self._next_chat: dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+
+    def _global_slot(self, at: float) -> float:
+        """Return the earliest time not before at that keeps the global limit.
+
+        Sends are spaced at least one window / limit apart, which spreads them
+        evenly; the window check keeps the limit exact where float rounding of
+        that spacing would let one extra send into a window.
+        """
+        if self._sent:
+            at = max(at, self._sent[-1] + WINDOW / self.limit)
+        if len(self._sent) >= self.limit:
+            at = max(at, self._sent[-self.limit] + WINDOW)
+        return at
+
+    def acquire(self, chat_id: Hashable, deadline: Optional[float] = None) -> bool:
+        """Block until a send to chat_id is allowed; False if that would be after deadline.
+
+        Only actual release times are recorded, so a thread that oversleeps
+        cannot push its send into a window already filled by later ones.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                del self._sent[:bisect.bisect_left(self._sent, now - WINDOW)]
+                if len(self._next_chat) > CHAT_PRUNE_THRESHOLD:
+                    self._next_chat = {chat: at for chat, at in self._next_chat.items() if at > now}
+                at = max(now, self._next_chat.get(chat_id, 0.0))
+                if self.limit:
+                    at = self._global_slot(at)
+                if deadline is not None and at > deadline:
+                    return False
+                if at <= now:
+                    if self.limit:
+                        self._sent.append(now)
+                    self._next_chat[chat_id] = now + self.per_chat_interval
+                    return True
+            time.sleep(at - now)
@@ -0,0 +1,146 @@
+"""Retry policy with exponential backoff, jitter and deadline budgets for Telegram API calls."""
+import asyncio
+import contextvars
+import enum
+import logging
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterator, Optional
+
+import requests
+from telebot.apihelper import ApiHTTPException, ApiTelegramException
+
+from config import RETRY_BASE_DELAY, RETRY_BUDGET, RETRY_MAX_ATTEMPTS, RETRY_MAX_DELAY
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Monotonic deadline of the request currently being handled, if any
+_request_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    'request_deadline', default=None,
+)
+
+
+class ErrorKind(enum.Enum):
+    """Retry classification of an API call error."""
+
+    RATE_LIMITED = 'rate_limited'
+    SERVER = 'server'
+    NETWORK = 'network'
+    UNKNOWN = 'unknown'
+    FATAL = 'fatal'
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with jitter, bounded by attempts and a total time budget."""
+
+    max_attempts: int = RETRY_MAX_ATTEMPTS
+    base_delay: float = RETRY_BASE_DELAY
+    max_delay: float = RETRY_MAX_DELAY
+    jitter: float = 0.5
+    budget: float = RETRY_BUDGET
+
+    def backoff(self, attempt: int) -> float:
+        """Return the delay before retry number attempt (0-based), with jitter applied."""
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return delay * (1 - self.jitter * random.random())
+
+
+DEFAULT_POLICY = RetryPolicy()
+
+
+def classify_error(error: Exception) -> tuple[ErrorKind, Optional[float]]:
+    """Classify an error and return its kind with the server-requested delay, if any."""
+    if isinstance(error, ApiTelegramException):
+        if error.error_code == 429:
+            parameters = (error.result_json or {}).get('parameters') or {}
+            return ErrorKind.RATE_LIMITED, parameters.get('retry_after')
+        if error.error_code >= 500:
+            return ErrorKind.SERVER, None
+        return ErrorKind.FATAL, None
+    if isinstance(error, ApiHTTPException):
+        status_code = error.result.status_code
+        if status_code == 429 or status_code >= 500:
+            return ErrorKind.SERVER, None
+        return ErrorKind.FATAL, None
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return ErrorKind.NETWORK, None
+    return ErrorKind.UNKNOWN, None
+
+
+@contextmanager
+def request_deadline(seconds: float) -> Iterator[None]:
+    """Bound all retries made inside the block to finish within seconds from now."""
+    token = _request_deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _request_deadline.reset(token)
+
+
+def _deadline_for(policy: RetryPolicy) -> float:
+    """Return the monotonic time retries must finish by: policy budget or request deadline."""
+    deadline = time.monotonic() + policy.budget
+    request_deadline_at = _request_deadline.get()
+    if request_deadline_at is not None:
+        deadline = min(deadline, request_deadline_at)
+    return deadline
+
+
+def _next_delay(
+    error: Exception,
+    attempt: int,
+    policy: RetryPolicy,
+    deadline: float,
+    classify: Callable[[Exception], tuple[ErrorKind, Optional[float]]],
+) -> Optional[float]:
+    """Return the delay before the next attempt, or None if the error must be raised."""
+    kind, retry_after = classify(error)
+    if kind is ErrorKind.FATAL:
+        logger.error(f"{error} - Not retriable")
+        return None
+    delay = retry_after if retry_after is not None else policy.backoff(attempt)
+    if attempt == policy.max_attempts - 1 or time.monotonic() + delay > deadline:
+        logger.error(f"{error} - Giving up after {attempt + 1} attempt(s)")
+        return None
+    logger.error(f"{error} - Retry {attempt + 1}/{policy.max_attempts} after {delay:.2f}s ({kind.value})")
+    return delay
+
+
+def call_with_retry(func: Callable, *args, policy: RetryPolicy = DEFAULT_POLICY, **kwargs) -> Any:
+    """Call func, retrying retriable errors until attempts, budget or request deadline run out."""
+    deadline = _deadline_for(policy)
+    for attempt in range(policy.max_attempts):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            delay = _next_delay(e, attempt, policy, deadline, classify_error)
+            if delay is None:
+                metrics.inc('telegram_errors_total', error=type(e).__name__)
+                raise
+            metrics.inc('telegram_retries_total', error=type(e).__name__)
+            time.sleep(delay)
+
+
+async def async_call_with_retry(
+    func: Callable[..., Awaitable],
+    *args,
+    policy: RetryPolicy = DEFAULT_POLICY,
+    classify: Callable[[Exception], tuple[ErrorKind, Optional[float]]] = classify_error,
+    **kwargs,
+) -> Any:
+    """Await func with the same retry rules as call_with_retry, sleeping without blocking the loop."""
+    deadline = _deadline_for(policy)
+    for attempt in range(policy.max_attempts):
+        try:
+            return await func(*args, **kwargs)
+        except Exception as e:
+            delay = _next_delay(e, attempt, policy, deadline, classify)
+            if delay is None:
+                metrics.inc('telegram_errors_total', error=type(e).__name__)
+                raise
+            metrics.inc('telegram_retries_total', error=type(e).__name__)
+            await asyncio.sleep(delay)
@@ -0,0 +1,94 @@
+"""Timing of import and initialization phases during process startup."""
+import builtins
+import importlib.util
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Callable, Iterator, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Collects wall-clock durations of named startup phases."""
+
+    def __init__(self) -> None:
+        self.started_at = time.perf_counter()
+        self.phases: list[tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the enclosed block and record it under name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, (time.perf_counter() - start) * 1000))
+
+    def report(self) -> str:
+        """Log and return a per-phase timing report in milliseconds."""
+        total = (time.perf_counter() - self.started_at) * 1000
+        lines = [f'{name:<32} {ms:8.1f} ms' for name, ms in self.phases]
+        lines.append(f"{'total':<32} {total:8.1f} ms")
+        report = '\n'.join(lines)
+        logger.info(f'Startup timing:\n{report}')
+        return report
+
+
+class ImportProfiler:
+    """Records the time spent importing each module while active (a runtime -X importtime).
+
+    Hooks builtins.__import__ and times every import statement that loads a
+    module not yet in sys.modules. Self time excludes nested imports, so the
+    report points at the modules that are expensive themselves. Nesting is
+    tracked per thread, so imports running on other threads while the
+    profiler is active do not skew each other's self time.
+    """
+
+    def __init__(self) -> None:
+        self.modules: dict[str, list[float]] = {}
+        self._local = threading.local()
+        self._original: Optional[Callable[..., ModuleType]] = None
+
+    def __enter__(self) -> 'ImportProfiler':
+        self._original = builtins.__import__
+        builtins.__import__ = self._import
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        builtins.__import__ = self._original
+
+    def _import(self, name: str, globals: Optional[dict] = None, locals: Optional[dict] = None,
+                fromlist: Sequence[str] = (), level: int = 0) -> ModuleType:
+        try:
+            package = globals.get('__package__') if level and globals else None
+            module_name = importlib.util.resolve_name('.' * level + name, package) if level else name
+        except (ImportError, ValueError):
+            module_name = name
+        if module_name in sys.modules:
+            return self._original(name, globals, locals, fromlist, level)
+
+        stack = self._local.__dict__.setdefault('stack', [])
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            if module_name in sys.modules:
+                self.modules[module_name] = [elapsed, elapsed - nested]
+
+    def report(self, top: int) -> str:
+        """Log and return the top modules by self import time in milliseconds."""
+        ranked = sorted(self.modules.items(), key=lambda item: item[1][1], reverse=True)[:top]
+        lines = [f"{'module':<40} {'self':>8}    {'cumulative':>10}"]
+        lines.extend(f'{name:<40} {own:8.1f} ms {total:10.1f} ms' for name, (total, own) in ranked)
+        report = '\n'.join(lines)
+        logger.info(f'Import timing (top {len(ranked)} of {len(self.modules)} modules):\n{report}')
+        return report
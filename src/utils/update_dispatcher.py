@@ -0,0 +1,66 @@
+"""Concurrent processing of Telegram updates, in order per chat."""
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Hashable, Optional
+
+import telebot
+
+from utils.keyed_executor import KeyedExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class DispatcherOverloaded(Exception):
+    """Raised when no in-flight slot frees up within the queue timeout."""
+
+
+def update_chat_key(update: telebot.types.Update) -> Hashable:
+    """Return the chat an update belongs to, falling back to the update id."""
+    if update.message:
+        return update.message.chat.id
+    if update.callback_query:
+        if update.callback_query.message:
+            return update.callback_query.message.chat.id
+        return ('user', update.callback_query.from_user.id)
+    if update.edited_message:
+        return update.edited_message.chat.id
+    return ('update', update.update_id)
+
+
+class UpdateDispatcher:
+    """Runs updates on a bounded worker pool; different chats in parallel, one chat in order.
+
+    At most ``max_in_flight`` updates are queued or running at once. ``submit``
+    blocks for a free slot up to ``queue_timeout`` seconds and then raises
+    DispatcherOverloaded, which pushes back on the caller.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[list[telebot.types.Update]], None],
+        max_workers: int,
+        max_in_flight: int,
+        queue_timeout: Optional[float] = None,
+    ) -> None:
+        self._process = process
+        self._lanes = KeyedExecutor(max_workers, thread_name_prefix='updates')
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self.queue_timeout = queue_timeout
+
+    def submit(self, update: telebot.types.Update) -> Future:
+        """Queue an update for processing after earlier updates from the same chat."""
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise DispatcherOverloaded(f'Too many updates in flight, dropping update {update.update_id}')
+        try:
+            future = self._lanes.submit(update_chat_key(update), self._process, [update])
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: Future) -> None:
+        self._slots.release()
+        if not future.cancelled() and future.exception():
+            logger.error(f'Error processing update: {future.exception()}')
@@ -0,0 +1,76 @@
+"""Webhook reply mode: answer one bot API call in the webhook HTTP response body."""
+import contextvars
+import json
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+_current_reply: contextvars.ContextVar[Optional['WebhookReply']] = contextvars.ContextVar(
+    'webhook_reply', default=None,
+)
+
+
+class WebhookReply:
+    """Holds at most one bot API method call to return inline to Telegram.
+
+    Once closed, no call can be claimed any more: the response is on its way
+    (or the update ran out of time), so later calls must go through the bot API.
+    """
+
+    def __init__(self) -> None:
+        self.payload: Optional[dict[str, Any]] = None
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def claim(self, payload: dict[str, Any]) -> bool:
+        """Store payload as the reply unless one is already claimed or the reply is closed."""
+        with self._lock:
+            if self.closed or self.payload is not None:
+                return False
+            self.payload = payload
+            return True
+
+    def close(self) -> None:
+        """Refuse further claims; payload no longer changes after this."""
+        with self._lock:
+            self.closed = True
+
+    def to_json(self) -> str:
+        """Serialize the claimed method call as the webhook response body."""
+        return json.dumps(self.payload, ensure_ascii=False)
+
+
+@contextmanager
+def collect_webhook_reply() -> Iterator[WebhookReply]:
+    """Allow the first eligible bot API call inside the block to be returned inline.
+
+    The reply is closed when the block exits, also on a timeout: a handler
+    still running on another thread then sends its calls normally instead of
+    claiming a reply nobody returns.
+    """
+    reply = WebhookReply()
+    token = _current_reply.set(reply)
+    try:
+        yield reply
+    finally:
+        reply.close()
+        _current_reply.reset(token)
+
+
+def claim_webhook_reply(method: str, **params) -> bool:
+    """Store the call as the webhook reply if one is being collected and none is claimed yet.
+
+    Returns True if the caller must not send the call through the bot API.
+    Telebot markup objects are converted to their JSON form.
+    """
+    reply = _current_reply.get()
+    if reply is None or reply.closed or reply.payload is not None:
+        return False
+    payload = {'method': method}
+    for name, value in params.items():
+        if value is None:
+            continue
+        if hasattr(value, 'to_json'):
+            value = json.loads(value.to_json())
+        payload[name] = value
+    return reply.claim(payload)
@@ -0,0 +1,5 @@
+"""Put src/ on the import path, as the bot runs from there."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
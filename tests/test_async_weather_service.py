@@ -0,0 +1,108 @@
+"""AsyncWeatherService error contract, stale data and geo cache persistence off the event loop."""
+import asyncio
+import threading
+from typing import Any
+
+import pytest
+import pytz
+
+from services.async_weather_service import AsyncWeatherService
+from services.cache import TTLCache
+from services.exceptions import WeatherServiceUnavailable
+
+CURRENT = {
+    'name': 'Somewhere', 'coord': {'lat': 49.99, 'lon': 36.23},
+    'main': {'temp': 280.0, 'pressure': 1013, 'humidity': 50}, 'wind': {'speed': 3.0},
+    'weather': [{'description': 'ясно', 'icon': '01d'}],
+}
+
+
+class RecordingCache(TTLCache):
+    """Geo cache remembering which thread each set() ran on."""
+
+    def __init__(self) -> None:
+        super().__init__(16, 60)
+        self.set_threads: list[threading.Thread] = []
+
+    def set(self, key: Any, value: Any) -> None:
+        self.set_threads.append(threading.current_thread())
+        super().set(key, value)
+
+
+@pytest.fixture
+def service(monkeypatch: pytest.MonkeyPatch) -> AsyncWeatherService:
+    service = AsyncWeatherService('test-key', geo_cache=RecordingCache())
+    service.upstream_error = None
+    service.calls = 0
+
+    async def get_json(path: str, params: dict) -> Any:
+        if path.startswith('/geo/'):
+            return [{'country': 'UA', 'state': ''}]
+        service.calls += 1
+        if service.upstream_error:
+            raise service.upstream_error
+        return CURRENT
+
+    monkeypatch.setattr(service, '_get_json', get_json)
+    monkeypatch.setattr(service.timezones, 'resolve', lambda lat, lon: (pytz.utc, 'UTC'))
+    return service
+
+
+def expire(cache: TTLCache, age: float) -> None:
+    """Age every entry of cache by age seconds."""
+    with cache._lock:
+        for key, (stored_at, value) in list(cache._data.items()):
+            cache._data[key] = (stored_at - age, value)
+
+
+def test_upstream_error_raises_instead_of_returning_none(service: AsyncWeatherService) -> None:
+    service.upstream_error = ConnectionError('boom')
+    with pytest.raises(WeatherServiceUnavailable):
+        asyncio.run(service.get_current_weather(lat=10.0, lon=10.0))
+    assert service.breaker._failures == 1
+
+
+def test_upstream_errors_open_the_breaker(service: AsyncWeatherService) -> None:
+    service.upstream_error = ConnectionError('boom')
+
+    async def run() -> None:
+        for i in range(service.breaker.failure_threshold + 2):
+            with pytest.raises(WeatherServiceUnavailable):
+                await service.get_current_weather(lat=10.0 + i, lon=10.0)
+
+    asyncio.run(run())
+    assert service.breaker.is_open
+    assert service.calls == service.breaker.failure_threshold
+
+
+def test_old_entry_is_served_degraded_when_upstream_fails(service: AsyncWeatherService) -> None:
+    fresh = asyncio.run(service.get_current_weather(lat=10.0, lon=10.0))
+    assert fresh['fetched_at'] and not fresh.get('stale')
+    expire(service.current_cache, service.current_cache.ttl * 3)
+    service.upstream_error = ConnectionError('boom')
+
+    data = asyncio.run(service.get_current_weather(lat=10.0, lon=10.0))
+
+    assert data['stale'] and data['degraded']
+
+
+def test_recently_expired_entry_is_served_stale_and_refreshed(service: AsyncWeatherService) -> None:
+    async def run() -> dict:
+        await service.get_current_weather(lat=10.0, lon=10.0)
+        expire(service.current_cache, service.current_cache.ttl * 1.5)
+        data = await service.get_current_weather(lat=10.0, lon=10.0)
+        await asyncio.gather(*service._refresh_tasks)
+        return data
+
+    data = asyncio.run(run())
+
+    assert data['stale'] and not data['degraded']
+    assert service.calls == 2
+    assert not service._refreshing
+    assert service.current_cache.get(('coords', 10.0, 10.0))
+
+
+def test_geo_cache_is_written_off_the_event_loop(service: AsyncWeatherService) -> None:
+    asyncio.run(service.get_current_weather(lat=10.0, lon=10.0))
+    assert service.geo_cache.set_threads
+    assert threading.main_thread() not in service.geo_cache.set_threads
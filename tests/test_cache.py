@@ -0,0 +1,49 @@
+"""Persistent TTL cache: loading saved entries and debounced writes."""
+import json
+import time
+
+from services.cache import PersistentTTLCache
+
+
+def saved_keys(path) -> list:
+    with open(path, encoding='utf-8') as f:
+        return [key for key, _, _ in json.load(f)]
+
+
+def test_round_trip(tmp_path) -> None:
+    path = str(tmp_path / 'geo.json')
+    cache = PersistentTTLCache(10, 3600, path)
+    cache.set(('coords', 50.0, 36.23), {'country': 'UA', 'state': 'Kharkiv'})
+    assert PersistentTTLCache(10, 3600, path).get(('coords', 50.0, 36.23)) == {'country': 'UA', 'state': 'Kharkiv'}
+
+
+def test_load_skips_expired_entries(tmp_path) -> None:
+    path = tmp_path / 'geo.json'
+    path.write_text(json.dumps([[['city', 'old'], time.time() - 7200, 1], [['city', 'new'], time.time(), 2]]))
+    cache = PersistentTTLCache(10, 3600, str(path))
+    assert cache.get(('city', 'old')) is None
+    assert cache.get(('city', 'new')) == 2
+
+
+def test_load_ignores_malformed_file(tmp_path) -> None:
+    path = tmp_path / 'geo.json'
+    path.write_text(json.dumps([[['city', 'kyiv'], time.time(), 1], ['truncated']]))
+    cache = PersistentTTLCache(10, 3600, str(path))
+    assert len(cache) == 0
+    cache.set(('city', 'kyiv'), 1)
+    assert cache.get(('city', 'kyiv')) == 1
+
+
+def test_writes_are_debounced(tmp_path) -> None:
+    path = str(tmp_path / 'geo.json')
+    cache = PersistentTTLCache(10, 3600, path, flush_interval=0.2)
+    cache.set(('city', 'a'), 1)
+    assert saved_keys(path) == [['city', 'a']]
+    cache.set(('city', 'b'), 2)
+    cache.set(('city', 'c'), 3)
+    assert saved_keys(path) == [['city', 'a']]
+    time.sleep(0.4)
+    assert saved_keys(path) == [['city', 'a'], ['city', 'b'], ['city', 'c']]
+    cache.set(('city', 'd'), 4)
+    cache.flush()
+    assert saved_keys(path)[-1] == ['city', 'd']
@@ -0,0 +1,28 @@
+"""Classification of free text before it is looked up as a city name."""
+import pytest
+
+from utils.input_filter import InputKind, classify_text
+
+
+@pytest.mark.parametrize('text', [
+    'Kyiv', 'Москва', 'St. Petersburg', "L'Aquila", 'Paris, FR', 'Ivano-Frankivsk', 'Biel/Bienne',
+    'Saint‑Denis', 'Ivano–Frankivsk', 'São Paulo',
+])
+def test_city_names(text: str) -> None:
+    assert classify_text(text) is InputKind.CITY
+
+
+@pytest.mark.parametrize('text, kind', [
+    ('', InputKind.EMPTY),
+    ('   ', InputKind.EMPTY),
+    ('/start', InputKind.COMMAND),
+    ('Kyiv \U0001F600', InputKind.EMOJI),
+    ('x' * 200, InputKind.TOO_LONG),
+    ('https://example.com', InputKind.URL),
+    ('t.me/somebot', InputKind.URL),
+    ('12345', InputKind.INVALID),
+    ('Kyiv; DROP', InputKind.INVALID),
+    ('--', InputKind.INVALID),
+])
+def test_rejected_text(text: str, kind: InputKind) -> None:
+    assert classify_text(text) is kind
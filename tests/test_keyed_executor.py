@@ -0,0 +1,74 @@
+"""Per-key ordering and cross-key concurrency of KeyedExecutor."""
+import contextvars
+import threading
+import time
+
+import pytest
+
+from utils.keyed_executor import KeyedExecutor
+
+request_id = contextvars.ContextVar('request_id', default=None)
+
+
+@pytest.fixture
+def executor():
+    executor = KeyedExecutor(4, thread_name_prefix='test')
+    yield executor
+    executor.shutdown()
+
+
+def test_tasks_with_one_key_run_in_order(executor: KeyedExecutor) -> None:
+    order = []
+
+    def task(index: int) -> int:
+        time.sleep(0.001 * (index % 3))
+        order.append(index)
+        return index
+
+    futures = [executor.submit('chat', task, i) for i in range(30)]
+    assert [f.result(timeout=5) for f in futures] == list(range(30))
+    assert order == list(range(30))
+
+
+def test_burst_for_one_key_does_not_delay_other_keys(executor: KeyedExecutor) -> None:
+    for _ in range(8):
+        executor.submit('chat A', time.sleep, 0.25)
+    start = time.monotonic()
+    executor.submit('chat B', lambda: None).result(timeout=5)
+    assert time.monotonic() - start < 0.1
+
+
+def test_failure_does_not_block_the_key(executor: KeyedExecutor) -> None:
+    def fail() -> None:
+        raise ValueError('boom')
+
+    failed = executor.submit('chat', fail)
+    after = executor.submit('chat', lambda: 'ok')
+    assert after.result(timeout=5) == 'ok'
+    assert isinstance(failed.exception(), ValueError)
+
+
+def test_cancelled_queued_task_is_skipped(executor: KeyedExecutor) -> None:
+    release = threading.Event()
+    ran = []
+    executor.submit('chat', release.wait, 5)
+    queued = executor.submit('chat', ran.append, 'cancelled')
+    last = executor.submit('chat', ran.append, 'last')
+    assert queued.cancel()
+    release.set()
+    last.result(timeout=5)
+    assert ran == ['last']
+
+
+def test_context_is_copied_from_submitter(executor: KeyedExecutor) -> None:
+    request_id.set('r-1')
+    assert executor.submit('chat', request_id.get).result(timeout=5) == 'r-1'
+
+
+def test_shutdown_waits_for_queued_tasks() -> None:
+    executor = KeyedExecutor(1)
+    done = []
+    for i in range(5):
+        executor.submit('chat', lambda i=i: (time.sleep(0.01), done.append(i)))
+    executor.shutdown()
+    assert done == list(range(5))
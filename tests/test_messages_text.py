@@ -0,0 +1,8 @@
+"""Message texts built from user input."""
+from handlers.messages_text import get_city_not_found_message
+
+
+def test_city_not_found_escapes_the_echoed_city() -> None:
+    text = get_city_not_found_message('<b>Evil</b> & co', suggestions=['Kharkiv'])
+    assert text.startswith('<b>&lt;b&gt;Evil&lt;/b&gt; &amp; co</b> не найден.')
+    assert 'Kharkiv' in text
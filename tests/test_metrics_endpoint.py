@@ -0,0 +1,54 @@
+"""Metrics endpoint: disabled without a token, bearer auth, and Prometheus text vs JSON output."""
+import importlib
+import json
+import types
+from typing import Optional
+
+import pytest
+
+import config
+
+
+@pytest.fixture
+def main(monkeypatch: pytest.MonkeyPatch) -> types.ModuleType:
+    """The bot entry point with dummy API keys, metrics enabled and METRICS_TOKEN set."""
+    monkeypatch.setattr(config, 'OWM_KEY', config.OWM_KEY or 'test-key')
+    monkeypatch.setattr(config, 'TELEBOT_KEY', config.TELEBOT_KEY or '123:test')
+    module = importlib.import_module('main')
+    monkeypatch.setattr(module.metrics, 'enabled', True)
+    monkeypatch.setattr(config, 'METRICS_TOKEN', 'secret')
+    module.metrics.inc('updates_total', type='message')
+    return module
+
+
+def request(authorization: Optional[str] = None, method: str = 'GET', **args: str) -> types.SimpleNamespace:
+    headers = {'Authorization': authorization} if authorization else {}
+    return types.SimpleNamespace(method=method, headers=headers, args=args, path='/metrics')
+
+
+def test_endpoint_is_disabled_without_a_token(main: types.ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(config, 'METRICS_TOKEN', None)
+    assert main.metrics_run(request('Bearer secret'))[1] == 404
+
+
+@pytest.mark.parametrize('authorization', [None, 'Bearer wrong', 'secret'])
+def test_wrong_or_missing_bearer_token_is_forbidden(main: types.ModuleType, authorization: Optional[str]) -> None:
+    assert main.metrics_run(request(authorization))[1] == 403
+
+
+def test_only_get_is_allowed(main: types.ModuleType) -> None:
+    assert main.metrics_run(request('Bearer secret', method='POST'))[1] == 405
+
+
+def test_prometheus_text_by_default(main: types.ModuleType) -> None:
+    body, status, headers = main.metrics_run(request('Bearer secret'))
+
+    assert status == 200 and headers['Content-Type'].startswith('text/plain')
+    assert 'updates_total{type="message"}' in body
+
+
+def test_json_on_request(main: types.ModuleType) -> None:
+    body, status, headers = main.metrics_run(request('Bearer secret', format='json'))
+
+    assert status == 200 and headers['Content-Type'] == 'application/json'
+    assert isinstance(json.loads(body), dict)
@@ -0,0 +1,147 @@
+"""Raw-JSON records must build the same weather dicts as the pyowm object model."""
+import random
+from typing import Any, Optional
+
+import pytest
+import pytz
+from pyowm.weatherapi30.forecast import Forecast
+from pyowm.weatherapi30.forecaster import Forecaster
+from pyowm.weatherapi30.observation import Observation
+
+from services.owm_parser import (
+    HPA_TO_MMHG,
+    CurrentRecord,
+    ForecastRecord,
+    build_current,
+    build_forecast,
+    icon_to_emoji,
+    local_time_fields,
+)
+
+GEO_INFO = {'country': 'RU', 'state': 'Moscow'}
+STATUSES = [
+    (800, 'Clear', 'ясно'), (802, 'Clouds', 'переменная облачность'), (500, 'Rain', 'небольшой дождь'),
+]
+ICONS = ['01d', '02d', '03n', '10d', '13n', '50d']
+FORECAST_START = 1711627200
+TIMEZONES = ['Europe/Moscow', 'UTC', 'Asia/Kolkata', 'America/St_Johns', 'Pacific/Kiritimati']
+
+
+def weather_item(rng: random.Random, **main: Any) -> dict[str, Any]:
+    weather_id, status, description = rng.choice(STATUSES)
+    return {
+        'main': {
+            'temp': rng.uniform(250.0, 310.0), 'feels_like': rng.uniform(250.0, 310.0),
+            'temp_min': rng.uniform(250.0, 310.0), 'temp_max': rng.uniform(250.0, 310.0),
+            'pressure': rng.randint(980, 1040), 'sea_level': 1013, 'grnd_level': 995,
+            'humidity': rng.randint(0, 100), **main,
+        },
+        'weather': [{'id': weather_id, 'main': status, 'description': description, 'icon': rng.choice(ICONS)}],
+        'clouds': {'all': rng.randint(0, 100)},
+        'wind': {'speed': rng.uniform(0.0, 15.0), 'deg': rng.randint(0, 359)},
+        'visibility': 10000,
+    }
+
+
+def current_payload(rng: random.Random, wind_speed: Optional[float] = None, **main: Any) -> dict[str, Any]:
+    item = weather_item(rng, **main)
+    if wind_speed is not None:
+        item['wind']['speed'] = wind_speed
+    return {
+        'coord': {'lon': 37.6156, 'lat': 55.7522}, 'base': 'stations', **item, 'dt': 1711623600,
+        'sys': {'type': 2, 'id': 2000314, 'country': 'RU', 'sunrise': 1711596000, 'sunset': 1711641600},
+        'timezone': 10800, 'id': 524901, 'name': 'Москва', 'cod': 200,
+    }
+
+
+def forecast_payload(rng: random.Random, count: int = 40, start: int = FORECAST_START) -> dict[str, Any]:
+    return {
+        'cod': '200', 'message': 0, 'cnt': count,
+        'list': [
+            {'dt': start + i * 3 * 3600, **weather_item(rng), 'pop': 0.2, 'sys': {'pod': 'd'}, 'dt_txt': ''}
+            for i in range(count)
+        ],
+        'city': {
+            'id': 524901, 'name': 'Москва', 'coord': {'lat': 55.7522, 'lon': 37.6156}, 'country': 'RU',
+            'population': 1000000, 'timezone': 10800, 'sunrise': 1711596000, 'sunset': 1711641600,
+        },
+    }
+
+
+def accessor_current(payload: dict[str, Any], timezone: pytz.BaseTzInfo, tz_name: str) -> dict:
+    """The pre-record pyowm path, read through pyowm's unit-converting accessors."""
+    observation = Observation.from_dict(payload)
+    weather = observation.weather
+    return {
+        'location_name': observation.location.name,
+        'country': GEO_INFO['country'],
+        'state': GEO_INFO['state'],
+        'icon': icon_to_emoji(weather.weather_icon_name),
+        'status': weather.detailed_status,
+        'temp': round(weather.temperature('celsius')['temp']),
+        'pressure': round(weather.barometric_pressure()['press'] * HPA_TO_MMHG),
+        'humidity': weather.humidity,
+        'wind_speed': round(weather.wind()['speed']),
+        'timezone': tz_name,
+        **local_time_fields(timezone),
+    }
+
+
+def assert_current_parity(payload: dict[str, Any], tz_name: str = 'Europe/Moscow') -> None:
+    timezone = pytz.timezone(tz_name)
+    raw = build_current(CurrentRecord.from_json(payload), timezone, tz_name, GEO_INFO)
+    record = CurrentRecord.from_observation(Observation.from_dict(payload))
+    via_pyowm = build_current(record, timezone, tz_name, GEO_INFO)
+    via_accessors = accessor_current(payload, timezone, tz_name)
+    # 'time' is the wall-clock time of the call and may tick between the paths
+    assert {**raw, 'time': None} == {**via_pyowm, 'time': None} == {**via_accessors, 'time': None}
+
+
+def assert_forecast_parity(payload: dict[str, Any], tz_name: str = 'Europe/Moscow') -> None:
+    timezone = pytz.timezone(tz_name)
+    raw = build_forecast(ForecastRecord.from_json(payload), timezone, tz_name, GEO_INFO)
+    record = ForecastRecord.from_forecaster(Forecaster(Forecast.from_dict(payload)))
+    assert raw == build_forecast(record, timezone, tz_name, GEO_INFO)
+    assert raw['forecasts']
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_current_parity(seed: int) -> None:
+    assert_current_parity(current_payload(random.Random(seed)), TIMEZONES[seed % len(TIMEZONES)])
+
+
+@pytest.mark.parametrize('temp', [273.15, 273.65, 274.65, 272.65, 272.15, 223.15, 323.15])
+def test_current_parity_rounding_temperature(temp: float) -> None:
+    assert_current_parity(current_payload(random.Random(0), temp=temp))
+
+
+@pytest.mark.parametrize('pressure', [870, 1000, 1013, 1084])
+@pytest.mark.parametrize('wind_speed', [0, 0.5, 1.5, 2.5, 40.0])
+def test_current_parity_pressure_and_wind(pressure: int, wind_speed: float) -> None:
+    assert_current_parity(current_payload(random.Random(1), wind_speed=wind_speed, pressure=pressure, humidity=0))
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_forecast_parity(seed: int) -> None:
+    assert_forecast_parity(forecast_payload(random.Random(seed)), TIMEZONES[seed % len(TIMEZONES)])
+
+
+@pytest.mark.parametrize('count', [1, 2, 7, 8, 9])
+@pytest.mark.parametrize('tz_name', TIMEZONES)
+def test_forecast_parity_partial_days(count: int, tz_name: str) -> None:
+    assert_forecast_parity(forecast_payload(random.Random(count), count=count), tz_name)
+
+
+def test_forecast_parity_across_dst_change() -> None:
+    # 2024-03-31 01:00 UTC, when Central European Time switches to summer time
+    payload = forecast_payload(random.Random(3), start=1711846800 - 12 * 3600)
+    assert_forecast_parity(payload, 'Europe/Berlin')
+
+
+def test_forecast_parity_tied_statuses() -> None:
+    rng = random.Random(4)
+    payload = forecast_payload(rng, count=8)
+    for index, item in enumerate(payload['list']):
+        weather_id, status, description = STATUSES[index % 2]
+        item['weather'] = [{'id': weather_id, 'main': status, 'description': description, 'icon': ICONS[index % 2]}]
+    assert_forecast_parity(payload, 'UTC')
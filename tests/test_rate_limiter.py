@@ -0,0 +1,69 @@
+"""RateLimiter global sliding window, per-chat spacing, deadlines and pruning, on a fake clock."""
+import types
+
+import pytest
+
+from utils import rate_limiter
+from utils.rate_limiter import WINDOW, RateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    """Fake monotonic clock that sleep() advances."""
+    now = [100.0]
+
+    def sleep(seconds: float) -> None:
+        now[0] += seconds
+
+    monkeypatch.setattr(rate_limiter, 'time', types.SimpleNamespace(monotonic=lambda: now[0], sleep=sleep))
+    return now
+
+
+def test_global_limit_holds_in_every_window(clock: list[float]) -> None:
+    limiter = RateLimiter(global_rate=5, per_chat_interval=0)
+    released = []
+    for chat_id in range(23):
+        assert limiter.acquire(chat_id)
+        released.append(clock[0])
+
+    for start in released:
+        assert sum(start <= at < start + WINDOW for at in released) <= 5
+    assert released[-1] - released[0] == pytest.approx(22 * WINDOW / 5)
+
+
+def test_same_chat_waits_for_its_interval(clock: list[float]) -> None:
+    limiter = RateLimiter(global_rate=30, per_chat_interval=1.0)
+    assert limiter.acquire(1)
+    start = clock[0]
+    assert limiter.acquire(2)
+    assert clock[0] - start < 0.1
+    assert limiter.acquire(1)
+    assert clock[0] - start == pytest.approx(1.0)
+
+
+def test_slot_past_the_deadline_is_refused_without_being_recorded(clock: list[float]) -> None:
+    limiter = RateLimiter(global_rate=1, per_chat_interval=0)
+    start = clock[0]
+    assert limiter.acquire(1)
+    assert not limiter.acquire(2, deadline=start + 0.5)
+    assert limiter._sent == [start] and 2 not in limiter._next_chat
+    assert limiter.acquire(3, deadline=start + 1.0)
+    assert clock[0] == start + 1.0
+
+
+def test_zero_global_rate_only_spaces_chats(clock: list[float]) -> None:
+    limiter = RateLimiter(global_rate=0, per_chat_interval=1.0)
+    start = clock[0]
+    for chat_id in range(100):
+        assert limiter.acquire(chat_id)
+    assert clock[0] == start
+
+
+def test_past_chat_entries_are_pruned(clock: list[float], monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(rate_limiter, 'CHAT_PRUNE_THRESHOLD', 3)
+    limiter = RateLimiter(global_rate=0, per_chat_interval=1.0)
+    for chat_id in range(4):
+        limiter.acquire(chat_id)
+    clock[0] += 2
+    limiter.acquire(99)
+    assert set(limiter._next_chat) == {99}
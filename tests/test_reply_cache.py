@@ -0,0 +1,53 @@
+"""Rendered reply reuse per cache entry, and re-rendering once the entry is refetched."""
+import time
+
+import pytest
+
+from services.base import BaseWeatherService
+from services.cache import TTLCache
+from services.gazetteer import Gazetteer
+from services.reply_cache import ReplyCache
+
+
+@pytest.fixture
+def service() -> BaseWeatherService:
+    return BaseWeatherService(geo_cache=TTLCache(16, 60), gazetteer=Gazetteer(None))
+
+
+def weather(temp: int, fetched_at: float) -> dict:
+    return {
+        'location_name': 'Kyiv', 'country': 'UA', 'state': '', 'timezone': 'Europe/Kyiv',
+        'date': '01.07.2024', 'time': '08:00', 'icon': '☀', 'status': 'ясно', 'temp': temp,
+        'pressure': 760, 'humidity': 50, 'wind_speed': 3, 'fetched_at': fetched_at,
+    }
+
+
+def test_body_is_reused_with_the_username_spliced_in(service: BaseWeatherService) -> None:
+    data = weather(20, time.time())
+
+    first = service.format_current_weather('Ann', data)
+    second = service.format_current_weather('Bob', data)
+
+    assert first.startswith('Ann, в <b>Kyiv</b>') and second.startswith('Bob, в <b>Kyiv</b>')
+    assert (service.replies.hits, service.replies.misses) == (1, 1)
+
+
+def test_refetched_entry_is_rendered_again(service: BaseWeatherService) -> None:
+    fetched_at = time.time()
+    assert '20 °C' in service.format_current_weather('Ann', weather(20, fetched_at))
+
+    reply = service.format_current_weather('Ann', weather(25, fetched_at + 1))
+
+    assert '25 °C' in reply and '20 °C' not in reply
+    assert service.replies.misses == 2
+
+
+def test_cache_is_dropped_when_the_minute_changes(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [600.0]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    replies = ReplyCache(16)
+    replies.render('key', lambda name: f'{name}!', ('Ann',))
+    now[0] += 60
+
+    assert replies.render('key', lambda name: f'{name}?', ('Ann',)) == 'Ann?'
+    assert len(replies) == 1 and replies.misses == 2
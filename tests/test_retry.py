@@ -0,0 +1,89 @@
+"""Telegram API retries bounded by attempts, the policy budget and the request deadline, on a fake clock."""
+import types
+from typing import Optional
+
+import pytest
+from telebot.apihelper import ApiTelegramException
+
+from utils import retry
+from utils.retry import RetryPolicy, call_with_retry, request_deadline
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    """Fake monotonic clock that sleep() advances."""
+    now = [100.0]
+
+    def sleep(seconds: float) -> None:
+        now[0] += seconds
+
+    monkeypatch.setattr(retry, 'time', types.SimpleNamespace(monotonic=lambda: now[0], sleep=sleep))
+    return now
+
+
+def api_error(code: int, retry_after: Optional[float] = None) -> ApiTelegramException:
+    result = {'error_code': code, 'description': 'error'}
+    if retry_after is not None:
+        result['parameters'] = {'retry_after': retry_after}
+    return ApiTelegramException('sendMessage', None, result)
+
+
+class Flaky:
+    """Raises the given errors in turn, then returns 'ok'."""
+
+    def __init__(self, *errors: Exception) -> None:
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self) -> str:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'ok'
+
+
+# Without jitter the backoff is 1, 2, 4, ... seconds
+POLICY = RetryPolicy(max_attempts=5, base_delay=1.0, max_delay=8.0, jitter=0, budget=20.0)
+
+
+def test_server_errors_are_retried_with_backoff(clock: list[float]) -> None:
+    start = clock[0]
+    func = Flaky(api_error(502), api_error(502))
+
+    assert call_with_retry(func, policy=POLICY) == 'ok'
+    assert func.calls == 3
+    assert clock[0] - start == 3.0
+
+
+def test_retry_that_would_pass_the_budget_is_not_made(clock: list[float]) -> None:
+    start = clock[0]
+    func = Flaky(*[api_error(502)] * 5)
+
+    with pytest.raises(ApiTelegramException):
+        call_with_retry(func, policy=RetryPolicy(max_attempts=5, base_delay=1.0, jitter=0, budget=2.5))
+    assert func.calls == 2
+    assert clock[0] - start == 1.0
+
+
+def test_request_deadline_cuts_the_budget_short(clock: list[float]) -> None:
+    func = Flaky(*[api_error(502)] * 5)
+
+    with request_deadline(0.5), pytest.raises(ApiTelegramException):
+        call_with_retry(func, policy=POLICY)
+    assert func.calls == 1
+
+
+def test_retry_after_past_the_deadline_gives_up_at_once(clock: list[float]) -> None:
+    func = Flaky(api_error(429, retry_after=30))
+
+    with pytest.raises(ApiTelegramException):
+        call_with_retry(func, policy=POLICY)
+    assert func.calls == 1
+
+
+def test_client_errors_are_not_retried(clock: list[float]) -> None:
+    func = Flaky(api_error(400))
+
+    with pytest.raises(ApiTelegramException):
+        call_with_retry(func, policy=POLICY)
+    assert func.calls == 1 and clock[0] == 100.0
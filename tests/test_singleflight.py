@@ -0,0 +1,62 @@
+"""Single-flight collapsing of concurrent identical calls."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services.singleflight import SingleFlight
+
+
+def run_concurrently(flight: SingleFlight, key: str, fn, callers: int) -> list:
+    """Call flight.do(key, fn) from callers threads while fn blocks, and return their futures."""
+    release = threading.Event()
+    entered = threading.Event()
+
+    def blocking() -> object:
+        entered.set()
+        release.wait(5)
+        return fn()
+
+    pool = ThreadPoolExecutor(callers)
+    futures = [pool.submit(flight.do, key, blocking)]
+    entered.wait(5)
+    futures += [pool.submit(flight.do, key, blocking) for _ in range(callers - 1)]
+    while flight.coalesced < callers - 1:
+        time.sleep(0.001)
+    release.set()
+    pool.shutdown()
+    return futures
+
+
+def test_concurrent_callers_share_one_call() -> None:
+    flight = SingleFlight()
+    calls = []
+
+    futures = run_concurrently(flight, 'kyiv', lambda: calls.append(1) or 'sunny', callers=8)
+
+    assert [f.result() for f in futures] == ['sunny'] * 8
+    assert len(calls) == 1
+    assert (flight.calls, flight.coalesced) == (1, 7)
+
+
+def test_waiters_receive_the_leader_exception() -> None:
+    flight = SingleFlight()
+
+    def fail() -> None:
+        raise ConnectionError('boom')
+
+    futures = run_concurrently(flight, 'kyiv', fail, callers=4)
+
+    for future in futures:
+        with pytest.raises(ConnectionError):
+            future.result()
+    assert flight.calls == 1
+
+
+def test_finished_call_is_not_shared_with_later_callers() -> None:
+    flight = SingleFlight()
+    assert flight.do('kyiv', lambda: 1) == 1
+    assert flight.do('kyiv', lambda: 2) == 2
+    assert flight.do('lviv', lambda: 3) == 3
+    assert (flight.calls, flight.coalesced) == (3, 0)
@@ -0,0 +1,144 @@
+"""State store backends against one contract, with Redis played by an in-memory fake client."""
+import time
+from typing import Optional
+
+import pytest
+
+from services.state_store import MemoryStateStore, RedisStateStore, SQLiteStateStore, StateStore, create_state_store
+
+
+class FakeRedis:
+    """The part of the redis-py client RedisStateStore uses; values come back as bytes, like redis-py."""
+
+    def __init__(self) -> None:
+        self.values: dict[str, tuple[bytes, Optional[float]]] = {}
+        self.sets: dict[str, set[bytes]] = {}
+
+    def _live(self, key: str) -> Optional[bytes]:
+        item = self.values.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and time.time() >= expires_at:
+            del self.values[key]
+            return None
+        return value
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._live(key)
+
+    def mget(self, keys: list[str]) -> list[Optional[bytes]]:
+        return [self._live(key) for key in keys]
+
+    def set(self, key: str, value: str, ex: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        if nx and self._live(key) is not None:
+            return None
+        self.values[key] = (value.encode(), time.time() + ex if ex is not None else None)
+        return True
+
+    def delete(self, key: str) -> int:
+        return int(self.values.pop(key, None) is not None)
+
+    def sadd(self, key: str, member: str) -> int:
+        members = self.sets.setdefault(key, set())
+        added = member.encode() not in members
+        members.add(member.encode())
+        return int(added)
+
+    def srem(self, key: str, member: str) -> int:
+        members = self.sets.get(key, set())
+        removed = member.encode() in members
+        members.discard(member.encode())
+        return int(removed)
+
+    def smembers(self, key: str) -> frozenset[bytes]:
+        return frozenset(self.sets.get(key, ()))
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    return now
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'redis'])
+def store(request: pytest.FixtureRequest, tmp_path, clock) -> StateStore:
+    if request.param == 'memory':
+        return MemoryStateStore()
+    if request.param == 'sqlite':
+        return SQLiteStateStore(str(tmp_path / 'state.db'))
+    return RedisStateStore(FakeRedis())
+
+
+def test_state_store_is_abstract() -> None:
+    with pytest.raises(TypeError):
+        StateStore()
+
+
+def test_get_set_delete(store: StateStore) -> None:
+    assert store.get('forecast:1') is None
+    store.set('forecast:1', 'awaiting', 60)
+    assert store.get('forecast:1') == 'awaiting'
+    store.set('forecast:1', 'again', 60)
+    assert store.get('forecast:1') == 'again'
+    store.delete('forecast:1')
+    assert store.get('forecast:1') is None
+    store.delete('forecast:1')
+
+
+def test_ttl(store: StateStore, clock: list[float]) -> None:
+    store.set('forecast:1', 'awaiting', 60)
+    clock[0] += 59
+    assert store.get('forecast:1') == 'awaiting'
+    clock[0] += 1
+    assert store.get('forecast:1') is None
+
+
+def test_get_many(store: StateStore, clock: list[float]) -> None:
+    assert store.get_many([]) == []
+    store.set('subscription:1', 'a', 60)
+    store.set('subscription:2', 'b', 10)
+    clock[0] += 30
+    keys = [f'subscription:{i}' for i in range(600)] + ['subscription:1']
+    assert store.get_many(keys) == ['a' if i == 1 else None for i in range(600)] + ['a']
+
+
+def test_only_the_memory_store_is_not_persistent(store: StateStore) -> None:
+    assert store.persistent == (not isinstance(store, MemoryStateStore))
+
+
+def test_add_if_absent(store: StateStore, clock: list[float]) -> None:
+    assert store.add_if_absent('subscriptions:tick:1', '1', 60)
+    assert not store.add_if_absent('subscriptions:tick:1', '2', 60)
+    assert store.get('subscriptions:tick:1') == '1'
+    clock[0] += 60
+    assert store.add_if_absent('subscriptions:tick:1', '3', 60)
+    assert store.get('subscriptions:tick:1') == '3'
+
+
+def test_sets(store: StateStore, clock: list[float]) -> None:
+    assert store.members('subscriptions:UTC:08:00') == frozenset()
+    store.add_member('subscriptions:UTC:08:00', '1')
+    store.add_member('subscriptions:UTC:08:00', '2')
+    store.add_member('subscriptions:UTC:08:00', '2')
+    clock[0] += 10 ** 6
+    assert store.members('subscriptions:UTC:08:00') == frozenset({'1', '2'})
+    store.remove_member('subscriptions:UTC:08:00', '1')
+    store.remove_member('subscriptions:UTC:08:00', 'missing')
+    assert store.members('subscriptions:UTC:08:00') == frozenset({'2'})
+    assert store.members('subscriptions:UTC:09:00') == frozenset()
+
+
+def test_redis_keys_are_prefixed() -> None:
+    client = FakeRedis()
+    store = RedisStateStore(client, prefix='bot:')
+    store.set('forecast:1', 'awaiting', 60)
+    store.add_member('subscriptions:timezones', 'UTC')
+    assert set(client.values) == {'bot:forecast:1'}
+    assert set(client.sets) == {'bot:subscriptions:timezones'}
+
+
+def test_redis_backend_without_url_is_refused(tmp_path) -> None:
+    with pytest.raises(ValueError, match='REDIS_URL'):
+        create_state_store('redis', str(tmp_path / 'state.db'), None)
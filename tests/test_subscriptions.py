@@ -0,0 +1,198 @@
+"""Subscription store slots, delivery claims, the scheduler tick and the /subscribe backend check."""
+import calendar
+from datetime import datetime
+from typing import Optional, Sequence
+
+import pytest
+from telebot.apihelper import ApiTelegramException
+
+from handlers.subscriptions import SubscriptionHandlers
+from services.exceptions import WeatherServiceUnavailable
+from services.state_store import MemoryStateStore, SQLiteStateStore
+from services.subscriptions import Subscription, SubscriptionStore, parse_time
+from utils.rate_limiter import RateLimiter
+
+
+class CountingStore(MemoryStateStore):
+    """Memory store counting single and batched reads."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.reads = {'get': 0, 'get_many': 0}
+
+    def get(self, key: str) -> Optional[str]:
+        self.reads['get'] += 1
+        return super().get(key)
+
+    def get_many(self, keys: Sequence[str]) -> list[Optional[str]]:
+        self.reads['get_many'] += 1
+        return [MemoryStateStore.get(self, key) for key in keys]
+
+
+def utc_minute(text: str) -> int:
+    """Return the minute (Unix time // 60) of a 'YYYY-mm-dd HH:MM' UTC time."""
+    return calendar.timegm(datetime.strptime(text, '%Y-%m-%d %H:%M').timetuple()) // 60
+
+
+@pytest.fixture
+def store() -> SubscriptionStore:
+    return SubscriptionStore(CountingStore(), ttl=3600)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('7:30', '07:30'), ('07.30', '07:30'), ('23:59', '23:59'), ('24:00', None), ('7:3', None), ('soon', None),
+])
+def test_parse_time(text: str, expected: Optional[str]) -> None:
+    assert parse_time(text) == expected
+
+
+def test_due_follows_local_time_and_batches_reads(store: SubscriptionStore) -> None:
+    for chat_id in range(1, 6):
+        store.save(Subscription(chat_id, 'Kyiv', '08:00', 'Europe/Kyiv', 'user'))
+    store.save(Subscription(10, 'London', '08:00', 'Europe/London', 'user'))
+    store.state.reads.update(get=0, get_many=0)
+
+    due = store.due(utc_minute('2024-07-01 05:00'))
+
+    assert [s.chat_id for s in due] == [1, 2, 3, 4, 5]
+    assert store.state.reads == {'get': 0, 'get_many': 2}
+    assert [s.chat_id for s in store.due(utc_minute('2024-07-01 07:00'))] == [10]
+
+
+def test_changed_and_deleted_subscriptions_leave_their_old_slot(store: SubscriptionStore) -> None:
+    store.save(Subscription(1, 'Kyiv', '08:00', 'Europe/Kyiv', 'user'))
+    store.save(Subscription(2, 'Kyiv', '08:00', 'Europe/Kyiv', 'user'))
+    store.save(Subscription(1, 'Kyiv', '09:00', 'Europe/Kyiv', 'user'))
+    store.delete(2)
+
+    assert store.due(utc_minute('2024-07-01 05:00')) == []
+    assert [s.chat_id for s in store.due(utc_minute('2024-07-01 06:00'))] == [1]
+
+
+def test_repeated_hour_of_dst_fall_back_is_delivered_once(store: SubscriptionStore) -> None:
+    subscription = Subscription(1, 'Kyiv', '03:30', 'Europe/Kyiv', 'user')
+    store.save(subscription)
+    # 2024-10-27 in Kyiv: 03:30 EEST is 00:30 UTC, and after the clocks go back 03:30 EET is 01:30 UTC
+    first, second = utc_minute('2024-10-27 00:30'), utc_minute('2024-10-27 01:30')
+
+    assert store.due(first) == [subscription]
+    assert store.due(second) == [subscription]
+    assert store.claim_delivery(subscription, first)
+    assert not store.claim_delivery(subscription, second)
+    assert store.claim_delivery(subscription, utc_minute('2024-10-28 01:30'))
+
+
+def test_released_delivery_can_be_claimed_again(store: SubscriptionStore) -> None:
+    subscription = Subscription(1, 'Kyiv', '08:00', 'Europe/Kyiv', 'user')
+    minute = utc_minute('2024-07-01 05:00')
+    assert store.claim_delivery(subscription, minute)
+    store.release_delivery(subscription, minute)
+    assert store.claim_delivery(subscription, minute + 1)
+
+
+class FakeBot:
+    """Records messages sent through the bot API; chats in errors fail once with that Telegram error code."""
+
+    def __init__(self) -> None:
+        self.sent: list[tuple[int, str]] = []
+        self.errors: dict[int, int] = {}
+
+    def send_chat_action(self, chat_id: int, action: str) -> None:
+        pass
+
+    def send_message(self, chat_id: int, text: str, **kwargs) -> None:
+        if chat_id in self.errors:
+            code = self.errors.pop(chat_id)
+            raise ApiTelegramException('sendMessage', None, {'error_code': code, 'description': 'error'})
+        self.sent.append((chat_id, text))
+
+
+class FakeWeather:
+    """Weather service counting lookups per city; raises WeatherServiceUnavailable while down."""
+
+    def __init__(self) -> None:
+        self.lookups: dict[str, int] = {}
+        self.down = False
+
+    def get_current_weather(self, city: str) -> dict:
+        self.lookups[city] = self.lookups.get(city, 0) + 1
+        if self.down:
+            raise WeatherServiceUnavailable('down')
+        return {'location_name': city, 'timezone': 'Europe/Kyiv'}
+
+    def format_current_weather(self, username: str, data: dict) -> str:
+        return f"{username}: {data['location_name']}"
+
+
+@pytest.fixture
+def scheduler(store: SubscriptionStore) -> SubscriptionHandlers:
+    handlers = SubscriptionHandlers(FakeBot(), FakeWeather(), store, RateLimiter(0, 0))
+    for chat_id, city in [(1, 'Kyiv'), (2, 'kyiv'), (3, 'Lviv')]:
+        store.save(Subscription(chat_id, city, '08:00', 'Europe/Kyiv', f'user{chat_id}'))
+    return handlers
+
+
+# 08:00 in Kyiv (EEST) on 2024-07-01
+TICK = utc_minute('2024-07-01 05:00') * 60 + 5
+
+
+def test_tick_fetches_each_city_once_and_sends_each_subscription_once(scheduler: SubscriptionHandlers) -> None:
+    results = scheduler.run_tick(TICK)
+
+    assert results == {'due': 3, 'locations': 2, 'sent': 3}
+    assert scheduler.weather.lookups == {'Kyiv': 1, 'Lviv': 1}
+    assert sorted(scheduler.bot.sent) == [(1, 'user1: Kyiv'), (2, 'user2: Kyiv'), (3, 'user3: Lviv')]
+    assert scheduler.run_tick(TICK + 60) == {'due': 0, 'locations': 0}
+    assert len(scheduler.bot.sent) == 3
+
+
+def test_failed_send_is_retried_by_the_next_tick(scheduler: SubscriptionHandlers) -> None:
+    scheduler.bot.errors[3] = 400
+
+    assert scheduler.run_tick(TICK) == {'due': 3, 'locations': 2, 'sent': 2, 'failed': 1}
+    assert scheduler.run_tick(TICK + 60) == {'due': 1, 'locations': 1, 'sent': 1}
+    assert sorted(chat_id for chat_id, _ in scheduler.bot.sent) == [1, 2, 3]
+
+
+def test_missing_weather_is_retried_within_the_catch_up_window(scheduler: SubscriptionHandlers) -> None:
+    scheduler.weather.down = True
+    assert scheduler.run_tick(TICK) == {'due': 3, 'locations': 2, 'not_delivered': 3}
+
+    scheduler.weather.down = False
+    assert scheduler.run_tick(TICK + 60)['sent'] == 3
+    assert len(scheduler.bot.sent) == 3
+
+
+def test_chat_that_blocked_the_bot_loses_its_subscription(scheduler: SubscriptionHandlers) -> None:
+    scheduler.bot.errors[1] = 403
+
+    assert scheduler.run_tick(TICK)['blocked'] == 1
+    assert scheduler.subscriptions.get(1) is None
+
+
+def subscribe_message(text: str) -> object:
+    """A minimal telebot message for /subscribe."""
+    user = type('User', (), {'first_name': 'Ann', 'username': 'ann'})()
+    chat = type('Chat', (), {'id': 1})()
+    return type('Message', (), {'text': text, 'chat': chat, 'from_user': user})()
+
+
+def test_subscribe_is_refused_with_the_memory_backend() -> None:
+    bot = FakeBot()
+    subscriptions = SubscriptionStore(MemoryStateStore(), ttl=3600)
+    handlers = SubscriptionHandlers(bot, weather_service=None, subscriptions=subscriptions, limiter=RateLimiter(0, 0))
+
+    handlers.handle_subscribe(subscribe_message('/subscribe Kyiv 08:00'))
+
+    assert bot.sent == [(1, 'Ann, ежедневная погода сейчас недоступна.\n')]
+    assert subscriptions.get(1) is None
+
+
+def test_subscribe_shows_usage_with_a_persistent_backend(tmp_path) -> None:
+    bot = FakeBot()
+    subscriptions = SubscriptionStore(SQLiteStateStore(str(tmp_path / 'state.db')), ttl=3600)
+    handlers = SubscriptionHandlers(bot, weather_service=None, subscriptions=subscriptions, limiter=RateLimiter(0, 0))
+
+    handlers.handle_subscribe(subscribe_message('/subscribe'))
+
+    assert 'Пример' in bot.sent[0][1]
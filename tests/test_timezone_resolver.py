@@ -0,0 +1,25 @@
+"""Timezones of points near gazetteer cities, resolved without TimezoneFinder."""
+import pytest
+
+from config import GAZETTEER_PATH, KNOWN_TZ_RADIUS
+from services.gazetteer import Gazetteer
+from services.timezone_resolver import TimezoneResolver
+
+
+@pytest.fixture
+def gazetteer() -> Gazetteer:
+    return Gazetteer(GAZETTEER_PATH)
+
+
+def test_nearest_city_within_the_radius(gazetteer: Gazetteer) -> None:
+    assert gazetteer.nearest(50.45, 30.52, KNOWN_TZ_RADIUS).name_en == 'Kyiv'
+    assert gazetteer.nearest(50.45 + 2 * KNOWN_TZ_RADIUS, 30.52, KNOWN_TZ_RADIUS) is None
+
+
+def test_point_near_a_gazetteer_city_takes_its_timezone(gazetteer: Gazetteer) -> None:
+    resolver = TimezoneResolver(gazetteer)
+
+    tz, tz_name = resolver.resolve(49.84, 24.03)
+
+    assert tz_name == 'Europe/Kyiv' and tz.zone == 'Europe/Kyiv'
+    assert resolver._tz_finder is None
@@ -0,0 +1,104 @@
+"""WeatherService stale-while-revalidate refreshes and circuit breaker accounting."""
+import time
+
+import pytest
+import pytz
+
+from services.exceptions import WeatherServiceUnavailable
+from services.owm_parser import CurrentRecord, ForecastRecord, ForecastSeries
+from utils.bot_helpers import create_forecast_keyboard, parse_forecast_data
+from services.weather_service import WeatherService
+
+
+@pytest.fixture
+def service(monkeypatch: pytest.MonkeyPatch) -> WeatherService:
+    service = WeatherService('test-key')
+    calls = {'weather': 0, 'forecast': 0, 'geo': 0}
+
+    def fetch_current(city, lat, lon) -> CurrentRecord:
+        calls['weather'] += 1
+        time.sleep(0.05)
+        lat, lon = (49.99, 36.23) if lat is None else (lat, lon)
+        return CurrentRecord('Somewhere', lat, lon, 280.0, 1013, 50, 3.0, 'ясно', '01d')
+
+    def geo_info(lat, lon) -> dict[str, str]:
+        calls['geo'] += 1
+        time.sleep(0.05)
+        return {'country': 'UA', 'state': ''}
+
+    def fetch_forecast(city, lat, lon) -> ForecastRecord:
+        calls['forecast'] += 1
+        entries = [{
+            'dt': 1711627200 + i * 3 * 3600, 'main': {'temp': 280.0, 'pressure': 1013, 'humidity': 50},
+            'wind': {'speed': 3.0}, 'weather': [{'description': 'ясно', 'icon': '01d'}],
+        } for i in range(16)]
+        return ForecastRecord('Somewhere', 49.99, 36.23, ForecastSeries.from_json(entries))
+
+    monkeypatch.setattr(service, '_fetch_current_record', fetch_current)
+    monkeypatch.setattr(service, '_fetch_forecast_record', fetch_forecast)
+    monkeypatch.setattr(service, '_get_geo_info', geo_info)
+    monkeypatch.setattr(service, '_resolve_timezone', lambda lat, lon: (pytz.utc, 'UTC'))
+    service.calls = calls
+    return service
+
+
+def expire(service: WeatherService, age: float) -> None:
+    """Age every current weather entry by age seconds."""
+    cache = service.current_cache
+    with cache._lock:
+        for key, (stored_at, value) in list(cache._data.items()):
+            cache._data[key] = (stored_at - age, value)
+
+
+def test_many_stale_keys_refresh_without_starving_the_pool(service: WeatherService) -> None:
+    points = [(40.0 + i, 30.0) for i in range(12)]
+    for lat, lon in points:
+        assert service.get_current_weather(lat=lat, lon=lon)
+    expire(service, service.current_cache.ttl * 1.5)
+
+    for lat, lon in points:
+        assert service.get_current_weather(lat=lat, lon=lon)['stale']
+    deadline = time.monotonic() + 5
+    while service._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert not service._refreshing
+    assert service.calls['weather'] == 24
+    assert all(not service.get_current_weather(lat=lat, lon=lon).get('stale') for lat, lon in points)
+    assert service.breaker._failures == 0
+
+
+def test_local_deadline_does_not_count_as_upstream_failure(service: WeatherService, monkeypatch) -> None:
+    monkeypatch.setattr('services.weather_service.UPSTREAM_DEADLINE', 0.01)
+    for i in range(service.breaker.failure_threshold + 1):
+        with pytest.raises(WeatherServiceUnavailable):
+            service.get_current_weather(lat=10.0 + i, lon=10.0)
+    assert service.breaker._failures == 0
+    assert not service.breaker.is_open
+
+
+def test_upstream_errors_open_the_breaker(service: WeatherService, monkeypatch) -> None:
+    def fail(city, lat, lon):
+        raise ConnectionError('connection reset')
+
+    monkeypatch.setattr(service, '_fetch_current_record', fail)
+    for i in range(service.breaker.failure_threshold):
+        with pytest.raises(WeatherServiceUnavailable, match='connection reset'):
+            service.get_current_weather(lat=10.0 + i, lon=10.0)
+    assert service.breaker.is_open
+
+
+def test_forecast_button_is_served_from_the_bundle(service: WeatherService) -> None:
+    current = service.get_bundle(city='Nowhere Village')['current']
+    keyboard = create_forecast_keyboard(current).keyboard[0][0]
+    lat, lon = parse_forecast_data(keyboard.callback_data)
+
+    forecast = service.get_forecast(lat=lat, lon=lon)
+    assert forecast['forecasts']
+    assert service.calls == {'weather': 1, 'forecast': 1, 'geo': 1}
+    assert len(keyboard.callback_data.encode()) <= 64
+
+
+def test_forecast_button_without_coordinates_asks_for_a_location() -> None:
+    assert create_forecast_keyboard({}).keyboard[0][0].callback_data == 'forecast'
+    assert parse_forecast_data('forecast') is None
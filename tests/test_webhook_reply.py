@@ -0,0 +1,51 @@
+"""Webhook reply claims, and late replies after the webhook request gave up on the update."""
+import contextvars
+import threading
+
+from utils.bot_helpers import send_message
+from utils.webhook_reply import claim_webhook_reply, collect_webhook_reply
+
+
+class FakeBot:
+    """Records messages sent through the bot API."""
+
+    def __init__(self) -> None:
+        self.sent: list[tuple[int, str]] = []
+
+    def send_message(self, chat_id: int, text: str, **kwargs) -> None:
+        self.sent.append((chat_id, text))
+
+
+def test_first_call_is_claimed_and_later_ones_are_sent() -> None:
+    bot = FakeBot()
+    with collect_webhook_reply() as reply:
+        send_message(bot, 1, 'first', webhook_reply=True)
+        send_message(bot, 1, 'second', webhook_reply=True)
+
+    assert reply.payload == {'method': 'sendMessage', 'chat_id': 1, 'text': 'first'}
+    assert bot.sent == [(1, 'second')]
+
+
+def test_reply_after_timeout_falls_back_to_send_message() -> None:
+    bot = FakeBot()
+    handler_may_reply = threading.Event()
+
+    def handler() -> None:
+        handler_may_reply.wait(5)
+        send_message(bot, 1, 'late', webhook_reply=True)
+
+    with collect_webhook_reply() as reply:
+        # the handler runs in a copy of the request context, as on the update dispatcher
+        worker = threading.Thread(target=contextvars.copy_context().run, args=(handler,))
+        worker.start()
+        worker.join(timeout=0.01)
+    handler_may_reply.set()
+    worker.join(5)
+
+    assert reply.closed
+    assert reply.payload is None
+    assert bot.sent == [(1, 'late')]
+
+
+def test_nothing_is_claimed_outside_a_webhook_request() -> None:
+    assert not claim_webhook_reply('sendMessage', chat_id=1, text='x')